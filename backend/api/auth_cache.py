@@ -0,0 +1,140 @@
+"""
+Authenticated-user caching for CookieJWTAuthentication (api/utils.py).
+
+Every API request authenticates from its access token, which used to cost a
+User primary-key query per request. Two ways around it:
+
+- AuthUserCache: a bounded, TTL-based in-process cache of validated token id
+  (the `jti` claim) -> User. Entries are dropped when the user is saved or
+  deleted (api/signals.py) and on logout. The cache lives in each worker process,
+  so a change made through another process is picked up within the TTL.
+
+- Claims-only mode (AUTH_CLAIMS_ONLY): stable user fields are embedded in the
+  tokens at login and refresh, and the user is rebuilt from them without a query.
+  Tokens issued before the user was last invalidated in this process fall back
+  to the database (and the cache); a refresh re-reads the user, so deactivated
+  users lose access within ACCESS_TOKEN_LIFETIME.
+"""
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+logger = logging.getLogger(__name__)
+
+USER_CLAIM = 'usr'
+# Fields that rarely change and are all authentication / permission checks read
+USER_CLAIM_FIELDS = ('username', 'is_active', 'is_staff', 'is_superuser')
+
+
+class AuthUserCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # jti -> (expires_at, user)
+        self._invalidated = {}  # str(user id), as in the token claim -> time.time() of the last invalidation
+
+    def get(self, validated_token):
+        """
+        A copy of the cached user for this token (requests must not share an
+        instance), or None
+        """
+        jti = validated_token.get(jwt_settings.JTI_CLAIM)
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[jti]
+                return None
+            self._entries.move_to_end(jti)
+        return copy.copy(user)
+
+    def set(self, validated_token, user):
+        size = settings.AUTH_USER_CACHE_SIZE
+        jti = validated_token.get(jwt_settings.JTI_CLAIM)
+        if size <= 0 or jti is None:
+            return
+        # Never outlive the token itself
+        ttl = min(settings.AUTH_USER_CACHE_TIMEOUT, validated_token['exp'] - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[jti] = (time.monotonic() + ttl, copy.copy(user))
+            self._entries.move_to_end(jti)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        """
+        Drop every cached entry of this user and stop trusting the claims
+        of tokens issued before now
+        """
+        now = time.time()
+        horizon = now - jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        with self._lock:
+            for jti in [jti for jti, (_, user) in self._entries.items() if user.pk == user_id]:
+                del self._entries[jti]
+            self._invalidated[str(user_id)] = now
+            # Records older than any live access token can no longer matter
+            for stale in [key for key, when in self._invalidated.items() if when < horizon]:
+                del self._invalidated[stale]
+        logger.debug("Invalidated cached authentication of user %s", user_id)
+
+    def invalidated_since(self, user_id, issued_at):
+        with self._lock:
+            return self._invalidated.get(str(user_id), 0) >= issued_at
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'invalidated_users': len(self._invalidated)}
+
+
+auth_user_cache = AuthUserCache()
+
+
+# ---------- Claims-only mode ----------
+def embed_user_claims(token, user):
+    """
+    Store the stable user fields in `token` (a refresh token's claims are copied
+    into the access tokens made from it); no-op unless AUTH_CLAIMS_ONLY
+    """
+    if settings.AUTH_CLAIMS_ONLY:
+        token[USER_CLAIM] = {field: getattr(user, field) for field in USER_CLAIM_FIELDS}
+    return token
+
+
+def user_from_claims(validated_token):
+    """
+    The token's user rebuilt from its embedded claims, without a query, or None
+    when the token has no claims (or they are not trusted: AUTH_CLAIMS_ONLY off,
+    or the user was invalidated after the token was issued).
+    Other fields are deferred: reading one loads it, save() only writes the loaded ones.
+    """
+    claims = validated_token.get(USER_CLAIM)
+    if not settings.AUTH_CLAIMS_ONLY or not isinstance(claims, dict):
+        return None
+    user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+    if user_id is None or auth_user_cache.invalidated_since(user_id, validated_token.get('iat', 0)):
+        return None
+
+    if not all(field in claims for field in USER_CLAIM_FIELDS):
+        return None
+    user_model = get_user_model()
+    values = {
+        jwt_settings.USER_ID_FIELD: user_model._meta.get_field(jwt_settings.USER_ID_FIELD).to_python(user_id),
+        **{field: claims[field] for field in USER_CLAIM_FIELDS},
+    }
+    # from_db() takes the loaded values in model field order
+    field_names = [field.attname for field in user_model._meta.concrete_fields if field.attname in values]
+    return user_model.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
@@ -0,0 +1,103 @@
+"""
+Helpers shared by the benchmark management commands (api/management/commands/benchmark_*).
+
+Benchmarks seed a throwaway user inside a transaction that is always rolled back,
+so they can run against a development database without leaving data behind.
+"""
+import time
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from users.models import Category, Tag
+from tasks.models import Task
+from tasks.aggregates import refresh_subtask_aggregates
+
+WORDS = ['report', 'email', 'groceries', 'review', 'call', 'plan', 'budget', 'draft']
+
+
+def seed_tasks(user, count, seed=42, history_days=None):
+    """
+    Bulk-create `count` tasks for `user` with a realistic mix of categories,
+    tags, due dates and subtasks (about one task in five is a subtask).
+    With `history_days`, creation dates spread over that many past days and
+    tasks are due and completed around them, like a long-time user's history.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    categories = Category.objects.bulk_create([
+        Category(user=user, name=f'category {n}', priority=n) for n in range(5)
+    ])
+    tags = Tag.objects.bulk_create([Tag(user=user, name=f'tag {n}') for n in range(10)])
+
+    tasks = []
+    for n in range(count):
+        completed = rng.random() < 0.4
+        tasks.append(Task(
+            user=user,
+            title=f'{rng.choice(WORDS)} {n}',
+            description=' '.join(rng.choices(WORDS, k=6)),
+            due_date=None if n % 7 == 0 else now + timedelta(days=rng.randint(-60, 60)),
+            estimated_time=timedelta(minutes=rng.randint(5, 240)),
+            completed=completed,
+            completed_at=now if completed else None,
+            category=rng.choice(categories + [None]),
+        ))
+    Task.objects.bulk_create(tasks, batch_size=2000)
+    if history_days:
+        spread_history(tasks, history_days, rng, now)
+
+    parents = tasks[:max(1, count // 20)]
+    subtasks = tasks[len(parents):len(parents) + count // 5]
+    for task in subtasks:
+        task.parent_task = rng.choice(parents)
+    Task.objects.bulk_update(subtasks, ['parent_task'], batch_size=2000)
+    refresh_subtask_aggregates([task.pk for task in parents])
+
+    Task.tags.through.objects.bulk_create([
+        Task.tags.through(task_id=task.id, tag_id=tag.id)
+        for task in tasks for tag in rng.sample(tags, rng.randint(0, 3))
+    ], batch_size=2000)
+    return tasks
+
+
+def spread_history(tasks, days, rng, now):
+    # created_at is auto_now_add, so it can only be backdated after the insert
+    for task in tasks:
+        task.created_at = now - timedelta(days=rng.uniform(0, days))
+        if task.due_date is not None:
+            task.due_date = task.created_at + timedelta(days=rng.uniform(0, 14))
+        if task.created_at < now - timedelta(days=14):
+            task.completed = rng.random() < 0.9
+        # Most tasks are done within a few days of being created, some late
+        task.completed_at = min(now, task.created_at + timedelta(hours=rng.expovariate(1 / 48))) \
+            if task.completed else None
+    Task.objects.bulk_update(tasks, ['created_at', 'due_date', 'completed', 'completed_at'], batch_size=2000)
+
+
+@contextmanager
+def seeded_user(count, seed=42, username='benchmark', history_days=None):
+    """
+    Yield a user owning `count` seeded tasks; everything is rolled back afterwards
+    """
+    with transaction.atomic():
+        user = User.objects.create_user(f'{username}-{count}', password=None)
+        seed_tasks(user, count, seed=seed, history_days=history_days)
+        try:
+            yield user
+        finally:
+            transaction.set_rollback(True)
+
+
+def best_of(func, repeat=3):
+    """
+    Fastest wall-clock time of `repeat` calls to func(), in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
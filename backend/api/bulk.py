@@ -0,0 +1,194 @@
+"""
+Batched task create / update / delete for the bulk endpoint (api.views.TaskBulkView).
+
+The whole batch is validated up front, with one ownership query per kind of
+referenced object, then written in a single transaction using bulk_create /
+bulk_update and one insert into the tag through table. Set-based writes skip the
+per-instance signals, so subtask aggregates and cached listings are refreshed here.
+"""
+import logging
+from django.db import transaction
+from django.utils import timezone
+from tasks.models import Task
+from tasks.aggregates import refresh_subtask_aggregates
+from users.models import Category, Tag
+from api.cache import invalidate_user_responses
+
+logger = logging.getLogger(__name__)
+
+MAX_BULK_OPERATIONS = 500
+
+# request field -> model attribute
+FIELD_ATTRIBUTES = {
+    'title': 'title',
+    'description': 'description',
+    'estimated_time': 'estimated_time',
+    'due_date': 'due_date',
+    'completed': 'completed',
+    'parent_task': 'parent_task_id',
+    'category': 'category_id',
+}
+
+
+class TaskBulkOperations:
+    """
+    A batch of validated operations ({'op', 'id', 'data'} dicts from
+    TaskBulkOperationSerializer) on one user's tasks
+    """
+    def __init__(self, user, operations):
+        self.user = user
+        self.operations = operations
+        self.targets = {}
+
+    def _ids(self, op=None):
+        return [
+            operation['id'] for operation in self.operations
+            if 'id' in operation and (op is None or operation['op'] == op)
+        ]
+
+    def _referenced(self, field):
+        ids = set()
+        for operation in self.operations:
+            value = operation.get('data', {}).get(field)
+            if isinstance(value, list):
+                ids.update(value)
+            elif value is not None:
+                ids.add(value)
+        return ids
+
+    def validate(self):
+        """
+        Returns [{'index', 'errors'}] for every invalid operation (empty when the batch is valid)
+        """
+        user = self.user
+        self.targets = Task.objects.filter(user=user, pk__in=self._ids()).in_bulk()
+        categories = set(Category.objects.filter(
+            user=user, pk__in=self._referenced('category')
+        ).values_list('id', flat=True))
+        tags = set(Tag.objects.filter(
+            user=user, pk__in=self._referenced('tags')
+        ).values_list('id', flat=True))
+        parents = dict(Task.objects.filter(
+            user=user, pk__in=self._referenced('parent_task')
+        ).values_list('id', 'parent_task_id'))
+
+        # Depth is checked against each parent's state after this batch
+        for operation in self.operations:
+            data = operation.get('data', {})
+            if operation['op'] == 'update' and operation['id'] in parents and 'parent_task' in data:
+                parents[operation['id']] = data['parent_task']
+
+        seen, deleted = set(), set(self._ids('delete'))
+        failures = []
+        for index, operation in enumerate(self.operations):
+            errors = {}
+            task_id = operation.get('id')
+            data = operation.get('data', {})
+
+            if task_id is not None:
+                if task_id not in self.targets:
+                    errors['id'] = "Task not found for this user"
+                elif task_id in seen:
+                    errors['id'] = "A task can only appear in one operation per batch"
+                seen.add(task_id)
+
+            category = data.get('category')
+            if category is not None and category not in categories:
+                errors['category'] = "Invalid category selection"
+
+            if any(tag not in tags for tag in data.get('tags', [])):
+                errors['tags'] = "One or more tags are invalid"
+
+            parent = data.get('parent_task')
+            if parent is not None:
+                if parent == task_id:
+                    errors['parent_task'] = "A task cannot be its own parent"
+                elif parent not in parents:
+                    errors['parent_task'] = "Parent task not found for this user"
+                elif parent in deleted:
+                    errors['parent_task'] = "Parent task is deleted in this batch"
+                elif parents[parent] is not None:
+                    errors['parent_task'] = "Subtasks cannot have their own subtasks"
+
+            if errors:
+                failures.append({'index': index, 'errors': errors})
+        return failures
+
+    def apply(self):
+        """
+        Run the batch in one transaction. Returns per-operation results, in request order.
+        """
+        now = timezone.now()
+        created, updated, deleted_ids = [], [], []
+        tag_rows = []  # (task, tag ids) for tasks whose tags are (re)set
+        affected_parents = set()
+        changed_fields = {'updated_at'}
+
+        with transaction.atomic():
+            for operation in self.operations:
+                data = operation.get('data', {})
+                if operation['op'] == 'create':
+                    task = Task(user=self.user)
+                    self._assign(task, data, now)
+                    created.append(task)
+                elif operation['op'] == 'update':
+                    task = self.targets[operation['id']]
+                    affected_parents.add(task.parent_task_id)
+                    changed_fields.update(FIELD_ATTRIBUTES[field] for field in data if field in FIELD_ATTRIBUTES)
+                    if self._assign(task, data, now):
+                        changed_fields.add('completed_at')
+                    task.updated_at = now
+                    updated.append(task)
+                else:
+                    deleted_ids.append(operation['id'])
+                    continue
+
+                affected_parents.add(task.parent_task_id)
+                if 'tags' in data:
+                    tag_rows.append((task, list(dict.fromkeys(data['tags']))))
+
+            Task.objects.bulk_create(created)
+            if updated:
+                Task.objects.bulk_update(updated, sorted(changed_fields))
+
+            if tag_rows:
+                through = Task.tags.through
+                through.objects.filter(task_id__in=[task.pk for task, _ in tag_rows]).delete()
+                through.objects.bulk_create([
+                    through(task_id=task.pk, tag_id=tag_id)
+                    for task, tag_ids in tag_rows for tag_id in tag_ids
+                ])
+
+            if deleted_ids:
+                # Per-instance delete signals: subtask reassignment, tombstones, aggregates
+                Task.objects.filter(user=self.user, pk__in=deleted_ids).delete()
+
+            refresh_subtask_aggregates(affected_parents)
+            invalidate_user_responses(self.user.pk)
+
+        logger.info(
+            "Bulk task operations for %s: %s created, %s updated, %s deleted",
+            self.user.username, len(created), len(updated), len(deleted_ids)
+        )
+
+        created_ids = iter(task.pk for task in created)
+        results = []
+        for index, operation in enumerate(self.operations):
+            task_id = next(created_ids) if operation['op'] == 'create' else operation['id']
+            results.append({
+                'index': index,
+                'op': operation['op'],
+                'status': f"{operation['op']}d",
+                'id': task_id,
+            })
+        return results
+
+    @staticmethod
+    def _assign(task, data, now):
+        """
+        Copy request fields onto the task; returns True if completed_at changed
+        """
+        for field, attribute in FIELD_ATTRIBUTES.items():
+            if field in data:
+                setattr(task, attribute, data[field])
+        return task.sync_completed_at(now)
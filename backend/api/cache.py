@@ -0,0 +1,199 @@
+import time
+import hashlib
+import inspect
+import logging
+import threading
+from functools import wraps, partial
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+def get_cache():
+    return caches[settings.API_RESPONSE_CACHE_ALIAS]
+
+
+# ---------- Per-user generation counter ----------
+def _generation_key(user_id):
+    return f'api:generation:{user_id}'
+
+
+def _fresh_generation():
+    # A lost counter restarts from the clock, so it can never
+    # fall back onto a generation that still has cached entries
+    return int(time.time() * 1000)
+
+
+def get_user_generation(user_id):
+    cache = get_cache()
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _fresh_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+async def aget_user_generation(user_id):
+    cache = get_cache()
+    key = _generation_key(user_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, _fresh_generation(), timeout=None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def bump_user_generation(user_id):
+    """
+    Invalidate every cached response of this user
+    """
+    cache = get_cache()
+    key = _generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_generation(), timeout=None)
+
+
+def invalidate_user_responses(user_id):
+    """
+    Bump the user's generation now, and again once the current transaction commits:
+    a request running before the commit may have cached pre-commit data under the new one
+    """
+    if not user_id:
+        return
+    bump_user_generation(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(bump_user_generation, user_id))
+
+
+# ---------- Hit / miss counters (per process) ----------
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, view_name, hit):
+        with self._lock:
+            counts = self._counts.setdefault(view_name, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            views = {name: dict(counts) for name, counts in self._counts.items()}
+        return {
+            'hits': sum(counts['hits'] for counts in views.values()),
+            'misses': sum(counts['misses'] for counts in views.values()),
+            'views': views,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+# ---------- Response caching ----------
+def normalize_params(query_params):
+    """
+    Order-independent representation of the query string
+    (value order is kept, e.g. sort_by=<field>&sort_by=<direction>)
+    """
+    items = []
+    for key in query_params:
+        values = [value for value in query_params.getlist(key) if value != '']
+        if values:
+            items.append((key, values))
+    return sorted(items)
+
+
+def response_cache_key(user_id, generation, view_name, query_params, view_kwargs=None, vary=None):
+    raw = repr((normalize_params(query_params), sorted((view_kwargs or {}).items()), vary))
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f'api:response:{user_id}:{generation}:{view_name}:{digest}'
+
+
+def _cached_response(cached):
+    response = Response(cached['data'], status=cached['status'])
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def cache_user_response(view_name, vary=None):
+    """
+    Decorator for APIView GET handlers: caches the successful response data
+    per user, keyed by the normalized query params and the user's generation.
+    `vary(request)` adds to the key anything else the response depends on
+    (e.g. the current time window for responses computed against "now").
+    `async def` handlers (api.views.base.AsyncAPIView) use the async cache API.
+    """
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            return _async_cache_wrapper(view_name, method, vary)
+
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            user_id = request.user.pk
+            if not settings.API_RESPONSE_CACHE_ENABLED or user_id is None:
+                return method(self, request, *args, **kwargs)
+
+            cache = get_cache()
+            generation = get_user_generation(user_id)
+            key = response_cache_key(
+                user_id, generation, view_name, request.query_params, kwargs, vary and vary(request)
+            )
+
+            cached = cache.get(key)
+            if cached is not None:
+                cache_stats.record(view_name, hit=True)
+                return _cached_response(cached)
+
+            cache_stats.record(view_name, hit=False)
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(
+                    key,
+                    {'data': response.data, 'status': response.status_code},
+                    timeout=settings.API_RESPONSE_CACHE_TIMEOUT
+                )
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def _async_cache_wrapper(view_name, method, vary=None):
+    @wraps(method)
+    async def wrapper(self, request, *args, **kwargs):
+        user_id = request.user.pk
+        if not settings.API_RESPONSE_CACHE_ENABLED or user_id is None:
+            return await method(self, request, *args, **kwargs)
+
+        cache = get_cache()
+        generation = await aget_user_generation(user_id)
+        key = response_cache_key(
+            user_id, generation, view_name, request.query_params, kwargs, vary and vary(request)
+        )
+
+        cached = await cache.aget(key)
+        if cached is not None:
+            cache_stats.record(view_name, hit=True)
+            return _cached_response(cached)
+
+        cache_stats.record(view_name, hit=False)
+        response = await method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset(
+                key,
+                {'data': response.data, 'status': response.status_code},
+                timeout=settings.API_RESPONSE_CACHE_TIMEOUT
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+    return wrapper
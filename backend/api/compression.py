@@ -0,0 +1,155 @@
+"""
+Response compression: Accept-Encoding negotiation, brotli / gzip encoders
+and per-endpoint compression stats (used by api.middleware.CompressionMiddleware).
+"""
+import gzip
+import zlib
+import threading
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+# ---------- Encoders ----------
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compressobj(self):
+        return _GzipStream(self.level)
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        # Sync flush so every chunk can be decoded as soon as it arrives
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, quality):
+        self.quality = quality
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality)
+
+    def compressobj(self):
+        return _BrotliStream(self.quality)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def get_encoders():
+    """
+    Available encoders in order of preference
+    """
+    encoders = []
+    if brotli is not None:
+        encoders.append(BrotliEncoder(settings.COMPRESSION_BROTLI_QUALITY))
+    encoders.append(GzipEncoder(settings.COMPRESSION_GZIP_LEVEL))
+    return encoders
+
+
+# ---------- Negotiation ----------
+def parse_accept_encoding(header):
+    """
+    {coding: q} from an Accept-Encoding header; malformed q-values count as 0
+    """
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def negotiate_encoder(header, encoders):
+    """
+    The encoder the client accepts with the highest q-value (server preference breaks ties),
+    or None to send the response as-is
+    """
+    codings = parse_accept_encoding(header or '')
+    best, best_quality = None, 0.0
+    for encoder in encoders:
+        quality = codings.get(encoder.name, codings.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoder, quality
+    return best
+
+
+# ---------- Per-endpoint stats (per process) ----------
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, endpoint, encoding, raw_bytes, compressed_bytes, cpu_seconds):
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, {}).setdefault(
+                encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0}
+            )
+            counts['responses'] += 1
+            counts['bytes_in'] += raw_bytes
+            counts['bytes_out'] += compressed_bytes
+            counts['cpu_seconds'] += cpu_seconds
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {
+                endpoint: {encoding: dict(counts) for encoding, counts in encodings.items()}
+                for endpoint, encodings in self._counts.items()
+            }
+        for encodings in endpoints.values():
+            for counts in encodings.values():
+                # ratio = compressed / original size (lower is better)
+                counts['ratio'] = round(counts['bytes_out'] / counts['bytes_in'], 4) if counts['bytes_in'] else None
+                counts['cpu_ms_per_response'] = round(counts['cpu_seconds'] * 1000 / counts['responses'], 3)
+                counts['cpu_seconds'] = round(counts['cpu_seconds'], 6)
+        return {
+            'brotli_available': brotli is not None,
+            'endpoints': endpoints,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+compression_stats = CompressionStats()
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.models import Task
+from tasks.analytics import load_history, productivity_stats
+from api.benchmarks import seeded_user, best_of
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the productivity statistics (/api/stats/) for users with years of '
+        'seeded task history (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10000, 50000, 100000],
+            help='Tasks in the seeded history',
+        )
+
+        parser.add_argument(
+            '--years',
+            type=float,
+            default=5,
+            help='Years the history spans',
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per size; the fastest one is reported',
+        )
+
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=1.0,
+            help='Seconds a full computation may take',
+        )
+
+    def handle(self, *args, **options):
+        tz = timezone.get_current_timezone()
+        self.stdout.write(f"{'tasks':>8}  {'query':>9}  {'total':>9}  {'streak':>7}")
+        over_budget = False
+        for size in options['sizes']:
+            with seeded_user(size, history_days=int(options['years'] * 365)) as user:
+                queryset = Task.objects.filter(user=user)
+                now = timezone.now()
+
+                query = best_of(lambda: load_history(queryset), options['repeat'])
+                total = best_of(lambda: productivity_stats(queryset, tz, now), options['repeat'])
+                overall, _ = productivity_stats(queryset, tz, now)
+
+                over_budget |= total > options['budget']
+                self.stdout.write(
+                    f"{size:>8}  {query * 1000:>7.1f}ms  {total * 1000:>7.1f}ms  {overall['streaks']['longest']:>7}"
+                )
+
+        if over_budget:
+            self.stderr.write(self.style.ERROR(f"✗ Over the {options['budget']:g}s budget"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✓ Every size within the {options['budget']:g}s budget"))
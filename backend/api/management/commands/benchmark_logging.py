@@ -0,0 +1,171 @@
+import os
+import time
+import tempfile
+import logging
+import logging.config
+from contextlib import redirect_stderr
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from api.benchmarks import seeded_user
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _size(*paths):
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+class SlowStream:
+    """
+    A stream whose writes take `delay` extra seconds, like a backed-up stdout pipe
+    """
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def synchronous_logging(log_file, level):
+    """
+    The previous LOGGING: every record formatted and written by the request thread
+    """
+    handlers = ['console', 'file']
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'verbose': {'format': '{name} {levelname} {asctime} {module} {message}', 'style': '{'},
+        },
+        'handlers': {
+            'console': {'level': 'DEBUG', 'class': 'logging.StreamHandler', 'formatter': 'verbose'},
+            'file': {'level': 'INFO', 'class': 'logging.FileHandler', 'filename': log_file, 'formatter': 'verbose'},
+        },
+        'loggers': {
+            '': {'handlers': handlers, 'level': 'INFO'},
+            'django': {'handlers': handlers, 'level': 'INFO', 'propagate': False},
+            'users': {'handlers': handlers, 'level': level, 'propagate': False},
+            'api': {'handlers': handlers, 'level': level, 'propagate': False},
+        },
+    }
+
+
+def background_logging(log_file, level):
+    """
+    settings.LOGGING, writing to `log_file` with the api / users loggers at `level`
+    """
+    config = {
+        **settings.LOGGING,
+        'handlers': {'background': {**settings.LOGGING['handlers']['background'], 'filename': log_file}},
+    }
+    config['loggers'] = {
+        name: {**logger, 'level': level} if name in ('api', 'users') else logger
+        for name, logger in settings.LOGGING['loggers'].items()
+    }
+    return config
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares request latency (/api/tasks/ for a seeded user, rolled back afterwards) '
+        'under the previous synchronous logging and the background logging pipeline. '
+        'Log output goes to temporary files.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            default=20,
+            help='Tasks owned by the seeded user',
+        )
+
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Measured requests per configuration',
+        )
+
+        parser.add_argument(
+            '--records',
+            type=int,
+            default=5000,
+            help='Records logged back to back to time the cost per record on the calling thread '
+                 '(keep below DJANGO_LOG_QUEUE_SIZE, or the background pipeline drops the excess)',
+        )
+
+        parser.add_argument(
+            '--sink-delay-ms',
+            type=float,
+            default=0,
+            help='Extra time each console write takes, to simulate a slow log consumer',
+        )
+
+        parser.add_argument(
+            '--level',
+            default='DEBUG',
+            help='Level of the api / users loggers in both configurations',
+        )
+
+    def handle(self, *args, **options):
+        configs = [
+            ('synchronous', synchronous_logging),
+            ('background', background_logging),
+        ]
+        self.stdout.write(
+            f"{'logging':<12}  {'p50':>8}  {'p95':>8}  {'mean':>8}  {'per record':>10}  {'logged':>9}"
+        )
+        with tempfile.TemporaryDirectory() as directory, seeded_user(options['tasks']) as user:
+            client = Client(SERVER_NAME='localhost')
+            client.cookies['access_token'] = str(AccessToken.for_user(user))
+            try:
+                for name, make_config in configs:
+                    log_file = os.path.join(directory, f'{name}.log')
+                    with open(os.path.join(directory, f'{name}.console'), 'w') as console, \
+                            redirect_stderr(SlowStream(console, options['sink_delay_ms'] / 1000)), override_settings(API_RESPONSE_CACHE_ENABLED=False):
+                        logging.config.dictConfig(make_config(log_file, options['level']))
+                        timings = self.measure(client, options['requests'])
+                        per_record = self.measure_records(options['records'])
+                        # Closing the handlers drains the background queue
+                        logging.config.dictConfig(synchronous_logging(os.devnull, 'INFO'))
+                    self.stdout.write(
+                        f"{name:<12}  {_percentile(timings, 0.5) * 1000:>6.2f}ms  "
+                        f"{_percentile(timings, 0.95) * 1000:>6.2f}ms  "
+                        f"{sum(timings) / len(timings) * 1000:>6.2f}ms  {per_record * 1e6:>8.1f}µs  "
+                        f"{_size(log_file, console.name) / 1024:>7.0f}kB"
+                    )
+            finally:
+                logging.config.dictConfig(settings.LOGGING)
+
+    def measure(self, client, count):
+        for _ in range(min(20, count)):  # warm up
+            client.get('/api/tasks/')
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.get('/api/tasks/')
+            timings.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f'/api/tasks/ returned {response.status_code}')
+        return sorted(timings)
+
+    def measure_records(self, count):
+        """
+        Seconds per INFO record on the calling thread (queueing only, for the background pipeline)
+        """
+        logger = logging.getLogger('api.views')
+        start = time.perf_counter()
+        for n in range(count):
+            logger.info("Benchmark record %s", n, extra={'user_id': 1})
+        return (time.perf_counter() - start) / count
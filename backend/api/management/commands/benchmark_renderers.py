@@ -0,0 +1,66 @@
+import gzip
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from api.benchmarks import seeded_user, best_of
+from api.renderers import FastJSONRenderer, MessagePackRenderer, orjson, msgpack
+from api.views import TaskListCreateView
+
+
+class Command(BaseCommand):
+    help = 'Compares encode time and payload size of the task list response per renderer (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000],
+            help='Task list sizes to benchmark',
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Renders per renderer; the fastest one is reported',
+        )
+
+    def task_list_data(self, user):
+        request = APIRequestFactory().get('/api/tasks/')
+        force_authenticate(request, user=user)
+        return async_to_sync(TaskListCreateView.as_view())(request).data
+
+    def handle(self, *args, **options):
+        renderers = [('JSONRenderer', JSONRenderer())]
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: FastJSONRenderer uses the json fallback'))
+        renderers.append(('FastJSONRenderer', FastJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(('MessagePackRenderer', MessagePackRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('msgpack is not installed: skipping MessagePackRenderer'))
+
+        for size in options['sizes']:
+            with seeded_user(size) as user:
+                data = self.task_list_data(user)
+
+            baseline = JSONRenderer().render(data)
+            if FastJSONRenderer().render(data) != baseline:
+                self.stderr.write(self.style.ERROR(f'FastJSONRenderer output differs from JSONRenderer at {size} tasks'))
+                return
+
+            self.stdout.write(f'\n{size} tasks')
+            self.stdout.write(f"  {'renderer':<20} {'encode':>10} {'speedup':>8} {'bytes':>11} {'gzipped':>10}")
+            baseline_time = None
+            for name, renderer in renderers:
+                elapsed = best_of(lambda: renderer.render(data), options['repeat'])
+                baseline_time = baseline_time or elapsed
+                payload = renderer.render(data)
+                self.stdout.write(
+                    f'  {name:<20} {elapsed * 1000:>8.1f}ms {baseline_time / elapsed:>7.1f}x '
+                    f'{len(payload):>11,} {len(gzip.compress(payload)):>10,}'
+                )
+
+        self.stdout.write(self.style.SUCCESS('\n✓ FastJSONRenderer output identical to JSONRenderer'))
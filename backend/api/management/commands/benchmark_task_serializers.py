@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from tasks.models import Task
+from api.benchmarks import seeded_user, best_of
+from api.serializers import TaskSerializer, TaskValuesSerializer
+from api.views.task_views import TaskListCreateView
+
+
+def _normalized(data):
+    # Tag order is not defined by either path; compare tags as (id, name) sets
+    normalized = {}
+    for task in data:
+        task = dict(task)
+        task['tags'] = sorted(zip(task.pop('tags'), task.pop('tag_names')))
+        normalized[task['id']] = task
+    return normalized
+
+
+class Command(BaseCommand):
+    help = 'Compares TaskSerializer with TaskValuesSerializer on seeded task lists (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Task list sizes to benchmark',
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per serializer; the fastest one is reported',
+        )
+
+    def handle(self, *args, **options):
+        view = TaskListCreateView()
+        annotations, keys = view.get_sort_keys([])
+
+        self.stdout.write(f"{'tasks':>8}  {'TaskSerializer':>15}  {'TaskValuesSerializer':>21}  {'speedup':>8}")
+        for size in options['sizes']:
+            with seeded_user(size) as user:
+                queryset = view.apply_sorting(Task.objects.filter(user=user), keys, annotations)
+
+                def model_serializer():
+                    tasks = queryset.select_related(
+                        'category', 'parent_task__category'
+                    ).prefetch_related('tags', 'sub_tasks')
+                    return TaskSerializer(tasks, many=True).data
+
+                def values_serializer():
+                    return TaskValuesSerializer(queryset).data
+
+                if _normalized(model_serializer()) != _normalized(values_serializer()):
+                    self.stderr.write(self.style.ERROR(f'Output mismatch at {size} tasks'))
+                    return
+
+                before = best_of(model_serializer, options['repeat'])
+                after = best_of(values_serializer, options['repeat'])
+                self.stdout.write(
+                    f'{size:>8}  {before * 1000:>13.1f}ms  {after * 1000:>19.1f}ms  {before / after:>7.1f}x'
+                )
+
+        self.stdout.write(self.style.SUCCESS('✓ Outputs identical at every size'))
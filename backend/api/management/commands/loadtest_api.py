@@ -0,0 +1,146 @@
+import time
+import threading
+import http.client
+from itertools import cycle
+from urllib.parse import urlsplit
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from tasks.models import Task
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load tests the read endpoints of running servers, e.g. the WSGI and ASGI deployments:\n'
+        '  python manage.py runserver 8001 --noreload\n'
+        '  uvicorn backend.asgi:application --port 8002\n'
+        '  python manage.py loadtest_api --username demo --target wsgi=http://127.0.0.1:8001 '
+        '--target asgi=http://127.0.0.1:8002\n'
+        'Start the servers with API_RESPONSE_CACHE_ENABLED=false to measure the database path.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            action='append',
+            required=True,
+            help='name=base_url of a running server (repeat to compare deployments)',
+        )
+
+        parser.add_argument(
+            '--username',
+            required=True,
+            help='User whose tasks are requested; must exist in the servers\' database',
+        )
+
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Concurrent client connections',
+        )
+
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10.0,
+            help='Seconds to run against each target',
+        )
+
+        parser.add_argument(
+            '--warmup',
+            type=float,
+            default=2.0,
+            help='Seconds of unmeasured requests before each run',
+        )
+
+    def get_paths(self, user):
+        paths = ['/api/tasks/', '/api/tasks/top-level/', '/api/categories/', '/api/tags/']
+        parent = Task.objects.filter(user=user, parent_task__isnull=True).order_by('-subtask_count').first()
+        if parent is not None:
+            paths += [f'/api/tasks/{parent.pk}/', f'/api/tasks/{parent.pk}/subtasks/']
+        return paths
+
+    def run_load(self, base_url, paths, cookie, concurrency, duration):
+        """
+        Returns (latencies in seconds, error count, elapsed seconds)
+        """
+        url = urlsplit(base_url)
+        prefix = url.path.rstrip('/')
+        headers = {'Cookie': cookie, 'Accept': 'application/json', 'Connection': 'keep-alive'}
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def worker(offset):
+            connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            local_latencies, local_errors = [], 0
+            requests = cycle(paths[offset % len(paths):] + paths[:offset % len(paths)])
+            while time.perf_counter() < deadline:
+                path = prefix + next(requests)
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status != 200:
+                        local_errors += 1
+                    if response.getheader('Connection', '').lower() == 'close':
+                        connection.close()
+                except (OSError, http.client.HTTPException):
+                    local_errors += 1
+                    connection.close()
+                    continue
+                local_latencies.append(time.perf_counter() - start)
+            connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors[0] += local_errors
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0], time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, separator, base_url = target.partition('=')
+            if not separator or not base_url.startswith('http://'):
+                raise CommandError(f'Expected --target name=http://host:port, got {target!r}')
+            targets.append((name, base_url))
+
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+
+        cookie = f'access_token={AccessToken.for_user(user)}'
+        paths = self.get_paths(user)
+        concurrency = options['concurrency']
+        self.stdout.write(f"{concurrency} connections, {options['duration']:g}s per target over:")
+        for path in paths:
+            self.stdout.write(f'  GET {path}')
+
+        self.stdout.write(
+            f"\n  {'target':<10} {'requests':>9} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}"
+        )
+        for name, base_url in targets:
+            if options['warmup'] > 0:
+                self.run_load(base_url, paths, cookie, concurrency, options['warmup'])
+            latencies, errors, elapsed = self.run_load(base_url, paths, cookie, concurrency, options['duration'])
+            latencies.sort()
+            self.stdout.write(
+                f"  {name:<10} {len(latencies):>9} {len(latencies) / elapsed:>9.1f} "
+                f"{_percentile(latencies, 0.50) * 1000:>7.1f}ms {_percentile(latencies, 0.95) * 1000:>7.1f}ms "
+                f"{_percentile(latencies, 0.99) * 1000:>7.1f}ms {errors:>7}"
+            )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from api.revocation import purge_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes revoked refresh-token records whose tokens have expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per statement',
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_revoked_tokens(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Purged {purged} revoked tokens'))
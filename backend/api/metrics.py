@@ -0,0 +1,337 @@
+"""
+Per-endpoint performance metrics in the Prometheus text format (GET /api/metrics).
+
+MetricsMiddleware times every request and records, per URL name (task_list_create,
+task_detail, ...) and method: requests by status, a latency histogram, a histogram
+of queries per request with the total query time, response rendering
+(serialization) time and response bytes. Queries are counted by count_queries,
+an execute wrapper installed on every database connection (api/signals.py); it
+adds to the current request's RequestMetrics through a context variable, so the
+queries async views run in worker threads are counted too.
+
+Each process aggregates in memory. With METRICS_DIR set, a background thread
+writes the process's totals to METRICS_DIR/metrics-<pid>-<start>.json every
+METRICS_FLUSH_SECONDS, and a scrape merges every file in the directory, so it
+covers all worker processes. Files of exited workers are kept so counters never
+go backwards; clear the directory when the deployment restarts.
+Without METRICS_DIR a scrape reports the process that serves it.
+"""
+import os
+import glob
+import json
+import time
+import atexit
+import logging
+import threading
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    What one request spent on queries and rendering
+    """
+    __slots__ = ('queries', 'query_seconds', 'render_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.render_seconds = 0.0
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Database execute wrapper: adds each query and its time to the current request
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_seconds += time.perf_counter() - start
+
+
+def install_query_counter(connection):
+    # First in line: connection.execute_wrapper() blocks pop the last wrapper on exit,
+    # and the connection may open inside one
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+def _observe(buckets, bounds, value):
+    for index, bound in enumerate(bounds):
+        if value <= bound:
+            buckets[index] += 1
+            return
+    buckets[-1] += 1
+
+
+def _new_route(route, method):
+    return {
+        'route': route,
+        'method': method,
+        'requests': {},
+        'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        'latency_seconds': 0.0,
+        'query_buckets': [0] * (len(QUERY_BUCKETS) + 1),
+        'queries': 0,
+        'query_seconds': 0.0,
+        'render_seconds': 0.0,
+        'response_bytes': 0,
+    }
+
+
+def merge_routes(snapshots):
+    """
+    Sum per-process snapshots (lists of route entries) into one
+    """
+    merged = {}
+    for routes in snapshots:
+        for entry in routes:
+            key = (entry['route'], entry['method'])
+            total = merged.setdefault(key, _new_route(*key))
+            for status, count in entry['requests'].items():
+                total['requests'][status] = total['requests'].get(status, 0) + count
+            for name in ('latency_buckets', 'query_buckets'):
+                total[name] = [a + b for a, b in zip(total[name], entry[name])]
+            for name in ('latency_seconds', 'queries', 'query_seconds', 'render_seconds', 'response_bytes'):
+                total[name] += entry[name]
+    return [merged[key] for key in sorted(merged)]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # (route, method) -> entry, see _new_route
+        self._pid = None  # process the flush thread runs in
+        self._path = None
+
+    def record(self, route, method, status, seconds, metrics, response_bytes):
+        with self._lock:
+            entry = self._routes.get((route, method))
+            if entry is None:
+                entry = self._routes[(route, method)] = _new_route(route, method)
+            entry['requests'][status] = entry['requests'].get(status, 0) + 1
+            _observe(entry['latency_buckets'], LATENCY_BUCKETS, seconds)
+            entry['latency_seconds'] += seconds
+            _observe(entry['query_buckets'], QUERY_BUCKETS, metrics.queries)
+            entry['queries'] += metrics.queries
+            entry['query_seconds'] += metrics.query_seconds
+            entry['render_seconds'] += metrics.render_seconds
+            entry['response_bytes'] += response_bytes
+        if settings.METRICS_DIR and self._pid != os.getpid():
+            self._start_flushing()
+
+    def snapshot(self):
+        with self._lock:
+            return merge_routes([self._routes.values()])
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    # ---------- Shared store (METRICS_DIR) ----------
+    def _start_flushing(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked from a process that already reports its own totals
+                self._routes.clear()
+            self._pid = os.getpid()
+            self._path = os.path.join(settings.METRICS_DIR, f'metrics-{self._pid}-{int(time.time())}.json')
+        threading.Thread(target=self._flush_forever, name='metrics-flush', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_SECONDS)
+            self.flush()
+
+    def flush(self):
+        """
+        Write this process's totals to its file in METRICS_DIR (atomically, readers
+        never see a partial file)
+        """
+        if self._path is None or self._pid != os.getpid():
+            return
+        try:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            temporary = f'{self._path}.tmp'
+            with open(temporary, 'w') as file:
+                json.dump(self.snapshot(), file)
+            os.replace(temporary, self._path)
+        except OSError:
+            logger.warning("Could not write metrics to %s", self._path, exc_info=True)
+
+    def collect(self):
+        """
+        (route entries, number of processes they cover): every process's file
+        in METRICS_DIR, or only this process without one
+        """
+        if not settings.METRICS_DIR:
+            return self.snapshot(), 1
+        self.flush()
+        snapshots = [] if self._path else [self.snapshot()]
+        for path in glob.glob(os.path.join(glob.escape(settings.METRICS_DIR), 'metrics-*.json')):
+            try:
+                with open(path) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable metrics file %s", path, exc_info=True)
+        return merge_routes(snapshots), len(snapshots)
+
+
+metrics_registry = MetricsRegistry()
+
+
+# ---------- Prometheus text format ----------
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram(lines, name, labels, bounds, buckets, total):
+    cumulative = 0
+    for bound, count in zip(bounds + ('+Inf',), buckets):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+    lines.append(f'{name}_sum{{{labels}}} {_number(total)}')
+    lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+
+COUNTERS = (
+    ('api_db_query_duration_seconds_total', 'query_seconds', 'Time spent in database queries'),
+    ('api_render_duration_seconds_total', 'render_seconds', 'Time spent serializing response bodies'),
+    ('api_response_bytes_total', 'response_bytes', 'Response body bytes sent (after compression)'),
+)
+
+
+def render_prometheus(routes, processes=1):
+    """
+    Route entries (MetricsRegistry.collect) in the Prometheus text exposition format 0.0.4
+    """
+    lines = [
+        '# HELP api_metrics_processes Worker processes these metrics cover',
+        '# TYPE api_metrics_processes gauge',
+        f'api_metrics_processes {processes}',
+        '# HELP api_requests_total Requests by route, method and status',
+        '# TYPE api_requests_total counter',
+    ]
+    for entry in routes:
+        labels = f'route="{_label(entry["route"])}",method="{_label(entry["method"])}"'
+        for status, count in sorted(entry['requests'].items()):
+            lines.append(f'api_requests_total{{{labels},status="{_label(status)}"}} {count}')
+
+    for name, bounds, buckets, total, help_text in (
+        ('api_request_duration_seconds', LATENCY_BUCKETS, 'latency_buckets', 'latency_seconds',
+         'Request latency, middleware included'),
+        ('api_db_queries_per_request', QUERY_BUCKETS, 'query_buckets', 'queries',
+         'Database queries per request'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for entry in routes:
+            labels = f'route="{_label(entry["route"])}",method="{_label(entry["method"])}"'
+            _histogram(lines, name, labels, bounds, entry[buckets], entry[total])
+
+    for name, key, help_text in COUNTERS:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for entry in routes:
+            labels = f'route="{_label(entry["route"])}",method="{_label(entry["method"])}"'
+            lines.append(f'{name}{{{labels}}} {_number(entry[key])}')
+    return '\n'.join(lines) + '\n'
+
+
+# ---------- Middleware ----------
+def route_name(request):
+    """
+    URL name the request resolved to ('task_detail'), so metrics group per endpoint
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is not None:
+        return match.view_name
+    return 'unresolved'
+
+
+class MetricsMiddleware:
+    """
+    Records every request in metrics_registry. Listed first in MIDDLEWARE, so
+    latency covers the whole middleware stack and response bytes are the
+    (compressed) bytes sent. Works under WSGI and ASGI without thread hops.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django would run a sync hook in a worker thread for async requests
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, time.perf_counter() - start, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, time.perf_counter() - start, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time it with a post-render callback
+        metrics = _current.get()
+        if metrics is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                metrics.render_seconds += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return MetricsMiddleware.process_template_response(self, request, response)
+
+    @staticmethod
+    def record(request, response, seconds, metrics):
+        if response.streaming:
+            response_bytes = int(response.get('Content-Length') or 0)
+        else:
+            response_bytes = len(response.content)
+        metrics_registry.record(
+            route_name(request), request.method, str(response.status_code), seconds, metrics, response_bytes
+        )
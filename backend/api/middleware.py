@@ -0,0 +1,129 @@
+import time
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from api.compression import compression_stats, get_encoders, negotiate_encoder
+
+# Formats that are already compressed; recompressing them only burns CPU
+COMPRESSED_CONTENT_TYPES = (
+    'image/', 'video/', 'audio/',
+    'application/zip', 'application/gzip', 'application/x-gzip',
+    'application/x-brotli', 'application/pdf', 'font/woff',
+)
+
+
+def endpoint_name(request):
+    """
+    URL pattern the request resolved to (e.g. 'api/tasks/<int:pk>/'), so stats group per endpoint
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.route:
+        return match.route
+    return 'unresolved'
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Brotli / gzip response compression negotiated from Accept-Encoding.
+
+    Responses under COMPRESSION_MIN_SIZE, already-encoded responses, compressed media
+    types and anything under COMPRESSION_EXCLUDE_PATHS (profile images) are sent as-is.
+    Streaming responses are compressed chunk by chunk. Ratio and CPU time are
+    recorded per endpoint in api.compression.compression_stats.
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.encoders = get_encoders()
+
+    def skip(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return True
+        if any(request.path.startswith(prefix) for prefix in settings.COMPRESSION_EXCLUDE_PATHS):
+            return True
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(COMPRESSED_CONTENT_TYPES):
+            return True
+        return not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE
+
+    def process_response(self, request, response):
+        if self.skip(request, response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoder = negotiate_encoder(request.META.get('HTTP_ACCEPT_ENCODING'), self.encoders)
+        if encoder is None:
+            return response
+
+        endpoint = endpoint_name(request)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(
+                    response.streaming_content, encoder, endpoint
+                )
+            else:
+                response.streaming_content = self.compress_stream(
+                    response.streaming_content, encoder, endpoint
+                )
+            # The compressed length isn't known until the stream ends
+            del response.headers['Content-Length']
+        else:
+            start = time.thread_time()
+            compressed = encoder.compress(response.content)
+            cpu_seconds = time.thread_time() - start
+            if len(compressed) >= len(response.content):
+                return response
+
+            compression_stats.record(endpoint, encoder.name, len(response.content), len(compressed), cpu_seconds)
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag no longer matches the encoded bytes (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoder.name
+        return response
+
+    @staticmethod
+    def compress_stream(chunks, encoder, endpoint):
+        stream = encoder.compressobj()
+        raw_bytes = compressed_bytes = 0
+        cpu_seconds = 0.0
+        for chunk in chunks:
+            start = time.thread_time()
+            data = stream.compress(chunk)
+            cpu_seconds += time.thread_time() - start
+            raw_bytes += len(chunk)
+            compressed_bytes += len(data)
+            if data:
+                yield data
+
+        start = time.thread_time()
+        data = stream.finish()
+        cpu_seconds += time.thread_time() - start
+        compressed_bytes += len(data)
+        compression_stats.record(endpoint, encoder.name, raw_bytes, compressed_bytes, cpu_seconds)
+        if data:
+            yield data
+
+    @staticmethod
+    async def compress_async_stream(chunks, encoder, endpoint):
+        stream = encoder.compressobj()
+        raw_bytes = compressed_bytes = 0
+        cpu_seconds = 0.0
+        async for chunk in chunks:
+            start = time.thread_time()
+            data = stream.compress(chunk)
+            cpu_seconds += time.thread_time() - start
+            raw_bytes += len(chunk)
+            compressed_bytes += len(data)
+            if data:
+                yield data
+
+        start = time.thread_time()
+        data = stream.finish()
+        cpu_seconds += time.thread_time() - start
+        compressed_bytes += len(data)
+        compression_stats.record(endpoint, encoder.name, raw_bytes, compressed_bytes, cpu_seconds)
+        if data:
+            yield data
@@ -1,3 +1,26 @@
 from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
 
-# Create your models here.
+
+class RevokedToken(models.Model):
+    """
+    A refresh token that may no longer be used: rotated away by a refresh, or
+    logged out. Kept until the token would have expired anyway (see api/revocation.py).
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    # No FK constraint: like tombstones, rows may be written while the user goes away
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False, null=True, related_name='+')
+    revoked_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # incremental prefilter sync
+            models.Index(fields=['revoked_at'], name='revoked_token_revoked_idx'),
+            # batched purge
+            models.Index(fields=['expires_at'], name='revoked_token_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f'Token {self.jti} (revoked {self.revoked_at})'
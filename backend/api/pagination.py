@@ -0,0 +1,175 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class SortKey(namedtuple('SortKey', ['field', 'descending', 'nulls'])):
+    """
+    A single column of a keyset ordering.
+    `nulls` is 'first' or 'last' for nullable columns, None for non-nullable ones.
+    """
+    def order_by(self):
+        expr = F(self.field)
+        kwargs = {}
+        if self.nulls == 'first':
+            kwargs['nulls_first'] = True
+        elif self.nulls == 'last':
+            kwargs['nulls_last'] = True
+        return expr.desc(**kwargs) if self.descending else expr.asc(**kwargs)
+
+    def equal_to(self, value):
+        if value is None:
+            return Q(**{f'{self.field}__isnull': True})
+        return Q(**{self.field: value})
+
+    def after(self, value):
+        """
+        Q matching rows that sort strictly after `value` on this key,
+        or None if no row can
+        """
+        if value is None:
+            # Only a leading block of nulls can be followed by non-null values
+            if self.nulls == 'first':
+                return Q(**{f'{self.field}__isnull': False})
+            return None
+
+        lookup = 'lt' if self.descending else 'gt'
+        condition = Q(**{f'{self.field}__{lookup}': value})
+        if self.nulls == 'last':
+            condition |= Q(**{f'{self.field}__isnull': True})
+        return condition
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, timedelta):
+        return {'td': value // timedelta(microseconds=1)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            parsed = parse_datetime(value['dt'])
+            if parsed is None:
+                raise InvalidCursor('Malformed datetime in cursor')
+            return parsed
+        if 'td' in value:
+            return timedelta(microseconds=value['td'])
+        raise InvalidCursor('Unknown value type in cursor')
+    return value
+
+
+def _read_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over an ordered list of SortKeys.
+    The last key must be unique (e.g. the primary key) so every row has a stable position.
+    """
+    def __init__(self, keys, limit=DEFAULT_PAGE_SIZE):
+        self.keys = list(keys)
+        self.limit = limit
+
+    @property
+    def signature(self):
+        # Null placement is part of the ordering: due_date nulls first and nulls last page differently
+        return [
+            f"{'-' if key.descending else ''}{key.field}{f' nulls {key.nulls}' if key.nulls else ''}"
+            for key in self.keys
+        ]
+
+    def encode_cursor(self, row):
+        payload = {
+            'k': self.signature,
+            'v': [_encode_value(_read_value(row, key.field)) for key in self.keys],
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            signature, values = payload['k'], payload['v']
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor('Malformed cursor')
+
+        # A cursor is only meaningful for the ordering it was issued under
+        if signature != self.signature or len(values) != len(self.keys):
+            raise InvalidCursor('Cursor does not match the requested sorting')
+        return [_decode_value(value) for value in values]
+
+    def cursor_filter(self, values):
+        """
+        Build the Q selecting rows after the given key values:
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+        """
+        condition = Q(pk__in=[])
+        for index, key in enumerate(self.keys):
+            after = key.after(values[index])
+            if after is None:
+                continue
+            for previous, value in zip(self.keys[:index], values[:index]):
+                after &= previous.equal_to(value)
+            condition |= after
+        return condition
+
+    def page_queryset(self, queryset, cursor=None):
+        """
+        The rows of the page following `cursor`, plus one to tell whether more follow
+        """
+        if cursor:
+            queryset = queryset.filter(self.cursor_filter(self.decode_cursor(cursor)))
+        return queryset[:self.limit + 1]
+
+    def paginate(self, queryset, cursor=None):
+        """
+        Return (rows, next_cursor) for the page following `cursor`.
+        `queryset` must already be ordered by self.keys.
+        """
+        return self.split_page(list(self.page_queryset(queryset, cursor)))
+
+    async def apaginate(self, queryset, cursor=None):
+        """
+        paginate() with the async ORM
+        """
+        return self.split_page([row async for row in self.page_queryset(queryset, cursor)])
+
+    def split_page(self, rows):
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        next_cursor = self.encode_cursor(rows[-1]) if has_more else None
+        return rows, next_cursor
+
+
+def parse_page_size(value):
+    """
+    Parse the `limit` query param, clamping it to MAX_PAGE_SIZE
+    """
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor('limit must be an integer')
+    if size < 1:
+        raise InvalidCursor('limit must be positive')
+    return min(size, MAX_PAGE_SIZE)
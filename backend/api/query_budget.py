@@ -0,0 +1,199 @@
+"""
+Query-count budgets for API endpoints (see EndpointQueryBudgetTests in api/tests.py).
+
+QueryBudgetTestCase seeds one user per size in SIZES with api.benchmarks.seed_tasks
+(categories, tags, subtasks) and calls an endpoint as each of them. An
+EndpointCase fails when its query count changes with the amount of data (an N+1)
+or goes over its budget; the failure lists the queries, grouped by statement,
+with the frames of our code that issued them, async views included.
+"""
+import os
+import asyncio
+import traceback
+from collections import namedtuple
+from urllib.parse import urlencode
+from asgiref.sync import SyncToAsync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import Category, Tag
+from tasks.models import Task
+from api.auth_cache import auth_user_cache
+from api.benchmarks import seed_tasks
+from api.revocation import revoked_tokens
+
+PASSWORD = 'budget-password'
+PROJECT_DIR = os.path.join(str(settings.BASE_DIR), '')
+# Frames that are on every query's stack and say nothing about where it came from
+IGNORED_FILES = {__file__, os.path.join(PROJECT_DIR, 'manage.py'), os.path.join(PROJECT_DIR, 'api', 'metrics.py')}
+MAX_FRAMES = 6
+
+# `request(dataset)` returns the call's URL `kwargs`, query `params` (lists repeat the
+# param), body `data` and `cookies`
+EndpointCase = namedtuple(
+    'EndpointCase',
+    ['route', 'method', 'budget', 'request', 'status', 'authenticated', 'multipart'],
+    defaults=(None, 200, True, False)
+)
+
+# One seeded user: `parent` has subtasks, `task` is a subtask, `tag` is the most used tag
+Dataset = namedtuple('Dataset', ['size', 'user', 'parent', 'task', 'category', 'tag'])
+
+
+def seed_dataset(size, seed=42):
+    user = User.objects.create_user(
+        f'budget-{size}', email=f'budget-{size}@example.com', password=PASSWORD,
+        is_staff=True  # so the staff-only stats routes are measured too
+    )
+    seed_tasks(user, size, seed=seed)
+    tasks = Task.objects.filter(user=user)
+    return Dataset(
+        size=size,
+        user=user,
+        parent=tasks.filter(subtask_count__gt=0).order_by('-subtask_count', 'id').first(),
+        task=tasks.filter(parent_task__isnull=False).order_by('id').first(),
+        category=Category.objects.filter(user=user).order_by('id').first(),
+        tag=Tag.objects.filter(user=user).annotate(uses=Count('task')).order_by('-uses', 'id').first(),
+    )
+
+
+# ---------- Recording ----------
+def _is_application_frame(frame):
+    return (
+        frame.filename.startswith(PROJECT_DIR)
+        and 'site-packages' not in frame.filename
+        and frame.filename not in IGNORED_FILES
+        and not os.path.basename(frame.filename).startswith('tests')
+    )
+
+
+def _coroutine_frames(coro):
+    # Task.get_stack() stops at the outermost frame of a suspended coroutine;
+    # follow what each one awaits down to the innermost
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None) or getattr(coro, 'ag_frame', None)
+        if frame is None:
+            break
+        frames.append((frame, frame.f_lineno))
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None) or getattr(coro, 'ag_await', None)
+    return traceback.StackSummary.extract(frames)
+
+
+def application_frames():
+    """
+    Frames of our code that led to the current query: this thread's stack, and the
+    suspended coroutines of an async view waiting for it in sync_to_async
+    """
+    frames = list(traceback.extract_stack())
+    loop = getattr(SyncToAsync.threadlocal, 'main_event_loop', None)
+    if loop is not None and not loop.is_closed():
+        try:
+            tasks = asyncio.all_tasks(loop)
+        except RuntimeError:
+            tasks = ()
+        for task in tasks:
+            frames[:0] = _coroutine_frames(task.get_coro())
+    return [frame for frame in frames if _is_application_frame(frame)]
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() keeping each query's SQL and application frames
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, application_frames()))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def describe(self):
+        """
+        The queries grouped by statement, most repeated first, each with the frames of its first run
+        """
+        groups = {}
+        for sql, frames in self.queries:
+            groups.setdefault(sql, [0, frames])[0] += 1
+        lines = []
+        for sql, (repeats, frames) in sorted(groups.items(), key=lambda item: -item[1][0]):
+            lines.append(f'{repeats}x {sql}')
+            lines += [
+                f'      {os.path.relpath(frame.filename, PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+                for frame in frames[-MAX_FRAMES:]
+            ]
+        return '\n'.join(lines)
+
+
+# ---------- Test case ----------
+@override_settings(
+    API_RESPONSE_CACHE_ENABLED=False,  # measure the database path
+    REVOKED_TOKEN_SYNC_SECONDS=0,  # same revocation queries on every refresh
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueryBudgetTestCase(TestCase):
+    SIZES = (5, 50, 150)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datasets = [seed_dataset(size, seed=index) for index, size in enumerate(cls.SIZES)]
+
+    def setUp(self):
+        auth_user_cache.clear()
+        revoked_tokens.reset()
+
+    def call(self, case, dataset, recorder):
+        request = case.request(dataset) if case.request else {}
+        path = reverse(case.route, kwargs=request.get('kwargs'))
+        client = self.client_class()
+        if case.authenticated:
+            client.cookies['access_token'] = str(AccessToken.for_user(dataset.user))
+            # Warm the authenticated-user cache, as for any user past their first request
+            client.get(reverse('current_user'))
+        for name, value in request.get('cookies', {}).items():
+            client.cookies[name] = value
+
+        data, content_type = request.get('data'), 'application/json'
+        if case.multipart:
+            data, content_type = encode_multipart(BOUNDARY, data or {}), MULTIPART_CONTENT
+        if request.get('params'):
+            path = f"{path}?{urlencode(request['params'], doseq=True)}"
+
+        with connection.execute_wrapper(recorder):
+            if case.method == 'GET':
+                return client.get(path)
+            # JSON bodies are encoded by the test client
+            return getattr(client, case.method.lower())(path, data, content_type=content_type)
+
+    def assertQueryBudget(self, case):
+        """
+        Call the endpoint as every seeded user; the query count must not change
+        with the amount of data nor exceed case.budget
+        """
+        recorders = []
+        for dataset in self.datasets:
+            recorder = QueryRecorder()
+            response = self.call(case, dataset, recorder)
+            self.assertEqual(
+                response.status_code, case.status,
+                f'{case.method} {case.route} with {dataset.size} tasks: {response.content[:500]!r}'
+            )
+            recorders.append(recorder)
+
+        counts = [len(recorder) for recorder in recorders]
+        worst = max(range(len(counts)), key=counts.__getitem__)
+        if len(set(counts)) > 1 or counts[worst] > case.budget:
+            measured = ', '.join(f'{n} with {dataset.size} tasks' for n, dataset in zip(counts, self.datasets))
+            problem = 'changes with the data' if len(set(counts)) > 1 else f'is over the budget of {case.budget}'
+            self.fail(
+                f'{case.method} {case.route}: query count {problem} ({measured})\n'
+                f'Queries with {self.datasets[worst].size} tasks:\n{recorders[worst].describe()}'
+            )
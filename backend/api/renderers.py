@@ -0,0 +1,69 @@
+"""
+Response renderers picked by content negotiation (see REST_FRAMEWORK in settings).
+
+FastJSONRenderer produces the same bytes as DRF's JSONRenderer, using orjson when
+it is installed. MessagePackRenderer serves `Accept: application/msgpack` when
+msgpack is installed. Values JSON can't represent natively (datetimes, durations,
+decimals, lazy strings...) go through DRF's JSONEncoder in both, so they are
+formatted exactly as in the default JSON output.
+"""
+import logging
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+    # datetimes go through DRF's encoder; int keys become strings as with json.dumps
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer backed by orjson. Anything orjson can't reproduce
+    byte-for-byte (indented or ASCII-only output, non-compact separators,
+    out-of-range integers) is rendered by the pure-Python JSONRenderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:  # orjson.JSONEncodeError
+            logger.debug("orjson could not encode the response, falling back to json", exc_info=True)
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict-javascript-subset escaping as JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders `application/msgpack`. Only listed in DEFAULT_RENDERER_CLASSES when msgpack is installed.
+    Dict keys keep their type (task ids stay integers).
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
@@ -0,0 +1,149 @@
+"""
+Refresh-token revocation: rotated-away and logged-out refresh tokens are recorded
+as RevokedToken rows (unique jti, indexed by revocation and expiry time).
+
+Checks go through an in-process Bloom filter of the revoked jtis, so the common
+case (a token that was never revoked) costs no query; a filter hit is confirmed
+against the table, which absorbs false positives. The filter may lag behind other
+processes, so a refresh relies on revoke() instead: the unique INSERT of the jti
+succeeds for exactly one request, however many present the same token at once.
+
+Revocations made in this process enter the filter at once. Those made by other
+worker processes are picked up by an incremental sync of recently revoked rows,
+at most every REVOKED_TOKEN_SYNC_SECONDS (0 syncs on every check). Each sync
+re-reads a short overlap window, so rows committed out of order are not missed.
+The filter is rebuilt from the unexpired rows when it fills up or outlives a
+refresh token lifetime, which drops expired jtis from it; purge_revoked_tokens()
+deletes the expired rows themselves in batches.
+"""
+import math
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class BloomFilter:
+    """
+    Set membership with no false negatives and about `error_rate` false positives
+    while holding at most `capacity` items
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + n * second) % self.size for n in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Revoked refresh-token jtis of this process, backed by the RevokedToken table
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._high_water = None  # latest revoked_at seen
+
+    def _rebuild(self, now):
+        rows = list(RevokedToken.objects.filter(expires_at__gt=now).values_list('jti', 'revoked_at'))
+        bloom = BloomFilter(max(settings.REVOKED_TOKEN_FILTER_CAPACITY, 2 * len(rows)))
+        for jti, _ in rows:
+            bloom.add(jti)
+        self._filter = bloom
+        self._high_water = max((revoked_at for _, revoked_at in rows), default=now)
+        self._built_at = time.monotonic()
+        logger.debug("Rebuilt the revoked token filter with %s tokens", len(rows))
+
+    def _sync(self):
+        now = timezone.now()
+        stale = time.monotonic() - self._built_at > jwt_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+        if self._filter is None or stale or self._filter.count > self._filter.capacity:
+            self._rebuild(now)
+        else:
+            rows = RevokedToken.objects.filter(
+                revoked_at__gte=self._high_water - SYNC_OVERLAP
+            ).values_list('jti', 'revoked_at')
+            for jti, revoked_at in rows:
+                if jti not in self._filter:
+                    self._filter.add(jti)
+                self._high_water = max(self._high_water, revoked_at)
+        self._synced_at = time.monotonic()
+
+    def is_revoked(self, jti):
+        with self._lock:
+            if self._filter is None or time.monotonic() - self._synced_at >= settings.REVOKED_TOKEN_SYNC_SECONDS:
+                self._sync()
+            if jti not in self._filter:
+                return False
+        # Possible false positive: the table decides
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, token):
+        """
+        Revoke a refresh token (a validated simplejwt Token). Idempotent.
+        Returns True if this call revoked it, False if it already was revoked.
+        """
+        jti = token[jwt_settings.JTI_CLAIM]
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti,
+                    user_id=token.get(jwt_settings.USER_ID_CLAIM),
+                    expires_at=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+                )
+            revoked = True
+        except IntegrityError:
+            revoked = False
+        with self._lock:
+            if self._filter is not None and jti not in self._filter:
+                self._filter.add(jti)
+        return revoked
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+
+
+revoked_tokens = RevocationList()
+
+
+def purge_revoked_tokens(batch_size=1000, now=None):
+    """
+    Delete revoked-token rows whose tokens have expired, `batch_size` rows per
+    statement so the table is never locked for long. Returns the number removed.
+    """
+    now = now or timezone.now()
+    purged = 0
+    while True:
+        batch = list(RevokedToken.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+        if not batch:
+            return purged
+        deleted, _ = RevokedToken.objects.filter(id__in=batch).delete()
+        purged += deleted
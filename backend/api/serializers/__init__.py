@@ -1,3 +1,9 @@
-from .user_serializers import UserSerializer, ProfileSerializer, UserRegistrationSerializer
-from .task_serializers import TaskSerializer, SubtaskSerializer
+from .user_serializers import (
+    UserSerializer, ProfileSerializer, UserRegistrationSerializer,
+    ClaimsTokenObtainPairSerializer
+)
+from .task_serializers import (
+    TaskSerializer, SubtaskSerializer, TaskValuesSerializer,
+    TaskBulkOperationSerializer
+)
 from .category_tag_serializers import CategorySerializer, TagSerializer
@@ -13,19 +13,19 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
     
     def create(self, validated_data):
-        logger.info(f"Creating new category: {validated_data.get('name')}")
+        logger.info("Creating new category: %s", validated_data.get('name'))
         try:
             return super().create(validated_data)
         except Exception as e:
-            logger.exception(f"Failed to create category: {str(e)}")
+            logger.exception("Failed to create category: %s", e)
             raise serializers.ValidationError("Failed to create category")
     
     def update(self, instance, validated_data):
-        logger.info(f"Updating category: {instance.name}")
+        logger.info("Updating category: %s", instance.name)
         try:
             return super().update(instance, validated_data)
         except Exception as e:
-            logger.exception(f"Failed to update category: {str(e)}")
+            logger.exception("Failed to update category: %s", e)
             raise serializers.ValidationError("Failed to update category")
 
 
@@ -38,17 +38,17 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def create(self, validated_data):
-        logger.info(f"Creating new tag: {validated_data.get('name')}")
+        logger.info("Creating new tag: %s", validated_data.get('name'))
         try:
             return super().create(validated_data)
         except Exception as e:
-            logger.exception(f"Failed to create tag: {str(e)}")
+            logger.exception("Failed to create tag: %s", e)
             raise serializers.ValidationError("Failed to create tag")
     
     def update(self, instance, validated_data):
-        logger.info(f"Updating tag: {instance.name}")
+        logger.info("Updating tag: %s", instance.name)
         try:
             return super().update(instance, validated_data)
         except Exception as e:
-            logger.exception(f"Failed to update tag: {str(e)}")
+            logger.exception("Failed to update tag: %s", e)
             raise serializers.ValidationError("Failed to update tag")
\ No newline at end of file
@@ -1,6 +1,18 @@
 import logging
-from rest_framework import serializers
+from collections import defaultdict
+from functools import cached_property
+from operator import itemgetter
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import QuerySet
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.duration import duration_string
+from rest_framework import serializers, ISO_8601
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.settings import api_settings
 from tasks.models import Task
+from users.models import Category, Tag
 
 
 logger = logging.getLogger(__name__)
@@ -29,8 +41,70 @@ class SubtaskSerializer(serializers.ModelSerializer):
 
 
 
+class UserOwnedManyRelatedField(serializers.ManyRelatedField):
+    """
+    ManyRelatedField resolving every pk with one query instead of one per item
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pks = list(dict.fromkeys(child.to_pk(item) for item in data))
+        objects = child.get_queryset().in_bulk(pks)
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            child.fail('does_not_exist', pk_value=missing[0])
+        return [objects[pk] for pk in pks]
+
+
+class UserOwnedRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField limited to the requesting user's objects: resolving a pk
+    is also its ownership check, in the same query. With many=True all pks are
+    resolved together (UserOwnedManyRelatedField).
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.context['request'].user)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return UserOwnedManyRelatedField(**list_kwargs)
+
+    def to_pk(self, data):
+        """
+        The validated (not yet looked up) primary key for `data`
+        """
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 class TaskSerializer(serializers.ModelSerializer):
-    
+
+    # Related objects resolve with one query per field, scoped to request.user
+    parent_task = UserOwnedRelatedField(
+        queryset=Task.objects.all(), allow_null=True, required=False,
+        error_messages={'does_not_exist': "Parent task not found for this user"}
+    )
+    category = UserOwnedRelatedField(
+        queryset=Category.objects.all(), allow_null=True, required=False,
+        error_messages={'does_not_exist': "Invalid category selection"}
+    )
+    tags = UserOwnedRelatedField(
+        queryset=Tag.objects.all(), many=True, required=False,
+        error_messages={'does_not_exist': "One or more tags are invalid"}
+    )
+
     # Nested serializers for related objects
     has_subtasks = serializers.SerializerMethodField(read_only=True)
     category_name = serializers.SerializerMethodField(read_only=True)
@@ -42,9 +116,13 @@ class TaskSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'estimated_time', 'due_date',
             'completed', 'created_at', 'updated_at', 'completed_at',
             'user', 'parent_task', 'has_subtasks', 'sub_tasks', 
-            'category', 'category_name', 'tags', 'tag_names'
+            'category', 'category_name', 'tags', 'tag_names',
+            'subtask_count', 'completed_subtask_count', 'remaining_subtask_time'
+        ]
+        read_only_fields = [
+            'id', 'user', 'created_at', 'updated_at', 'sub_tasks',
+            'subtask_count', 'completed_subtask_count', 'remaining_subtask_time'
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at', 'sub_tasks']
 
     def get_category_name(self, obj):
         if obj.category:
@@ -57,11 +135,11 @@ class TaskSerializer(serializers.ModelSerializer):
         return [tag.name for tag in obj.tags.all()]
     
     def get_has_subtasks(self, obj):
-        return obj.sub_tasks.exists()
+        return obj.subtask_count > 0
 
     
     def create(self, validated_data):
-        logger.info(f"Creating new task: {validated_data.get('title')}")
+        logger.info("Creating new task: %s", validated_data.get('title'))
         try:
             # Extract tags
             tags_data = validated_data.pop('tags', [])
@@ -74,11 +152,11 @@ class TaskSerializer(serializers.ModelSerializer):
             
             return task
         except Exception as e:
-            logger.exception(f"Failed to create task: {str(e)}")
+            logger.exception("Failed to create task: %s", e)
             raise serializers.ValidationError("Failed to create task")
 
     def update(self, instance, validated_data):
-        logger.info(f"Updating task: {instance.title}")
+        logger.info("Updating task: %s", instance.title)
         try:
             # Extract tags
             tags_data = validated_data.pop('tags', None)
@@ -95,7 +173,7 @@ class TaskSerializer(serializers.ModelSerializer):
 
             return instance
         except Exception as e:
-            logger.exception(f"Failed to update task: {str(e)}")
+            logger.exception("Failed to update task: %s", e)
             raise serializers.ValidationError("Failed to update task")
 
     def validate(self, data):
@@ -104,23 +182,226 @@ class TaskSerializer(serializers.ModelSerializer):
         if (self.instance and parent_task) and (parent_task.id == self.instance.id):
             raise serializers.ValidationError({"parent_task": "A task cannot be its own parent"})
         # Check that sub_task is not exceeding max depth of 1
-        if parent_task and parent_task.parent_task:
+        if parent_task and parent_task.parent_task_id:
             raise serializers.ValidationError({"parent_task": "Subtasks cannot have their own subtasks"})
-        
-        # Check that category belongs to the user
-        category = data.get('category')
-        if category and category.user.id != self.context['request'].user.id:
-            raise serializers.ValidationError({"category": "Invalid category selection"})
-        
-        # Validate tags
-        if 'tags' in data:
-            tags = data.get('tags', [])
-            user = self.context['request'].user
-
-            # Check that all tags belong to user
-            for tag in tags:
-                if tag.user.id != user.id:
-                    raise serializers.ValidationError({"tags": "One or more tags are invalid"})
-        
+
+        # Category / tag / parent ownership is enforced by the fields' user-scoped querysets
         return data
-    
+
+
+
+class TaskBulkFieldsSerializer(serializers.Serializer):
+    """
+    Task fields accepted by the bulk endpoint. Related objects are plain ids here:
+    ownership is checked for the whole batch at once (see api/bulk.py)
+    """
+    title = serializers.CharField(max_length=225, required=False)
+    description = serializers.CharField(allow_null=True, allow_blank=True, required=False)
+    estimated_time = serializers.DurationField(allow_null=True, required=False)
+    due_date = serializers.DateTimeField(allow_null=True, required=False)
+    completed = serializers.BooleanField(required=False)
+    parent_task = serializers.IntegerField(allow_null=True, required=False)
+    category = serializers.IntegerField(allow_null=True, required=False)
+    tags = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class TaskBulkOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    id = serializers.IntegerField(required=False)
+    data = TaskBulkFieldsSerializer(required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError({"id": f"An id is required to {attrs['op']} a task"})
+        if attrs['op'] == 'create' and 'id' in attrs:
+            raise serializers.ValidationError({"id": "New tasks cannot be given an id"})
+        if attrs['op'] != 'delete':
+            attrs.setdefault('data', {})
+        return attrs
+
+
+
+class TaskValuesSerializer:
+    """
+    Read-only list serializer producing the same JSON as TaskSerializer,
+    built from values() rows: category names are joined in SQL and tags /
+    sub_tasks are fetched with one query each, with no model instances or
+    per-row field callbacks.
+
+    Accepts a Task queryset, or a list of rows fetched through
+    TaskValuesSerializer.values() (e.g. one page from the keyset paginator).
+    `fields` limits the output to a subset of TaskSerializer's fields; columns,
+    joins and queries that only feed other fields are skipped.
+    """
+    all_fields = TaskSerializer.Meta.fields
+
+    # values() columns each output field reads
+    field_sources = {
+        'id': ['id'],
+        'title': ['title'],
+        'description': ['description'],
+        'estimated_time': ['estimated_time'],
+        'due_date': ['due_date'],
+        'completed': ['completed'],
+        'created_at': ['created_at'],
+        'updated_at': ['updated_at'],
+        'completed_at': ['completed_at'],
+        'user': ['user_id'],
+        'parent_task': ['parent_task_id'],
+        'has_subtasks': ['subtask_count'],
+        'sub_tasks': ['id'],
+        'category': ['category_id'],
+        'category_name': ['id'],  # plus the category_name_value annotation
+        'tags': ['id'],
+        'tag_names': ['id'],
+        'subtask_count': ['subtask_count'],
+        'completed_subtask_count': ['completed_subtask_count'],
+        'remaining_subtask_time': ['remaining_subtask_time'],
+    }
+
+    def __init__(self, instance, many=True, fields=None):
+        self.instance = instance
+        self.fields = self.all_fields if fields is None else [
+            field for field in self.all_fields if field in fields
+        ]
+
+    @classmethod
+    def values(cls, queryset, fields=None, extra_fields=()):
+        """
+        values() queryset with the columns the requested fields need;
+        `extra_fields` keeps e.g. sort-key annotations on each row for pagination
+        """
+        fields = cls.all_fields if fields is None else fields
+        columns = list(dict.fromkeys(
+            column for field in fields for column in cls.field_sources[field]
+        ))
+        columns += [field for field in extra_fields if field not in columns]
+
+        annotations = {}
+        if 'category_name' in fields:
+            # same fallback as TaskSerializer.get_category_name
+            annotations['category_name_value'] = Coalesce('category__name', 'parent_task__category__name')
+        return queryset.values(*columns, **annotations)
+
+    def _related_ids(self, rows):
+        if isinstance(self.instance, QuerySet):
+            # Reuse the listing's own filters as a subquery instead of a huge IN list
+            return self.instance.order_by().values('id')
+        return [row['id'] for row in rows]
+
+    def _related_querysets(self, rows):
+        """
+        (task id, value...) rows feeding the selected tags / sub_tasks fields;
+        these queries only run when a selected field needs them
+        """
+        fields = set(self.fields)
+        task_ids = self._related_ids(rows)
+        querysets = {}
+        if fields & {'tags', 'tag_names'}:
+            columns = ['task_id', 'tag_id']
+            if 'tag_names' in fields:
+                columns.append('tag__name')
+            querysets['tags'] = Task.tags.through.objects.filter(
+                task_id__in=task_ids
+            ).order_by('id').values_list(*columns)
+        if 'sub_tasks' in fields:
+            querysets['sub_tasks'] = Task.objects.filter(
+                parent_task_id__in=task_ids
+            ).order_by('id').values_list('parent_task_id', 'id')
+        return querysets
+
+    @staticmethod
+    def _group(related_rows):
+        grouped = defaultdict(list)
+        for task_id, *value in related_rows:
+            grouped[task_id].append(value)
+        return grouped
+
+    @staticmethod
+    def _datetime_formatter():
+        output_format = api_settings.DATETIME_FORMAT
+        if not settings.USE_TZ or output_format is None or output_format.lower() != ISO_8601:
+            return serializers.DateTimeField().to_representation
+
+        current = timezone.get_current_timezone()
+        def to_representation(value):
+            # DateTimeField.to_representation for ISO 8601, minus the per-call setup
+            if value is None:
+                return None
+            value = value.astimezone(current).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return to_representation
+
+    def _getters(self, related):
+        """
+        {field: callable(row) -> representation} for the selected fields,
+        given the grouped rows of _related_querysets()
+        """
+        tags = related.get('tags', {})
+        subtasks = related.get('sub_tasks', {})
+        as_datetime = self._datetime_formatter()
+
+        def as_duration(value):
+            return duration_string(value) if value is not None else None
+
+        getters = {
+            'id': itemgetter('id'),
+            'title': itemgetter('title'),
+            'description': itemgetter('description'),
+            'estimated_time': lambda row: as_duration(row['estimated_time']),
+            'due_date': lambda row: as_datetime(row['due_date']),
+            'completed': itemgetter('completed'),
+            'created_at': lambda row: as_datetime(row['created_at']),
+            'updated_at': lambda row: as_datetime(row['updated_at']),
+            'completed_at': lambda row: as_datetime(row['completed_at']),
+            'user': itemgetter('user_id'),
+            'parent_task': itemgetter('parent_task_id'),
+            'has_subtasks': lambda row: row['subtask_count'] > 0,
+            'sub_tasks': lambda row: [subtask[0] for subtask in subtasks.get(row['id'], ())],
+            'category': itemgetter('category_id'),
+            'category_name': itemgetter('category_name_value'),
+            'tags': lambda row: [tag[0] for tag in tags.get(row['id'], ())],
+            'tag_names': lambda row: [tag[1] for tag in tags.get(row['id'], ())],
+            'subtask_count': itemgetter('subtask_count'),
+            'completed_subtask_count': itemgetter('completed_subtask_count'),
+            'remaining_subtask_time': lambda row: as_duration(row['remaining_subtask_time']),
+        }
+        return [(field, getters[field]) for field in self.fields]
+
+    def _represent(self, rows, related):
+        getters = self._getters(related)
+        return [{field: get(row) for field, get in getters} for row in rows]
+
+    @cached_property
+    def data(self):
+        if isinstance(self.instance, QuerySet):
+            rows = list(self.values(self.instance, fields=self.fields))
+        else:
+            rows = list(self.instance)
+        if not rows:
+            return []
+
+        related = {
+            name: self._group(queryset)
+            for name, queryset in self._related_querysets(rows).items()
+        }
+        return self._represent(rows, related)
+
+    async def adata(self):
+        """
+        `data` for async views, fetched with the async ORM
+        """
+        if isinstance(self.instance, QuerySet):
+            rows = [row async for row in self.values(self.instance, fields=self.fields)]
+        else:
+            rows = list(self.instance)
+        if not rows:
+            return []
+
+        related = {
+            name: self._group([related_row async for related_row in queryset])
+            for name, queryset in self._related_querysets(rows).items()
+        }
+        return self._represent(rows, related)
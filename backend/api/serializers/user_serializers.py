@@ -1,10 +1,12 @@
 import logging
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from users.models import Profile
 from django.http.request import QueryDict
+from api.auth_cache import embed_user_claims
 
 logger = logging.getLogger(__name__)
 
@@ -23,18 +25,18 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             ]
 
     def validate(self, data):
-        logger.debug(f"Validating user registration data for username: {data.get('username')}")
+        logger.debug("Validating user registration data for username: %s", data.get('username'))
         password = data.get('password')
         confirm_password = data.get('confirm_password')
         if confirm_password != password:
-            logger.warning(f"Password mismatch during registration for username: {data.get('username')}")
+            logger.warning("Password mismatch during registration for username: %s", data.get('username'))
             raise serializers.ValidationError("Passwords do not match.")
         return data
     
     def validate_email(self, value):
-        logger.debug(f"Validating email: {value}")
+        logger.debug("Validating email: %s", value)
         if User.objects.filter(email=value).exists():
-            logger.warning(f"Registration attempt with existing email: {value}")
+            logger.warning("Registration attempt with existing email: %s", value)
             raise serializers.ValidationError("A user with this email already exists.")
         return value
     
@@ -48,7 +50,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Password is invalid: {', '.join(e.messages)}")
     
     def create(self, validated_data):
-        logger.info(f"Creating new user: {validated_data.get('username')}")
+        logger.info("Creating new user: %s", validated_data.get('username'))
         try:
             validated_data.pop('confirm_password')
             user = User.objects.create_user(
@@ -60,7 +62,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             )
             return user
         except Exception as e:
-            logger.exception(f"Failed to create user: {validated_data.get('username')}")
+            logger.exception("Failed to create user: %s", validated_data.get('username'))
             raise
         
 
@@ -108,23 +110,23 @@ class ProfileSerializer(serializers.ModelSerializer):
                 else:
                     data.pop(field)
 
-        logger.debug(f"Extracted user data: {user_data}")
+        logger.debug("Extracted user data: %s", user_data)
         data['user'] = user_data
 
         return data
     
     def update(self, instance, validated_data):
-        logger.info(f"Updating profile for user: {instance.user.username}")
+        logger.info("Updating profile for user: %s", instance.user.username)
         try:
             # pop the nested user data to be handled separately
             validated_data = {field: data[0] for (field, data) in validated_data.items() if isinstance(data, list)}
-            logger.debug(f"Reformatted validated data: {validated_data}")
+            logger.debug("Reformatted validated data: %s", validated_data)
 
             user_data = validated_data.pop('user', None)
 
             # Update profile fields
             for attr, value in validated_data.items():
-                logger.debug(f"Setting profile attribute {attr} = {value}")
+                logger.debug("Setting profile attribute %s = %s", attr, value)
                 setattr(instance, attr, value)
 
             instance.save()
@@ -134,7 +136,7 @@ class ProfileSerializer(serializers.ModelSerializer):
             if user_data:
                 user = instance.user
                 for attr, value, in user_data.items():
-                    logger.debug(f"Setting user attribute {attr} = {value}")
+                    logger.debug("Setting user attribute %s = %s", attr, value)
                     setattr(user, attr, value)
 
                 user.save()
@@ -142,7 +144,16 @@ class ProfileSerializer(serializers.ModelSerializer):
 
             return instance
         except Exception as e:
-            logger.exception(f"Failed to update profile for user: {instance.user.username}")
+            logger.exception("Failed to update profile for user: %s", instance.user.username)
             raise
 
-    
\ No newline at end of file
+    
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Login token pair, carrying the user claims when AUTH_CLAIMS_ONLY is on (see api/auth_cache.py)
+    """
+    @classmethod
+    def get_token(cls, user):
+        return embed_user_claims(super().get_token(user), user)
@@ -0,0 +1,57 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from users.models import Category, Tag
+from tasks.models import Task
+from .cache import invalidate_user_responses
+from .auth_cache import auth_user_cache
+from .metrics import install_query_counter
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_cached_listings(sender, instance, raw=False, **kwargs):
+    """
+    Any task, category or tag write makes the owner's cached listings stale
+    """
+    if not raw:
+        invalidate_user_responses(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def invalidate_cached_listings_on_tag_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_user_responses(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_listings_for_user(sender, instance, created=True, raw=False, **kwargs):
+    """
+    Start new (or reused) user ids from a clean generation
+    """
+    if created and not raw:
+        invalidate_user_responses(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_auth_user(sender, instance, raw=False, **kwargs):
+    """
+    Profile changes, deactivation and deletion must not be served from the auth cache
+    """
+    if not raw:
+        auth_user_cache.invalidate_user(instance.pk)
+
+
+@receiver(connection_created)
+def count_request_queries(sender, connection, **kwargs):
+    """
+    Per-endpoint query counts and time for /api/metrics
+    """
+    install_query_counter(connection)
@@ -1,3 +1,1420 @@
-from django.test import TestCase
+import os
+import gzip
+import json
+import time
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import count
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from users.models import Category, Tag
+from tasks.models import Task, TaskTombstone
+from tasks.sync import SyncToken
+from api import urls
+from api.serializers import TaskSerializer
+from api.views.task_views import TaskDetailView
+from api.metrics import LATENCY_BUCKETS, merge_routes, metrics_registry, render_prometheus
+from api.compression import brotli, get_encoders, negotiate_encoder
+from api.middleware import CompressionMiddleware
+from api.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from api.cache import get_cache
+from api.auth_cache import auth_user_cache, embed_user_claims
+from api.models import RevokedToken
+from api.revocation import revoked_tokens
+from backend.logging_config import BackgroundQueueHandler, SamplingFilter, background_handler, parse_sampling
+from api.query_budget import PASSWORD, EndpointCase, QueryBudgetTestCase
 
-# Create your tests here.
+
+class TaskSerializerValidationQueryTests(TestCase):
+    """
+    Related fields resolve with one query per related model, ownership included
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='password')
+        cls.other = User.objects.create_user('other', password='password')
+        cls.category = Category.objects.create(user=cls.user, name='work')
+        cls.tags = Tag.objects.bulk_create([Tag(user=cls.user, name=f'tag {n}') for n in range(20)])
+        cls.parent = Task.objects.create(user=cls.user, title='parent')
+        cls.task = Task.objects.create(user=cls.user, title='task')
+        cls.other_category = Category.objects.create(user=cls.other, name='theirs')
+        cls.other_tag = Tag.objects.create(user=cls.other, name='theirs')
+        cls.other_task = Task.objects.create(user=cls.other, title='theirs')
+
+    def setUp(self):
+        self.request = APIRequestFactory().post('/api/tasks/')
+        self.request.user = self.user
+
+    def payload(self, tags=None):
+        return {
+            'title': 'new task',
+            'parent_task': self.parent.pk,
+            'category': self.category.pk,
+            'tags': [tag.pk for tag in (self.tags if tags is None else tags)],
+        }
+
+    def assertValidatesIn(self, queries, instance=None, partial=False, **data):
+        serializer = TaskSerializer(
+            instance, data=data or self.payload(), partial=partial, context={'request': self.request}
+        )
+        with self.assertNumQueries(queries):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer
+
+    def test_create_validation_queries(self):
+        # parent task, category and all 20 tags: one query each
+        serializer = self.assertValidatesIn(3)
+        self.assertEqual(serializer.validated_data['tags'], self.tags)
+
+    def test_put_validation_queries(self):
+        self.assertValidatesIn(3, instance=self.task)
+
+    def test_patch_validation_queries(self):
+        self.assertValidatesIn(1, instance=self.task, partial=True, tags=[tag.pk for tag in self.tags])
+        self.assertValidatesIn(0, instance=self.task, partial=True, title='renamed')
+
+    def test_other_users_objects_are_rejected(self):
+        cases = {
+            'category': self.other_category.pk,
+            'tags': [self.tags[0].pk, self.other_tag.pk],
+            'parent_task': self.other_task.pk,
+        }
+        for field, value in cases.items():
+            with self.subTest(field=field):
+                serializer = TaskSerializer(
+                    self.task, data={field: value}, partial=True, context={'request': self.request}
+                )
+                self.assertFalse(serializer.is_valid())
+                self.assertIn(field, serializer.errors)
+
+    def test_malformed_ids_are_rejected(self):
+        serializer = TaskSerializer(
+            self.task, data={'tags': [self.tags[0].pk, 'abc']}, partial=True, context={'request': self.request}
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('tags', serializer.errors)
+
+    def test_subtask_cannot_be_a_parent(self):
+        subtask = Task.objects.create(user=self.user, title='subtask', parent_task=self.parent)
+        serializer = TaskSerializer(
+            self.task, data={'parent_task': subtask.pk}, partial=True, context={'request': self.request}
+        )
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertIn('parent_task', serializer.errors)
+
+
+class TaskWriteQueryCountTests(TestCase):
+    """
+    Create / PUT / PATCH cost the same number of queries however many tags a task has
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='password')
+        cls.category = Category.objects.create(user=cls.user, name='work')
+        cls.tags = Tag.objects.bulk_create([Tag(user=cls.user, name=f'tag {n}') for n in range(20)])
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        # Start from a cached authenticated user (api/auth_cache.py) for every measurement
+        self.client.get('/api/tags/')
+
+    def count_queries(self, method, tag_count):
+        task = Task.objects.create(user=self.user, title='task')
+        url = '/api/tasks/' if method == 'post' else f'/api/tasks/{task.pk}/'
+        data = {
+            'title': 'task',
+            'category': self.category.pk,
+            'tags': [tag.pk for tag in self.tags[:tag_count]],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, content_type='application/json')
+        self.assertIn(response.status_code, (200, 201), response.content)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_tags(self):
+        for method in ('post', 'put', 'patch'):
+            with self.subTest(method=method):
+                self.assertEqual(self.count_queries(method, 1), self.count_queries(method, 20))
+
+
+class TaskKeysetPaginationTests(TestCase):
+    """
+    Paging through /api/tasks/ with `limit` and `cursor` returns the unpaginated
+    ordering exactly, for every sort, over null and tied sort values
+    """
+    SORTS = [
+        [],
+        ['dueDate', 'asc'], ['dueDate', 'desc'],
+        ['categoryPriority', 'asc'], ['categoryPriority', 'desc'],
+        ['duration', 'asc'], ['duration', 'desc'],
+        ['createdAt', 'desc'],
+        ['numOfSubtasks', 'asc'], ['numOfSubtasks', 'desc'],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pager', password='password')
+        # Two categories share a priority, one has none, some tasks have no category
+        categories = [
+            Category.objects.create(user=cls.user, name=name, priority=priority)
+            for name, priority in [('first', 1), ('tied', 1), ('later', 5), ('unranked', None)]
+        ]
+        due = timezone.now().replace(microsecond=0) + timedelta(days=3)
+        due_dates = [None, due, due, due + timedelta(days=1), None]
+        durations = [None, timedelta(minutes=30), timedelta(minutes=30), timedelta(hours=1)]
+        parents = []
+        for n in range(13):
+            task = Task.objects.create(
+                user=cls.user,
+                title=f'task {n}',
+                due_date=due_dates[n % len(due_dates)],
+                estimated_time=durations[n % len(durations)],
+                category=(categories + [None])[n % (len(categories) + 1)],
+                parent_task=parents[n % 2] if len(parents) == 2 and n % 3 == 0 else None,
+            )
+            if len(parents) < 2:
+                parents.append(task)
+        # Equal creation times, so only the id breaks the tie
+        Task.objects.filter(user=cls.user, id__in=[task.id for task in parents]).update(created_at=due)
+        Task.objects.filter(user=cls.user, title__in=['task 5', 'task 6', 'task 7']).update(created_at=due)
+        cls.task_ids = set(Task.objects.filter(user=cls.user).values_list('id', flat=True))
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def get_page(self, sorting, **params):
+        response = self.client.get('/api/tasks/', {'sort_by': sorting, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()['data']
+        return [int(task_id) for task_id in data['tasks']], data['next_cursor']
+
+    def walk(self, sorting, limit=2):
+        ids, cursor = self.get_page(sorting, limit=limit)
+        while cursor is not None:
+            self.assertLessEqual(len(ids), len(self.task_ids), 'Pagination does not terminate')
+            page, cursor = self.get_page(sorting, limit=limit, cursor=cursor)
+            ids += page
+        return ids
+
+    def test_pages_match_unpaginated_ordering(self):
+        for sorting in self.SORTS:
+            with self.subTest(sorting=sorting):
+                expected, _ = self.get_page(sorting)
+                self.assertEqual(set(expected), self.task_ids)
+                walked = self.walk(sorting)
+                self.assertEqual(len(walked), len(set(walked)), 'A task appears on two pages')
+                self.assertEqual(walked, expected)
+
+    def test_cursor_is_bound_to_its_sorting(self):
+        _, cursor = self.get_page(['dueDate', 'asc'], limit=2)
+        for sorting in (['dueDate', 'desc'], ['duration', 'asc'], []):
+            with self.subTest(sorting=sorting):
+                response = self.client.get('/api/tasks/', {'sort_by': sorting, 'limit': 2, 'cursor': cursor})
+                self.assertEqual(response.status_code, 400, response.content)
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get('/api/tasks/', {'limit': 2, 'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400, response.content)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheInvalidationTests(TestCase):
+    """
+    A user's writes, set-based UPDATEs included, make their next listing a cache miss
+    with fresh data; other users' cached listings stay
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cached', password='password')
+        cls.other = User.objects.create_user('neighbour', password='password')
+        cls.category = Category.objects.create(user=cls.user, name='work')
+        cls.target = Category.objects.create(user=cls.user, name='home')
+        cls.tag = Tag.objects.create(user=cls.user, name='urgent')
+        cls.task = Task.objects.create(
+            user=cls.user, title='task', category=cls.category, due_date=timezone.now() - timedelta(days=2)
+        )
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def get(self, url, expect_cache=None):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        if expect_cache:
+            self.assertEqual(response['X-Cache'], expect_cache, url)
+        return response.json()['data']
+
+    def prime(self, url):
+        self.get(url)
+        self.get(url, 'HIT')
+
+    def assertFreshAfter(self, url, method, path, data=None, status=200):
+        """
+        Prime `url`, write through the API, return the (uncached) listing
+        """
+        self.prime(url)
+        response = getattr(self.client, method)(path, data, content_type='application/json')
+        self.assertEqual(response.status_code, status, response.content)
+        return self.get(url, 'MISS')
+
+    def task_in_list(self, data):
+        return data['tasks'].get(str(self.task.pk))
+
+    def test_task_writes(self):
+        data = self.assertFreshAfter('/api/tasks/', 'post', '/api/tasks/', {'title': 'created'}, status=201)
+        self.assertIn('created', [task['title'] for task in data['tasks'].values()])
+
+        data = self.assertFreshAfter('/api/tasks/', 'patch', f'/api/tasks/{self.task.pk}/', {'title': 'renamed'})
+        self.assertEqual(self.task_in_list(data)['title'], 'renamed')
+
+        data = self.assertFreshAfter('/api/tasks/', 'delete', f'/api/tasks/{self.task.pk}/')
+        self.assertIsNone(self.task_in_list(data))
+
+    def test_bulk_operations(self):
+        data = self.assertFreshAfter('/api/tasks/', 'post', '/api/tasks/bulk/', {'operations': [
+            {'op': 'update', 'id': self.task.pk, 'data': {'title': 'bulk renamed'}},
+        ]})
+        self.assertEqual(self.task_in_list(data)['title'], 'bulk renamed')
+
+    def test_complete_matching_tasks(self):
+        data = self.assertFreshAfter('/api/tasks/', 'post', '/api/tasks/complete/?due_date=overdue')
+        self.assertTrue(self.task_in_list(data)['completed'])
+
+    def test_category_writes(self):
+        data = self.assertFreshAfter(
+            '/api/categories/', 'patch', f'/api/categories/{self.category.pk}/', {'name': 'office'}
+        )
+        self.assertIn('office', [category['name'] for category in data])
+
+        # The reassignment is a set-based UPDATE of the tasks
+        self.prime('/api/categories/')
+        data = self.assertFreshAfter(
+            '/api/tasks/', 'delete', f'/api/categories/{self.category.pk}/?reassign_to={self.target.pk}'
+        )
+        self.assertEqual(self.task_in_list(data)['category'], self.target.pk)
+        self.assertNotIn(self.category.pk, [category['id'] for category in self.get('/api/categories/', 'MISS')])
+
+    def test_tag_writes(self):
+        data = self.assertFreshAfter('/api/tags/', 'post', '/api/tags/', {'name': 'later'}, status=201)
+        self.assertIn('later', [tag['name'] for tag in data])
+
+        data = self.assertFreshAfter('/api/tags/', 'patch', f'/api/tags/{self.tag.pk}/', {'name': 'soon'})
+        self.assertIn('soon', [tag['name'] for tag in data])
+
+        data = self.assertFreshAfter('/api/tasks/', 'patch', f'/api/tasks/{self.task.pk}/', {'tags': [self.tag.pk]})
+        self.assertEqual(self.task_in_list(data)['tags'], [self.tag.pk])
+
+    def test_other_users_writes_keep_the_cache(self):
+        self.prime('/api/tasks/')
+        self.prime('/api/categories/')
+
+        other = self.client_class()
+        other.cookies['access_token'] = str(AccessToken.for_user(self.other))
+        self.assertEqual(other.post('/api/tasks/', {'title': 'theirs'}, content_type='application/json').status_code, 201)
+        self.assertEqual(other.post('/api/categories/', {'name': 'theirs'}, content_type='application/json').status_code, 201)
+
+        self.get('/api/tasks/', 'HIT')
+        self.get('/api/categories/', 'HIT')
+
+
+@override_settings(TASK_SYNC_OVERLAP_SECONDS=0)
+class TaskChangesTests(TestCase):
+    """
+    /api/tasks/changes/: a sync token returns exactly what changed or was deleted after it
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('syncing', password='password')
+        cls.other = User.objects.create_user('elsewhere', password='password')
+        cls.task = Task.objects.create(user=cls.user, title='task')
+        cls.untouched = Task.objects.create(user=cls.user, title='untouched')
+        Task.objects.create(user=cls.other, title='theirs')
+        # Seeded long before the first sync
+        Task.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def changes(self, token=None, status=200):
+        response = self.client.get('/api/tasks/changes/', {'since': token} if token else {})
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json().get('data')
+
+    def test_first_sync_is_a_reset(self):
+        data = self.changes()
+        self.assertTrue(data['reset'])
+        self.assertEqual(set(data['tasks']), {str(self.task.pk), str(self.untouched.pk)})
+
+    def test_update_appears_in_next_delta(self):
+        token = self.changes()['token']
+        response = self.client.patch(f'/api/tasks/{self.task.pk}/', {'title': 'edited'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        data = self.changes(token)
+        self.assertFalse(data['reset'])
+        self.assertEqual(list(data['tasks']), [str(self.task.pk)])
+        self.assertEqual(data['tasks'][str(self.task.pk)]['title'], 'edited')
+        self.assertEqual(data['deleted'], [])
+
+    def test_delete_leaves_a_tombstone(self):
+        token = self.changes()['token']
+        self.assertEqual(self.client.delete(f'/api/tasks/{self.task.pk}/').status_code, 200)
+
+        data = self.changes(token)
+        self.assertEqual(data['deleted'], [self.task.pk])
+        self.assertEqual(data['tasks'], {})
+        # ...and only once
+        self.assertEqual(self.changes(data['token'])['deleted'], [])
+
+    def test_writes_stamped_with_the_token_time_are_included(self):
+        token = self.changes()['token']
+        timestamp = SyncToken.decode(token, self.user.pk).timestamp
+        # Committed after the sync read, but stamped the same instant
+        Task.objects.filter(pk=self.task.pk).update(title='same instant', updated_at=timestamp)
+        deleted_pk = self.untouched.pk
+        self.untouched.delete()
+        TaskTombstone.objects.filter(task_id=deleted_pk).update(deleted_at=timestamp)
+
+        data = self.changes(token)
+        self.assertEqual(list(data['tasks']), [str(self.task.pk)])
+        self.assertEqual(data['deleted'], [deleted_pk])
+
+    def test_other_users_token_is_rejected(self):
+        other = self.client_class()
+        other.cookies['access_token'] = str(AccessToken.for_user(self.other))
+        token = other.get('/api/tasks/changes/').json()['data']['token']
+        self.changes(token, status=400)
+
+    def test_malformed_token_is_rejected(self):
+        for token in ('not-a-token', 'eyJ0IjoiMjAyNi0wMS0wMSJ9', SyncToken(self.user.pk, timezone.now()).encode()[:-4]):
+            with self.subTest(token=token):
+                self.changes(token, status=400)
+
+
+class AuthUserCacheTests(TestCase):
+    """
+    Authenticated requests reuse the cached user (api/auth_cache.py) until it changes
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cached-auth', password='password')
+        cls.category = Category.objects.create(user=cls.user, name='work')
+
+    def setUp(self):
+        auth_user_cache.clear()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def user_queries(self, url='/api/tags/', status=200):
+        """
+        auth_user queries made by one GET
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status, response.content)
+        return len([query for query in queries if 'FROM "auth_user"' in query['sql']])
+
+    def test_cached_requests_skip_the_user_query(self):
+        self.assertEqual(self.user_queries(), 1)
+        # async (tags) and sync (category detail) views share the entry
+        self.assertEqual(self.user_queries(), 0)
+        self.assertEqual(self.user_queries(f'/api/categories/{self.category.pk}/'), 0)
+
+    def test_save_invalidates(self):
+        self.user_queries()
+        self.user.first_name = 'Ada'
+        self.user.save()
+        self.assertEqual(self.user_queries(), 1)
+        self.assertEqual(self.user_queries(), 0)
+
+    def test_deactivation_rejects_at_once(self):
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.user_queries(status=401)
+
+    def test_logout_invalidates(self):
+        self.user_queries()
+        access_token = self.client.cookies['access_token'].value
+        self.assertEqual(self.client.post('/api/logout/').status_code, 200)
+        # The access token is replayed after logout: its user is read again
+        self.client.cookies['access_token'] = access_token
+        self.assertEqual(self.user_queries(), 1)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=1)
+    def test_deactivation_elsewhere_rejects_once_the_entry_expires(self):
+        self.user_queries()
+        # Another process: no signal reaches this one
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.user_queries()
+        time.sleep(1.1)
+        self.user_queries(status=401)
+
+
+@override_settings(AUTH_CLAIMS_ONLY=True)
+class ClaimsOnlyAuthTests(TestCase):
+    """
+    AUTH_CLAIMS_ONLY: the user comes from the token claims, until it is invalidated or refreshed
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('claims', password='password')
+
+    def setUp(self):
+        auth_user_cache.clear()
+        revoked_tokens.reset()
+        self.refresh = embed_user_claims(RefreshToken.for_user(self.user), self.user)
+        self.client.cookies['access_token'] = str(self.refresh.access_token)
+        self.client.cookies['refresh_token'] = str(self.refresh)
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tags/')
+        return response.status_code, len([query for query in queries if 'FROM "auth_user"' in query['sql']])
+
+    def test_claims_need_no_user_query(self):
+        self.assertEqual(self.get(), (200, 0))
+
+    def test_deactivation_rejects_at_once(self):
+        self.user.is_active = False
+        self.user.save()
+        # Claims issued before the invalidation are not trusted; the database says inactive
+        self.assertEqual(self.get()[0], 401)
+
+    def test_deactivation_elsewhere_rejects_at_refresh(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        # Claims stay valid in this process until the access token expires...
+        self.assertEqual(self.get(), (200, 0))
+        # ...and no new one is issued
+        response = self.client.post('/api/auth/refresh/')
+        self.assertEqual(response.status_code, 401, response.content)
+
+
+@override_settings(REVOKED_TOKEN_SYNC_SECONDS=3600)
+class RefreshTokenRevocationTests(TestCase):
+    """
+    A refresh token gets new tokens once: rotated-away and logged-out tokens are refused
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('rotating', password='password')
+
+    def setUp(self):
+        revoked_tokens.reset()
+        self.refresh_token = str(RefreshToken.for_user(self.user))
+
+    def refresh(self, refresh_token):
+        client = self.client_class()
+        client.cookies['refresh_token'] = refresh_token
+        return client.post('/api/auth/refresh/')
+
+    def test_rotated_token_is_refused(self):
+        response = self.refresh(self.refresh_token)
+        self.assertEqual(response.status_code, 200, response.content)
+        rotated = response.cookies['refresh_token'].value
+        self.assertNotEqual(rotated, self.refresh_token)
+
+        self.assertEqual(self.refresh(self.refresh_token).status_code, 401)
+        # ...while its replacement works
+        self.assertEqual(self.refresh(rotated).status_code, 200)
+
+    def test_logged_out_token_is_refused(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        self.client.cookies['refresh_token'] = self.refresh_token
+        self.assertEqual(self.client.post('/api/logout/').status_code, 200)
+
+        self.assertEqual(self.refresh(self.refresh_token).status_code, 401)
+
+    def test_replay_missed_by_the_filter_is_refused(self):
+        """
+        A token already used by another process (or a concurrent request) that this
+        process's filter does not know about yet: the INSERT decides
+        """
+        revoked_tokens.is_revoked('warm-up')  # filter built now, next sync an hour away
+        token = RefreshToken(self.refresh_token)
+        RevokedToken.objects.create(
+            jti=token['jti'], user=self.user, expires_at=timezone.now() + timedelta(minutes=30)
+        )
+        self.assertFalse(revoked_tokens.is_revoked(token['jti']))
+
+        response = self.refresh(self.refresh_token)
+        self.assertEqual(response.status_code, 401, response.content)
+        self.assertNotIn('access_token', response.cookies)
+
+    def test_same_token_twice(self):
+        self.assertEqual(self.refresh(self.refresh_token).status_code, 200)
+        self.assertEqual(self.refresh(self.refresh_token).status_code, 401)
+
+    def test_revoke_reports_whether_it_revoked(self):
+        token = RefreshToken(self.refresh_token)
+        self.assertTrue(revoked_tokens.revoke(token))
+        self.assertFalse(revoked_tokens.revoke(token))
+
+
+class RecordingHandler(logging.Handler):
+    """
+    Keeps the records it handles and the threads that handled them;
+    with `gate`, each record waits for it to open first (a stalled sink)
+    """
+    def __init__(self, level=logging.NOTSET, gate=None):
+        super().__init__(level)
+        self.gate = gate
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.records.append(record)
+        self.threads.add(threading.current_thread())
+
+
+class BackgroundLoggingTests(TestCase):
+    """
+    The settings.LOGGING pipeline (backend/logging_config.py): the logging thread
+    only queues, the listener thread filters, formats and writes
+    """
+    def setUp(self):
+        self.logger = logging.getLogger('api.tests.pipeline')
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.addCleanup(setattr, self.logger, 'handlers', [])
+
+    def attach(self, handler):
+        self.logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_configured_loggers_use_the_queue(self):
+        for name in ('', 'django', 'api', 'users'):
+            with self.subTest(logger=name):
+                handlers = logging.getLogger(name).handlers
+                self.assertTrue(handlers)
+                self.assertTrue(all(isinstance(handler, BackgroundQueueHandler) for handler in handlers), handlers)
+        handler, = logging.getLogger('api').handlers
+        self.assertTrue(any(isinstance(log_filter, SamplingFilter) for log_filter in handler.filters))
+
+    def test_records_are_written_by_the_listener_thread(self):
+        target = RecordingHandler()
+        handler = self.attach(BackgroundQueueHandler([target]))
+        self.logger.info('Task %s saved', 7)
+        handler.close()  # drains the queue
+
+        self.assertEqual([record.getMessage() for record in target.records], ['Task 7 saved'])
+        self.assertNotIn(threading.current_thread(), target.threads)
+
+    def test_message_is_frozen_when_queued(self):
+        target = RecordingHandler()
+        handler = self.attach(BackgroundQueueHandler([target]))
+        values = ['before']
+        self.logger.info('Values: %s', values)
+        values[0] = 'after'
+        handler.close()
+        self.assertEqual(target.records[0].getMessage(), "Values: ['before']")
+
+    def test_json_file_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'api.log')
+            handler = self.attach(background_handler(filename=filename, console=False))
+            self.logger.warning('Slow request to %s', '/api/tasks/', extra={'user_id': 3})
+            handler.close()
+            with open(filename) as file:
+                entry = json.loads(file.readline())
+
+        self.assertEqual(entry['message'], 'Slow request to /api/tasks/')
+        self.assertEqual(entry['level'], 'WARNING')
+        self.assertEqual(entry['logger'], 'api.tests.pipeline')
+        self.assertEqual(entry['user_id'], 3)
+
+    def test_target_levels_apply(self):
+        warnings = RecordingHandler(level=logging.WARNING)
+        everything = RecordingHandler()
+        handler = self.attach(BackgroundQueueHandler([warnings, everything]))
+        self.logger.debug('debug')
+        self.logger.warning('warning')
+        handler.close()
+        self.assertEqual([record.getMessage() for record in warnings.records], ['warning'])
+        self.assertEqual([record.getMessage() for record in everything.records], ['debug', 'warning'])
+
+    def test_sampling(self):
+        target = RecordingHandler()
+        handler = self.attach(BackgroundQueueHandler([target]))
+        handler.addFilter(SamplingFilter(parse_sampling('api.tests=3'), max_level='INFO'))
+        for n in range(9):
+            self.logger.info('sampled %s', n)
+        self.logger.error('always kept')
+        logging.getLogger('api.other').info('not sampled')
+        handler.close()
+
+        messages = [record.getMessage() for record in target.records]
+        self.assertEqual(messages, ['sampled 0', 'sampled 3', 'sampled 6', 'always kept'])
+        self.assertEqual(SamplingFilter({'api': 3}).filter(logging.makeLogRecord({'name': 'users.signals', 'levelno': logging.INFO})), True)
+
+    def test_full_queue_drops_and_reports(self):
+        gate = threading.Event()
+        target = RecordingHandler(gate=gate)
+        handler = self.attach(BackgroundQueueHandler([target], queue_size=2))
+        started = time.perf_counter()
+        for n in range(10):
+            self.logger.info('record %s', n)
+        # A stalled sink never holds up the logging thread
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertGreater(handler.dropped, 0)
+
+        gate.set()
+        deadline = time.monotonic() + 5
+        while not handler.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.logger.info('after')
+        handler.close()
+        messages = [record.getMessage() for record in target.records]
+        self.assertEqual(messages[-1], 'after')
+        self.assertRegex(messages[-2], r'^\d+ log records dropped')
+
+
+class TaskDeleteTests(TestCase):
+    """
+    DELETE /api/tasks/<pk>/ and the subtask data it returns
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('deleter', password='password')
+        cls.category = Category.objects.create(user=cls.user, name='work')
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        self.parent = Task.objects.create(user=self.user, title='parent', category=self.category)
+        self.subtask = Task.objects.create(user=self.user, title='subtask', parent_task=self.parent)
+
+    def test_kept_subtasks_become_top_level(self):
+        response = self.client.delete(f'/api/tasks/{self.parent.pk}/')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()['data']
+        self.assertEqual(data['sub_count'], 1)
+        self.assertEqual(data['tasks'][str(self.subtask.pk)]['parent_task'], None)
+        self.assertEqual(data['tasks'][str(self.subtask.pk)]['category_name'], 'work')
+
+    def test_subtasks_gone_before_the_delete(self):
+        # Subtasks read before the delete, but none left to reassign (changes == {})
+        subtasks = [{'id': self.subtask.pk, 'category_id': None}]
+        self.assertEqual(
+            TaskDetailView().cleanup_object(self.parent, subtasks, {}, keep_subtasks=True),
+            {'keep_subtasks': True, 'sub_count': 0}
+        )
+
+
+class TaskTagFilterTests(TestCase):
+    """
+    ?tag= (match=any / all) and ?not_tag= on the task list
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tagger', password='password')
+        cls.a, cls.b, cls.c = (Tag.objects.create(user=cls.user, name=name) for name in 'abc')
+        cls.tasks = {}
+        for name, tags in [('ab', 'ab'), ('a', 'a'), ('b', 'b'), ('abc', 'abc'), ('untagged', '')]:
+            task = Task.objects.create(user=cls.user, title=name)
+            task.tags.set([getattr(cls, tag) for tag in tags])
+            cls.tasks[name] = task.pk
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def assertFilters(self, params, expected):
+        for paginated in (False, True):
+            with self.subTest(params=params, paginated=paginated):
+                query = {**params, 'limit': 50} if paginated else params
+                response = self.client.get('/api/tasks/', query)
+                self.assertEqual(response.status_code, 200, response.content)
+                data = response.json()['data']
+                listed = data['incomplete_tasks']
+                self.assertEqual(len(listed), len(set(listed)), 'A task is listed twice')
+                self.assertEqual(set(listed), {self.tasks[name] for name in expected})
+                self.assertEqual(data['total_count'], len(expected))
+
+    def test_match_any(self):
+        self.assertFilters({'tag': self.a.pk}, ['ab', 'a', 'abc'])
+        self.assertFilters({'tag': f'{self.a.pk},{self.b.pk}'}, ['ab', 'a', 'b', 'abc'])
+        self.assertFilters({'tag': f'{self.a.pk},{self.b.pk}', 'match': 'any'}, ['ab', 'a', 'b', 'abc'])
+
+    def test_match_all(self):
+        self.assertFilters({'tag': f'{self.a.pk},{self.b.pk}', 'match': 'all'}, ['ab', 'abc'])
+        self.assertFilters({'tag': [self.a.pk, self.b.pk], 'match': 'all'}, ['ab', 'abc'])
+        self.assertFilters({'tag': [f'{self.a.pk},{self.b.pk}', self.c.pk], 'match': 'ALL'}, ['abc'])
+        # A repeated id is one tag
+        self.assertFilters({'tag': f'{self.a.pk},{self.a.pk}', 'match': 'all'}, ['ab', 'a', 'abc'])
+
+    def test_not_tag(self):
+        self.assertFilters({'not_tag': self.c.pk}, ['ab', 'a', 'b', 'untagged'])
+        self.assertFilters({'not_tag': [self.a.pk, self.b.pk]}, ['untagged'])
+        self.assertFilters({'tag': f'{self.a.pk},{self.b.pk}', 'match': 'all', 'not_tag': self.c.pk}, ['ab'])
+
+    def test_invalid_filters(self):
+        for params in ({'tag': 'a'}, {'tag': '1;2'}, {'not_tag': '-1'}, {'tag': self.a.pk, 'match': 'some'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/tasks/', params)
+                self.assertEqual(response.status_code, 400, response.content)
+
+
+class CategoryDeleteTests(TestCase):
+    """
+    DELETE /api/categories/<pk>/, optionally moving the tasks with ?reassign_to=
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('organizer', password='password')
+        cls.other = User.objects.create_user('neighbour', password='password')
+        cls.other_category = Category.objects.create(user=cls.other, name='theirs')
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        self.work = Category.objects.create(user=self.user, name='work')
+        self.home = Category.objects.create(user=self.user, name='home')
+        self.parent = Task.objects.create(user=self.user, title='parent', category=self.work)
+        self.task = Task.objects.create(user=self.user, title='task', category=self.work)
+        self.inheriting = Task.objects.create(user=self.user, title='inheriting', parent_task=self.parent)
+        self.own_category = Task.objects.create(
+            user=self.user, title='own category', parent_task=self.parent, category=self.home
+        )
+
+    def delete(self, reassign_to=None, status=200):
+        params = f'?reassign_to={reassign_to}' if reassign_to is not None else ''
+        response = self.client.delete(f'/api/categories/{self.work.pk}/{params}')
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def task_data(self, task):
+        return self.client.get(f'/api/tasks/{task.pk}/').json()['data']
+
+    def test_reassign_to(self):
+        with self.assertLogs('tasks.services', 'INFO') as logs:
+            data = self.delete(self.home.pk)['data']
+        self.assertEqual(data, {
+            'deleted_category': self.work.pk, 'reassigned_to': self.home.pk,
+            'task_count': 2, 'inherited_count': 1,
+        })
+        self.assertIn(f'Deleted category {self.work.pk}: 2 tasks moved to category {self.home.pk}', logs.output[0])
+
+        self.assertFalse(Category.objects.filter(pk=self.work.pk).exists())
+        self.assertEqual(
+            set(Task.objects.filter(category=self.home).values_list('title', flat=True)),
+            {'parent', 'task', 'own category'}
+        )
+        # Still inherits from its parent, which now shows the new category
+        self.assertIsNone(Task.objects.get(pk=self.inheriting.pk).category_id)
+        self.assertEqual(self.task_data(self.inheriting)['category_name'], 'home')
+        self.assertEqual(self.task_data(self.task)['category_name'], 'home')
+
+    def test_without_reassign_to(self):
+        with self.assertLogs('tasks.services', 'INFO') as logs:
+            data = self.delete()['data']
+        self.assertEqual(data['reassigned_to'], None)
+        self.assertEqual((data['task_count'], data['inherited_count']), (2, 1))
+        self.assertIn(f'Deleted category {self.work.pk}: 2 tasks uncategorized', logs.output[0])
+        self.assertEqual(Task.objects.filter(user=self.user, category__isnull=True).count(), 3)
+
+    def test_invalid_reassign_to(self):
+        for reassign_to in (self.other_category.pk, 999999, 'abc', self.work.pk):
+            with self.subTest(reassign_to=reassign_to):
+                body = self.delete(reassign_to, status=400)
+                self.assertEqual(body['message'], "Invalid reassign_to category")
+        self.assertTrue(Category.objects.filter(pk=self.work.pk).exists())
+        self.assertEqual(Task.objects.filter(category=self.work).count(), 2)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=True)
+class StatsViewTests(TestCase):
+    """
+    /api/stats/: statistics are computed against the current time, so cached
+    responses are only reused within one STATS_CACHE_WINDOW
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('statistician', password='password')
+        cls.work = Category.objects.create(user=cls.user, name='work')
+        Task.objects.create(
+            user=cls.user, title='due tonight', category=cls.work,
+            due_date=datetime(2026, 3, 10, 18, tzinfo=dt_timezone.utc)
+        )
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def stats_at(self, hour, minute=0):
+        now = datetime(2026, 3, 10, hour, minute, tzinfo=dt_timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            response = self.client.get('/api/stats/', {'tz': 'America/New_York'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_stats(self):
+        data = self.stats_at(12).json()['data']
+        self.assertEqual(data['timezone'], 'America/New_York')
+        self.assertEqual(data['overall']['task_count'], 1)
+        self.assertEqual(data['overall']['overdue_count'], 0)
+        self.assertEqual(
+            [(category['category'], category['category_name']) for category in data['categories']],
+            [(self.work.pk, 'work')]
+        )
+
+    def test_cached_within_the_window_only(self):
+        self.assertEqual(self.stats_at(12)['X-Cache'], 'MISS')
+        self.assertEqual(self.stats_at(12, 10)['X-Cache'], 'HIT')
+
+        response = self.stats_at(18, 5)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['data']['overall']['overdue_count'], 1)
+
+
+class TaskBulkTests(TestCase):
+    """
+    /api/tasks/bulk/: all-or-nothing batches of creates, updates and deletes
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('batcher', password='password')
+        cls.other = User.objects.create_user('bystander', password='password')
+        cls.category = Category.objects.create(user=cls.user, name='work')
+        cls.tag = Tag.objects.create(user=cls.user, name='urgent')
+        cls.other_category = Category.objects.create(user=cls.other, name='theirs')
+        cls.other_tag = Tag.objects.create(user=cls.other, name='theirs')
+        cls.other_task = Task.objects.create(user=cls.other, title='theirs')
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        self.first = Task.objects.create(user=self.user, title='first parent')
+        self.second = Task.objects.create(user=self.user, title='second parent')
+        self.subtask = Task.objects.create(
+            user=self.user, title='subtask', parent_task=self.first, estimated_time=timedelta(minutes=30)
+        )
+        self.sibling = Task.objects.create(
+            user=self.user, title='sibling', parent_task=self.first, completed=True
+        )
+
+    def bulk(self, operations, status=200):
+        response = self.client.post('/api/tasks/bulk/', {'operations': operations}, content_type='application/json')
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def snapshot(self):
+        return list(Task.objects.filter(user=self.user).order_by('id').values())
+
+    def assertAggregates(self, parent, count, completed, remaining):
+        parent.refresh_from_db()
+        self.assertEqual(
+            (parent.subtask_count, parent.completed_subtask_count, parent.remaining_subtask_time),
+            (count, completed, remaining)
+        )
+
+    def test_invalid_operation_rejects_the_batch(self):
+        before = self.snapshot()
+        body = self.bulk([
+            {'op': 'create', 'data': {'title': 'new'}},
+            {'op': 'update', 'id': self.subtask.pk, 'data': {'completed': True}},
+            {'op': 'update', 'id': self.second.pk, 'data': {'parent_task': self.second.pk}},
+            {'op': 'delete', 'id': self.sibling.pk},
+        ], status=400)
+        self.assertEqual(body['errors'], [{'index': 2, 'errors': {'parent_task': "A task cannot be its own parent"}}])
+        self.assertEqual(self.snapshot(), before)
+
+        # Malformed operations are reported per index too
+        body = self.bulk([
+            {'op': 'create', 'data': {'title': 'new'}},
+            {'op': 'rename', 'id': self.subtask.pk},
+            {'op': 'delete'},
+        ], status=400)
+        self.assertEqual([error['index'] for error in body['errors']], [1, 2])
+        self.assertEqual(self.snapshot(), before)
+
+    def test_failed_write_rolls_back_earlier_operations(self):
+        before = self.snapshot()
+        # Fails after the creates, updates and deletes have run
+        with mock.patch('api.bulk.refresh_subtask_aggregates', side_effect=DatabaseError('disk full')):
+            self.bulk([
+                {'op': 'create', 'data': {'title': 'new'}},
+                {'op': 'update', 'id': self.subtask.pk, 'data': {'completed': True}},
+                {'op': 'delete', 'id': self.sibling.pk},
+            ], status=400)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_other_users_objects_are_rejected(self):
+        before = self.snapshot()
+        body = self.bulk([
+            {'op': 'update', 'id': self.other_task.pk, 'data': {'title': 'mine now'}},
+            {'op': 'create', 'data': {'title': 'new', 'category': self.other_category.pk}},
+            {'op': 'create', 'data': {'title': 'new', 'tags': [self.tag.pk, self.other_tag.pk]}},
+            {'op': 'create', 'data': {'title': 'new', 'parent_task': self.other_task.pk}},
+            {'op': 'delete', 'id': self.other_task.pk},
+        ], status=400)
+        self.assertEqual(body['errors'], [
+            {'index': 0, 'errors': {'id': "Task not found for this user"}},
+            {'index': 1, 'errors': {'category': "Invalid category selection"}},
+            {'index': 2, 'errors': {'tags': "One or more tags are invalid"}},
+            {'index': 3, 'errors': {'parent_task': "Parent task not found for this user"}},
+            {'index': 4, 'errors': {'id': "Task not found for this user"}},
+        ])
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(Task.objects.get(pk=self.other_task.pk).title, 'theirs')
+
+    def test_results_follow_request_order(self):
+        results = self.bulk([
+            {'op': 'create', 'data': {'title': 'one', 'category': self.category.pk, 'tags': [self.tag.pk]}},
+            {'op': 'update', 'id': self.second.pk, 'data': {'title': 'renamed'}},
+            {'op': 'create', 'data': {'title': 'two'}},
+            {'op': 'delete', 'id': self.sibling.pk},
+            {'op': 'create', 'data': {'title': 'three', 'parent_task': self.second.pk}},
+        ])['data']['results']
+
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3, 4])
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['created', 'updated', 'created', 'deleted', 'created']
+        )
+        created = [result for result in results if result['op'] == 'create']
+        self.assertEqual([result['task']['title'] for result in created], ['one', 'two', 'three'])
+        for result in created:
+            self.assertEqual(Task.objects.get(pk=result['id'], user=self.user).title, result['task']['title'])
+        self.assertEqual(created[0]['task']['tags'], [self.tag.pk])
+        self.assertEqual(results[1]['task']['title'], 'renamed')
+        self.assertNotIn('task', results[3])
+        self.assertFalse(Task.objects.filter(pk=self.sibling.pk).exists())
+
+    def test_parent_aggregates_after_deletes_and_reparents(self):
+        self.assertAggregates(self.first, 2, 1, timedelta(minutes=30))
+
+        self.bulk([
+            {'op': 'update', 'id': self.subtask.pk, 'data': {'parent_task': self.second.pk}},
+            {'op': 'create', 'data': {'title': 'new', 'parent_task': self.second.pk, 'estimated_time': '00:10:00'}},
+        ])
+        self.assertAggregates(self.first, 1, 1, timedelta(0))
+        self.assertAggregates(self.second, 2, 0, timedelta(minutes=40))
+
+        self.bulk([
+            {'op': 'delete', 'id': self.sibling.pk},
+            {'op': 'update', 'id': self.subtask.pk, 'data': {'completed': True}},
+        ])
+        self.assertAggregates(self.first, 0, 0, timedelta(0))
+        self.assertAggregates(self.second, 2, 1, timedelta(minutes=10))
+
+        # Deleting a parent hands its subtasks over; they become top-level tasks
+        self.bulk([{'op': 'delete', 'id': self.second.pk}])
+        self.assertFalse(Task.objects.filter(user=self.user, parent_task__isnull=False).exists())
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_DIR=None, METRICS_TOKEN='scrape-secret')
+class MetricsTests(TestCase):
+    """
+    MetricsMiddleware, the Prometheus rendering and the /api/metrics permission
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('measured', password='password')
+        cls.staff = User.objects.create_user('operator', password='password', is_staff=True)
+        Task.objects.create(user=cls.user, title='task')
+
+    def setUp(self):
+        metrics_registry.reset()
+        self.token = str(AccessToken.for_user(self.user))
+
+    def route(self, name, method='GET'):
+        entries = [entry for entry in metrics_registry.snapshot() if (entry['route'], entry['method']) == (name, method)]
+        self.assertEqual(len(entries), 1, metrics_registry.snapshot())
+        return entries[0]
+
+    def test_sync_view(self):
+        self.client.cookies['access_token'] = self.token
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/changes/')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        entry = self.route('task_changes')
+        self.assertEqual(entry['requests'], {'200': 1})
+        self.assertEqual(entry['queries'], len(queries))
+        self.assertGreater(entry['queries'], 0)
+        self.assertEqual(entry['response_bytes'], len(response.content))
+        self.assertEqual(sum(entry['latency_buckets']), 1)
+        self.assertGreater(entry['render_seconds'], 0)
+
+    def test_async_view(self):
+        # The queries of one listing, counted on this thread's connection
+        self.client.cookies['access_token'] = self.token
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/tasks/')
+        self.assertGreater(len(queries), 0)
+        metrics_registry.reset()
+
+        # Through the ASGI handler: the middleware's async path, the ORM on other connections
+        self.async_client.cookies['access_token'] = self.token
+        response = async_to_sync(self.async_client.get)('/api/tasks/')
+        self.assertEqual(response.status_code, 200, response.content)
+        async_to_sync(self.async_client.get)('/api/tasks/999999/')
+
+        entry = self.route('task_list_create')
+        self.assertEqual(entry['requests'], {'200': 1})
+        self.assertEqual(entry['queries'], len(queries))
+        self.assertEqual(entry['response_bytes'], len(response.content))
+        self.assertEqual(self.route('task_detail')['requests'], {'404': 1})
+
+    def test_merge_routes(self):
+        def entry(route, status, latency_bucket, queries, response_bytes):
+            latency = [0] * (len(LATENCY_BUCKETS) + 1)
+            latency[latency_bucket] = 1
+            return {
+                'route': route, 'method': 'GET', 'requests': {status: 1},
+                'latency_buckets': latency, 'latency_seconds': 0.5,
+                'query_buckets': [0, 0, 1, 0, 0, 0, 0, 0, 0, 0], 'queries': queries, 'query_seconds': 0.25,
+                'render_seconds': 0.125, 'response_bytes': response_bytes,
+            }
+
+        merged = merge_routes([
+            [entry('task_detail', '200', 0, 2, 100), entry('task_list_create', '200', 3, 2, 10)],
+            [entry('task_detail', '404', 11, 2, 50)],
+        ])
+        self.assertEqual([route['route'] for route in merged], ['task_detail', 'task_list_create'])
+        detail = merged[0]
+        self.assertEqual(detail['requests'], {'200': 1, '404': 1})
+        self.assertEqual(detail['latency_buckets'], [1] + [0] * 10 + [1])
+        self.assertEqual(detail['query_buckets'], [0, 0, 2, 0, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(
+            (detail['latency_seconds'], detail['queries'], detail['query_seconds'], detail['render_seconds'], detail['response_bytes']),
+            (1.0, 4, 0.5, 0.25, 150)
+        )
+        self.assertEqual(merged[1]['requests'], {'200': 1})
+
+    def test_histogram_buckets_are_cumulative(self):
+        self.client.cookies['access_token'] = self.token
+        for _ in range(3):
+            self.client.get('/api/tasks/changes/')
+        text = render_prometheus(metrics_registry.snapshot())
+
+        prefix = 'api_request_duration_seconds_bucket{route="task_changes",method="GET",'
+        buckets = [line for line in text.splitlines() if line.startswith(prefix)]
+        self.assertEqual(len(buckets), len(LATENCY_BUCKETS) + 1)
+        self.assertTrue(buckets[-1].startswith(prefix + 'le="+Inf"}'))
+        counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+        self.assertEqual(counts, sorted(counts))
+        self.assertEqual(counts[-1], 3)
+        self.assertIn('api_request_duration_seconds_count{route="task_changes",method="GET"} 3', text)
+        self.assertIn('api_requests_total{route="task_changes",method="GET",status="200"} 3', text)
+
+    def test_metrics_permission(self):
+        self.client.cookies['access_token'] = self.token
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+        response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.staff))
+        self.assertEqual(self.client.get('/api/metrics').status_code, 200)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionTests(TestCase):
+    """
+    Accept-Encoding negotiation and what CompressionMiddleware leaves alone
+    """
+    body = json.dumps([{'id': n, 'title': f'task {n}'} for n in range(200)]).encode()
+
+    def compress(self, response, accept_encoding='gzip, br', path='/api/tasks/'):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiation(self):
+        encoders = get_encoders()
+        def negotiated(header):
+            encoder = negotiate_encoder(header, encoders)
+            return encoder and encoder.name
+
+        self.assertEqual(negotiated('gzip'), 'gzip')
+        self.assertEqual(negotiated('gzip;q=0, br;q=0'), None)
+        self.assertEqual(negotiated('identity'), None)
+        self.assertEqual(negotiated(''), None)
+        self.assertEqual(negotiated('*;q=0.5, gzip;q=0'), 'br' if brotli else None)
+        self.assertEqual(negotiated('gzip;q=0.8, br;q=0.5'), 'gzip')
+        if brotli is not None:
+            # Server preference breaks ties
+            self.assertEqual(negotiated('gzip, br'), 'br')
+            self.assertEqual(negotiated('br;q=0, gzip'), 'gzip')
+
+    def test_compresses_large_responses(self):
+        response = self.compress(HttpResponse(self.body, content_type='application/json'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+        if brotli is not None:
+            response = self.compress(HttpResponse(self.body, content_type='application/json'))
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertEqual(brotli.decompress(response.content), self.body)
+
+    def test_minimum_size(self):
+        small = self.body[:1023]
+        response = self.compress(HttpResponse(small, content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+        self.assertEqual(response.content, small)
+
+        response = self.compress(HttpResponse(self.body[:1024], content_type='application/json'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_vary_without_an_accepted_encoding(self):
+        # Cacheable either way: the next client may accept gzip
+        response = self.compress(HttpResponse(self.body, content_type='application/json'), 'identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.body)
+
+    def test_skips_compressed_media_types_and_encoded_responses(self):
+        for content_type in ('image/png', 'application/zip', 'application/pdf'):
+            with self.subTest(content_type=content_type):
+                response = self.compress(HttpResponse(self.body, content_type=content_type))
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content, self.body)
+
+        encoded = HttpResponse(gzip.compress(self.body), content_type='application/json')
+        encoded['Content-Encoding'] = 'gzip'
+        self.assertEqual(gzip.decompress(self.compress(encoded).content), self.body)
+
+        response = self.compress(HttpResponse(self.body, content_type='text/plain'), path='/media/profile.txt')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_responses(self):
+        # Compressed media is skipped however it is sent
+        response = self.compress(StreamingHttpResponse(iter([self.body]), content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+
+        # Anything else is compressed chunk by chunk, whatever its size
+        chunks = [b'{"tasks": [', b'1, 2', b']}']
+        response = self.compress(StreamingHttpResponse(iter(chunks), content_type='application/json'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+
+class RendererRoundTripTests(TestCase):
+    """
+    The orjson and msgpack renderers carry the same data as DRF's JSONRenderer
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('renderer', password='password')
+        category = Category.objects.create(user=cls.user, name='work')
+        parent = Task.objects.create(
+            user=cls.user, title='Parent \u2028 line', category=category,
+            due_date=timezone.now(), estimated_time=timedelta(hours=1, minutes=30)
+        )
+        Task.objects.create(user=cls.user, title='Subtask', parent_task=parent, estimated_time=timedelta(seconds=45))
+        Task.objects.create(user=cls.user, title='Empty', description=None)
+        cls.payload = {
+            'success': True,
+            'message': 'Tasks retrieved successfully',
+            'data': {
+                'tasks': TaskSerializer(Task.objects.filter(user=cls.user).order_by('id'), many=True).data,
+                'completion': Decimal('0.25'),
+                'generated_at': timezone.now(),
+                'window': timedelta(days=7),
+                'next': None,
+            },
+        }
+
+    def setUp(self):
+        if orjson is None:
+            self.skipTest('orjson is not installed')
+
+    def test_orjson_matches_json_renderer(self):
+        drf_body = JSONRenderer().render(self.payload)
+        orjson_body = FastJSONRenderer().render(self.payload)
+        self.assertEqual(json.loads(orjson_body), json.loads(drf_body))
+        self.assertEqual(orjson_body, drf_body)
+
+    def test_msgpack_decodes_to_the_json_structure(self):
+        if msgpack is None:
+            self.skipTest('msgpack is not installed')
+        drf_body = JSONRenderer().render(self.payload)
+        decoded = msgpack.unpackb(MessagePackRenderer().render(self.payload), raw=False)
+        self.assertEqual(decoded, json.loads(drf_body))
+
+
+_unique = count()
+
+
+def fresh_task(dataset):
+    """
+    A task to delete, tagged like the seeded ones
+    """
+    task = Task.objects.create(user=dataset.user, title='to delete', category=dataset.category)
+    task.tags.set([dataset.tag])
+    return {'kwargs': {'pk': task.pk}}
+
+
+def fresh_category(dataset):
+    """
+    A category to delete holding a tenth of the user's tasks, which move to dataset.category
+    """
+    category = Category.objects.create(user=dataset.user, name=f'to delete {next(_unique)}')
+    task_ids = Task.objects.filter(user=dataset.user).values_list('id', flat=True)[:dataset.size // 10 + 1]
+    Task.objects.filter(pk__in=list(task_ids)).update(category=category)
+    return {'kwargs': {'pk': category.pk}, 'params': {'reassign_to': dataset.category.pk}}
+
+
+def fresh_tag(dataset):
+    """
+    A tag to delete on a tenth of the user's tasks
+    """
+    tag = Tag.objects.create(user=dataset.user, name=f'to delete {next(_unique)}')
+    tag.task_set.add(*Task.objects.filter(user=dataset.user)[:dataset.size // 10 + 1])
+    return {'kwargs': {'pk': tag.pk}}
+
+
+def task_payload(dataset):
+    return {
+        'title': f'task {next(_unique)}',
+        'category': dataset.category.pk,
+        'tags': [dataset.tag.pk],
+        'parent_task': dataset.parent.pk,
+    }
+
+
+def retag_parent(dataset):
+    # PUT with a tag the task doesn't have yet, so every size takes the same path
+    dataset.parent.tags.clear()
+    return {'kwargs': {'pk': dataset.parent.pk}, 'data': {
+        'title': 'renamed', 'category': dataset.category.pk, 'tags': [dataset.tag.pk],
+    }}
+
+
+def complete_subtask(dataset):
+    Task.objects.filter(pk=dataset.task.pk).update(completed=False, completed_at=None)
+    return {'kwargs': {'pk': dataset.task.pk}, 'data': {'completed': True}}
+
+
+def overdue_tasks(dataset):
+    """
+    A tenth of the user's tasks, a subtask among them, made incomplete and overdue
+    """
+    task_ids = [dataset.task.pk, *Task.objects.filter(user=dataset.user).values_list('id', flat=True)[:dataset.size // 10]]
+    Task.objects.filter(pk__in=task_ids).update(
+        completed=False, completed_at=None, due_date=timezone.now() - timedelta(days=1)
+    )
+    return {'params': {'due_date': 'overdue'}}
+
+
+def bulk_operations(dataset):
+    doomed = Task.objects.create(user=dataset.user, title='to delete')
+    return {'data': {'operations': [
+        {'op': 'create', 'data': {'title': 'bulk created', 'category': dataset.category.pk}},
+        {'op': 'update', 'id': dataset.task.pk, 'data': {'completed': True}},
+        {'op': 'delete', 'id': doomed.pk},
+    ]}}
+
+
+def registration(dataset):
+    username = f'registered-{next(_unique)}'
+    return {'data': {
+        'username': username, 'email': f'{username}@example.com',
+        'password': 'a-Long-passw0rd!', 'confirm_password': 'a-Long-passw0rd!',
+    }}
+
+
+ENDPOINT_CASES = [
+    # Users and auth
+    EndpointCase('current_user', 'GET', 0),
+    EndpointCase('profile', 'GET', 2),
+    EndpointCase('profile', 'PUT', 6, lambda d: {'data': {'first_name': 'Ada'}}, multipart=True),
+    EndpointCase('profile', 'PATCH', 6, lambda d: {'data': {'last_name': 'Lovelace'}}, multipart=True),
+    EndpointCase('user_registration', 'POST', 5, registration, status=201, authenticated=False),
+    EndpointCase(
+        'token_obtain_pair', 'POST', 2,
+        lambda d: {'data': {'username': d.user.username, 'password': PASSWORD}}, authenticated=False
+    ),
+    EndpointCase(
+        'token_refresh', 'POST', 4,
+        lambda d: {'cookies': {'refresh_token': str(RefreshToken.for_user(d.user))}}, authenticated=False
+    ),
+    EndpointCase('logout', 'POST', 3, lambda d: {'cookies': {'refresh_token': str(RefreshToken.for_user(d.user))}}),
+
+    # Tasks
+    EndpointCase('task_list_create', 'GET', 3),
+    EndpointCase('task_list_create', 'GET', 3, lambda d: {'params': {'tag': d.tag.pk, 'sort_by': ['dueDate', 'asc']}}),
+    EndpointCase('task_list_create', 'GET', 3, lambda d: {'params': {'sort_by': ['categoryPriority', 'desc']}}),
+    EndpointCase('task_list_create', 'POST', 12, lambda d: {'data': task_payload(d)}, status=201),
+    EndpointCase('task_detail', 'GET', 3, lambda d: {'kwargs': {'pk': d.parent.pk}}),
+    EndpointCase('task_detail', 'PUT', 14, retag_parent),
+    EndpointCase('task_detail', 'PATCH', 6, complete_subtask),
+    EndpointCase('task_detail', 'DELETE', 8, fresh_task),  # the subtask reassignment always runs
+    EndpointCase('task_subtasks', 'GET', 4, lambda d: {'kwargs': {'pk': d.parent.pk}}),
+    EndpointCase('task_toplevel', 'GET', 3),
+    EndpointCase('task_changes', 'GET', 4),
+    EndpointCase('task_bulk', 'POST', 16, bulk_operations),
+    EndpointCase('task_complete', 'POST', 5, overdue_tasks),
+    EndpointCase('task_calendar', 'GET', 1),
+
+    # Categories and tags
+    EndpointCase('category_list_create', 'GET', 1),
+    EndpointCase(
+        'category_list_create', 'POST', 1, lambda d: {'data': {'name': f'category {next(_unique)}'}}, status=201
+    ),
+    EndpointCase('category_detail', 'GET', 1, lambda d: {'kwargs': {'pk': d.category.pk}}),
+    EndpointCase(
+        'category_detail', 'PATCH', 3, lambda d: {'kwargs': {'pk': d.category.pk}, 'data': {'description': 'edited'}}
+    ),
+    EndpointCase('category_detail', 'DELETE', 9, fresh_category),
+    EndpointCase('tag_list_create', 'GET', 1),
+    EndpointCase('tag_list_create', 'POST', 1, lambda d: {'data': {'name': f'tag {next(_unique)}'}}, status=201),
+    EndpointCase('tag_detail', 'GET', 2, lambda d: {'kwargs': {'pk': d.tag.pk}}),
+    EndpointCase('tag_detail', 'PATCH', 4, lambda d: {'kwargs': {'pk': d.tag.pk}, 'data': {'name': f'tag {next(_unique)}'}}),
+    EndpointCase('tag_detail', 'DELETE', 5, fresh_tag, status=204),
+
+    # Reports and operations
+    EndpointCase('workload', 'GET', 1),
+    EndpointCase('stats', 'GET', 2),
+    EndpointCase('cache_stats', 'GET', 0),
+    EndpointCase('compression_stats', 'GET', 0),
+    EndpointCase('metrics', 'GET', 0),
+]
+
+# Methods with no case, and why
+UNMEASURED = {
+    ('tag_detail', 'PUT'): 'not implemented (returns no response)',
+}
+
+
+class EndpointQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Every route in api/urls.py keeps a fixed query count, within its budget,
+    whether the user has 5 or 150 tasks
+    """
+    def test_every_route_is_measured(self):
+        measured = {(case.route, case.method) for case in ENDPOINT_CASES}
+        for pattern in urls.urlpatterns:
+            view_class = pattern.callback.view_class
+            for method in view_class.http_method_names:
+                if method in ('head', 'options', 'trace') or not hasattr(view_class, method):
+                    continue
+                key = (pattern.name, method.upper())
+                with self.subTest(route=pattern.name, method=key[1]):
+                    self.assertTrue(key in measured or key in UNMEASURED, f'No query budget for {key}')
+
+    def test_query_budgets(self):
+        for case in ENDPOINT_CASES:
+            with self.subTest(route=case.route, method=case.method, request=case.request):
+                self.assertQueryBudget(case)
@@ -8,12 +8,20 @@ from .views import (
     TaskListCreateView,
     TaskDetailView,
     TaskSubtasksView, TopLevelTasksView,
+    TaskChangesView, TaskBulkView, TaskCompleteView,
+    TaskCalendarView,
 
     CategoryListCreateView,
     CategoryDetailView,
 
     TagListCreateView,
-    TagDetailView
+    TagDetailView,
+
+    WorkloadView,
+    StatsView,
+
+    CacheStatsView, CompressionStatsView,
+    MetricsView
 )
 
 
@@ -32,6 +40,10 @@ urlpatterns = [
     path('tasks/<int:pk>/', TaskDetailView.as_view(), name='task_detail'),
     path('tasks/<int:pk>/subtasks/', TaskSubtasksView.as_view(), name='task_subtasks'),
     path('tasks/top-level/', TopLevelTasksView.as_view(), name='task_toplevel'),
+    path('tasks/changes/', TaskChangesView.as_view(), name='task_changes'),
+    path('tasks/bulk/', TaskBulkView.as_view(), name='task_bulk'),
+    path('tasks/complete/', TaskCompleteView.as_view(), name='task_complete'),
+    path('tasks/calendar/', TaskCalendarView.as_view(), name='task_calendar'),
 
     # Category URLs
     path('categories/', CategoryListCreateView.as_view(), name='category_list_create'),
@@ -40,4 +52,17 @@ urlpatterns = [
     # Tag URLs
     path('tags/', TagListCreateView.as_view(), name='tag_list_create'),
     path('tags/<int:pk>/', TagDetailView.as_view(), name='tag_detail'),
+
+    # Workload URLs
+    path('workload/', WorkloadView.as_view(), name='workload'),
+
+    # Productivity statistics URLs
+    path('stats/', StatsView.as_view(), name='stats'),
+
+    # Cache / compression stats URLs
+    path('cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
+    path('compression/stats/', CompressionStatsView.as_view(), name='compression_stats'),
+
+    # Prometheus metrics (no trailing slash, the usual scrape path)
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,8 +1,16 @@
 import logging
+import zoneinfo
+from datetime import timedelta, timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework import HTTP_HEADER_ENCODING
+from api.auth_cache import auth_user_cache, user_from_claims
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +45,104 @@ def api_success_response(data=None, message=None, status_code=200):
         
     return Response(response_data, status=status_code)
 
+
+class InvalidFieldset(ValueError):
+    pass
+
+
+def parse_fieldset(query_params, available, always=()):
+    """
+    Resolve the `fields=` / `exclude=` query params (comma separated, may repeat)
+    against a serializer's field names.
+    Returns the selected names (plus `always`), or None when neither param is given.
+    """
+    def names(param):
+        requested = [
+            name.strip() for value in query_params.getlist(param)
+            for name in value.split(',') if name.strip()
+        ]
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise InvalidFieldset(f"Unknown field(s) in {param}: {', '.join(unknown)}")
+        return requested
+
+    include, exclude = names('fields'), names('exclude')
+    if not include and not exclude:
+        return None
+
+    selected = set(include or available) - set(exclude)
+    return [name for name in available if name in selected or name in always]
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def parse_id_list(query_params, param):
+    """
+    Integer ids from a comma separated / repeated query param (e.g. tag=1,2&tag=3)
+    """
+    ids = []
+    for value in query_params.getlist(param):
+        for item in value.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            if not item.isdigit():
+                raise InvalidFilter(f"{param} must be a comma separated list of ids")
+            ids.append(int(item))
+    return list(dict.fromkeys(ids))
+
+
+def parse_timezone(query_params):
+    """
+    The client's timezone from `tz` (IANA name, e.g. Europe/Berlin) or `tz_offset`
+    (minutes east of UTC, e.g. 120 for UTC+02:00); defaults to the active timezone
+    """
+    name = query_params.get('tz')
+    if name:
+        try:
+            return zoneinfo.ZoneInfo(name)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise InvalidFilter(f"Unknown timezone: {name}")
+
+    offset = query_params.get('tz_offset')
+    if offset:
+        try:
+            minutes = int(offset)
+        except ValueError:
+            raise InvalidFilter("tz_offset must be a whole number of minutes")
+        if abs(minutes) > 14 * 60:
+            raise InvalidFilter("tz_offset must be between -840 and 840 minutes")
+        return dt_timezone(timedelta(minutes=minutes))
+
+    return timezone.get_current_timezone()
+
+
+def parse_date_param(query_params, param, default=None):
+    """
+    A YYYY-MM-DD query param as a date, or `default` when absent
+    """
+    value = query_params.get(param)
+    if not value:
+        return default
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise InvalidFilter(f"{param} must be a date (YYYY-MM-DD)")
+    return parsed
+
+
 class CookieJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication from the `access_token` cookie.
+    Async views (api.views.base.AsyncAPIView) call aauthenticate(),
+    which loads the user with the async ORM.
+    The user comes from the token's claims or the in-process user cache
+    when possible (api/auth_cache.py), so most requests need no user query.
+    """
     def authenticate(self, request):
         logger.debug('Attempting cookie authentication')
 
@@ -49,18 +154,86 @@ class CookieJWTAuthentication(JWTAuthentication):
         try:
             validated_token = self.get_validated_token(raw_token)
             user = self.get_user(validated_token)
-            logger.info(f'User {user.username} authenticated successfully via cookie')
+            logger.debug('User %s authenticated successfully via cookie', user.username)
             return user, validated_token
         except AuthenticationFailed as e:
             # an expected authentication failure (invalid token, etc.)
-            logger.error(f'Authentication failed: {str(e)}')
+            logger.error('Authentication failed: %s', e)
             raise
         except Exception as e:
             # an unexpected error (database connection issue, etc.)
-            logger.exception(f'Unexpected error during authentication: {str(e)}')
+            logger.exception('Unexpected error during authentication: %s', e)
             raise AuthenticationFailed(f'Authentication failed due to an unexpected error')
 
-        
+
+    async def aauthenticate(self, request):
+        logger.debug('Attempting cookie authentication (async)')
+
+        raw_token = self.get_raw_token(request)
+        if raw_token is None:
+            logger.debug('No token found in cookies')
+            return None
+
+        try:
+            # token validation is CPU only, the user lookup is the one query
+            validated_token = self.get_validated_token(raw_token)
+            user = await self.aget_user(validated_token)
+            logger.debug('User %s authenticated successfully via cookie', user.username)
+            return user, validated_token
+        except AuthenticationFailed as e:
+            logger.error('Authentication failed: %s', e)
+            raise
+        except Exception as e:
+            logger.exception('Unexpected error during authentication: %s', e)
+            raise AuthenticationFailed(f'Authentication failed due to an unexpected error')
+
+
+    def get_known_user(self, validated_token):
+        """
+        The token's user without a query (from its claims or the user cache), or None
+        """
+        user = user_from_claims(validated_token) or auth_user_cache.get(validated_token)
+        if user is not None and jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+
+    def get_user(self, validated_token):
+        user = self.get_known_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            auth_user_cache.set(validated_token, user)
+        return user
+
+
+    async def aget_user(self, validated_token):
+        """
+        JWTAuthentication.get_user() with the async ORM
+        """
+        user = self.get_known_user(validated_token)
+        if user is not None:
+            return user
+
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        try:
+            user = await self.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+
+        auth_user_cache.set(validated_token, user)
+        return user
+
 
     def get_header(self, request):
         """
@@ -8,9 +8,15 @@ from .auth_views import (
 )
 from .task_views import (
     TaskListCreateView, TaskDetailView,
-    TaskSubtasksView, TopLevelTasksView
+    TaskSubtasksView, TopLevelTasksView,
+    TaskChangesView, TaskBulkView, TaskCompleteView,
+    TaskCalendarView
 )
 from .category_tag_views import (
     CategoryListCreateView, CategoryDetailView,
     TagListCreateView, TagDetailView
-)
\ No newline at end of file
+)
+from .workload_views import WorkloadView
+from .stats_views import StatsView
+from .cache_views import CacheStatsView, CompressionStatsView
+from .metrics_views import MetricsView
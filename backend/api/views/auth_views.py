@@ -1,15 +1,18 @@
 import logging
 from django.conf import settings
 from api.utils import api_error_response, api_success_response
+from api.auth_cache import auth_user_cache, embed_user_claims
+from api.revocation import revoked_tokens
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 from users.models import User
-from api.serializers import UserSerializer
+from api.serializers import UserSerializer, ClaimsTokenObtainPairSerializer
 
 
 logger = logging.getLogger(__name__)
@@ -19,6 +22,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     """
     Custom view to obtain JWT access and refresh tokens and set them as HttpOnly cookies.
     """
+    serializer_class = ClaimsTokenObtainPairSerializer
+
     def post(self, request, *args, **kwargs):
         logger.debug("Authentication attempt received")
 
@@ -30,7 +35,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         refresh = response.data.get('refresh')
 
         username = request.data.get('username', 'unknown_user')
-        logger.info(f"User {username} authenticated successfully")
+        logger.info("User %s authenticated successfully", username)
 
         # Get the user data
         user = User.objects.get(username=username)
@@ -62,24 +67,40 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         response.data['message'] = 'Authentication successful'
         response.data['user'] = user_data
 
-        logger.debug(f"Authentication cookies set successfully")
+        logger.debug("Authentication cookies set successfully")
         return response
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def logout_view(request):
-    logger.info(f"Logout requested for user {request.user.username if request.user.is_authenticated else '-anonymous-'}")
+    logger.info("Logout requested for user %s", request.user.username if request.user.is_authenticated else '-anonymous-')
+    if request.user.is_authenticated:
+        auth_user_cache.invalidate_user(request.user.pk)
+
+    # The refresh token must not outlive the session it belonged to
+    refresh_token = request.COOKIES.get('refresh_token')
+    if refresh_token:
+        try:
+            revoked_tokens.revoke(RefreshToken(refresh_token))
+        except TokenError:
+            logger.debug("Logout with an invalid or expired refresh token")
+
     response = api_success_response(message="Logged out successfully", status_code=status.HTTP_200_OK)
     
     for cookie in request.COOKIES:
-        logger.debug(f"Deleting cookie: {cookie}")
+        logger.debug("Deleting cookie: %s", cookie)
         response.delete_cookie(cookie)
 
     logger.info("User logged out successfully")
     return response
 
 
+def revoked_refresh_response(refresh):
+    logger.warning("Revoked refresh token presented for user ID: %s", refresh.payload.get('user_id'))
+    return api_error_response(message="Refresh token has been revoked", status_code=status.HTTP_401_UNAUTHORIZED)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def refresh_token_view(request):
@@ -93,12 +114,37 @@ def refresh_token_view(request):
     try:
         # Create RefreshToken instance
         refresh = RefreshToken(refresh_token)
+        # Cheap early answer; the filter may not know of revocations by other processes yet
+        if revoked_tokens.is_revoked(refresh[jwt_settings.JTI_CLAIM]):
+            return revoked_refresh_response(refresh)
+
+        if settings.AUTH_CLAIMS_ONLY:
+            # Claims-only access tokens skip the user query, so re-read the user here:
+            # fresh claims, and no new tokens for deactivated or deleted users
+            user = User.objects.filter(**{
+                jwt_settings.USER_ID_FIELD: refresh.payload.get(jwt_settings.USER_ID_CLAIM)
+            }).first()
+            if user is None or not user.is_active:
+                logger.warning("Token refresh refused for user ID: %s", refresh.payload.get('user_id'))
+                return api_error_response(message="User not found or inactive", status_code=status.HTTP_401_UNAUTHORIZED)
+            embed_user_claims(refresh, user)
+
+        # Rotate the refresh token (as simplejwt's TokenRefreshSerializer does), revoking the old one.
+        # The revocation's unique INSERT is the authoritative check: of several requests
+        # replaying the same token, here or in other processes, only one gets new tokens.
+        if jwt_settings.ROTATE_REFRESH_TOKENS and jwt_settings.BLACKLIST_AFTER_ROTATION:
+            if not revoked_tokens.revoke(refresh):
+                return revoked_refresh_response(refresh)
+
         # Get the new access token
         new_access = str(refresh.access_token)
-        # Get the new refresh token (generated when ROTATE_REFRESH_TOKENS is True)
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
         new_refresh = str(refresh)
 
-        logger.info(f"Token refreshed successfully for user ID: {refresh.payload.get('user_id')}")
+        logger.info("Token refreshed successfully for user ID: %s", refresh.payload.get('user_id'))
 
         response = api_success_response(message="Token refreshed successfully")
         response.set_cookie(
@@ -122,7 +168,7 @@ def refresh_token_view(request):
         return response
     
     except TokenError as e:
-        logger.warning(f"Invalid refresh token: {str(e)}")
+        logger.warning("Invalid refresh token: %s", e)
         return api_error_response(errors=str(e), status_code=status.HTTP_400_BAD_REQUEST)
     
     except Exception as e:
@@ -0,0 +1,66 @@
+import inspect
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView dispatched as a coroutine, for views whose read handlers use the async ORM.
+
+    `async def` handlers are awaited on the event loop; plain handlers (writes,
+    OPTIONS) run in a worker thread via sync_to_async, so a view can mix both.
+    Authenticators with an `aauthenticate` coroutine (CookieJWTAuthentication)
+    authenticate without leaving the loop. Served natively under ASGI;
+    under WSGI Django runs the coroutine to completion for each request.
+    """
+    view_is_async = True
+
+    async def perform_async_authentication(self, request):
+        """
+        Async counterpart of rest_framework.request.Request._authenticate;
+        sets request.user so the synchronous checks in initial() don't hit the database
+        """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.perform_async_authentication(request)
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if inspect.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,34 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework import status
+from api.cache import cache_stats
+from api.compression import compression_stats
+from api.utils import api_success_response
+
+
+class CacheStatsView(APIView):
+    """
+    Response cache hit/miss counters for this worker process (staff only)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return api_success_response(
+            data=cache_stats.snapshot(),
+            message="Cache statistics retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+
+class CompressionStatsView(APIView):
+    """
+    Response compression ratio and CPU time per endpoint for this worker process (staff only)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return api_success_response(
+            data=compression_stats.snapshot(),
+            message="Compression statistics retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
@@ -3,21 +3,25 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from users.models import Category, Tag
+from tasks.services import delete_category
 from api.serializers import CategorySerializer, TagSerializer
+from api.views.base import AsyncAPIView
 from api.utils import api_error_response, api_success_response
+from api.cache import cache_user_response
 
 logger = logging.getLogger(__name__)
 
 # --------- CATEGORY VIEWS -----------
-class CategoryListCreateView(APIView):
+class CategoryListCreateView(AsyncAPIView):
     """
     View for creating and listing user's categories
     """
-    def get(self, request):
+    @cache_user_response('category_list')
+    async def get(self, request):
         """
         List all categories for the user
         """
-        categories = Category.objects.filter(user=request.user).order_by('name')
+        categories = [category async for category in Category.objects.filter(user=request.user).order_by('name')]
         serializer = CategorySerializer(categories, many=True, context={'request':request})
 
         return api_success_response(
@@ -55,7 +59,7 @@ class CategoryDetailView(APIView):
         try:
             category = Category.objects.get(pk=pk)
 
-            if category.user != user:
+            if category.user_id != user.pk:
                 return None
             return category
         except Category.DoesNotExist:
@@ -104,30 +108,53 @@ class CategoryDetailView(APIView):
         )
 
     def delete( self, request, pk):
+        """
+        Delete a category; `?reassign_to=<category id>` moves its tasks there
+        instead of leaving them uncategorized
+        """
         category = self.get_object(pk, request.user)
         if not category:
             return api_error_response(
                 message="Category not found for this user",
                 status_code=status.HTTP_404_NOT_FOUND
             )
+
+        reassign_to = None
+        reassign_id = request.query_params.get('reassign_to')
+        if reassign_id:
+            if reassign_id.isdigit() and int(reassign_id) != category.pk:
+                reassign_to = self.get_object(int(reassign_id), request.user)
+            if not reassign_to:
+                return api_error_response(
+                    message="Invalid reassign_to category",
+                    errors="reassign_to must be another category of this user",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
         
-        category.delete()
+        counts = delete_category(category, reassign_to)
+        # Lets the client patch its tasks in place: category `pk` -> `reassigned_to`
         return api_success_response(
+            data={
+                'deleted_category': pk,
+                'reassigned_to': reassign_to.pk if reassign_to else None,
+                **counts
+            },
             message="Category deleted successfully",
-            status_code=status.HTTP_204_NO_CONTENT
+            status_code=status.HTTP_200_OK
         )
 
 
 # --------- TAG VIEWS -----------
-class TagListCreateView(APIView):
+class TagListCreateView(AsyncAPIView):
     """
     View for creating and listing user's tags
     """
-    def get(self, request):
+    @cache_user_response('tag_list')
+    async def get(self, request):
         """
         List all tags for the user
         """
-        tags = Tag.objects.filter(user=request.user).order_by('name')
+        tags = [tag async for tag in Tag.objects.filter(user=request.user).order_by('name')]
         serializer = TagSerializer(tags, many=True, context={'request':request})
 
         return api_success_response(
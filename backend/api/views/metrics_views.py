@@ -0,0 +1,32 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.views import APIView
+from rest_framework.permissions import BasePermission
+from api.metrics import metrics_registry, render_prometheus
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class IsStaffOrMetricsToken(BasePermission):
+    """
+    Staff users, or scrapers sending `Authorization: Bearer <METRICS_TOKEN>`
+    """
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = settings.METRICS_TOKEN
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+class MetricsView(APIView):
+    """
+    Per-endpoint latency, query, serialization and size metrics in the Prometheus
+    text format, merged across worker processes when METRICS_DIR is set
+    """
+    permission_classes = [IsStaffOrMetricsToken]
+
+    def get(self, request):
+        routes, processes = metrics_registry.collect()
+        return HttpResponse(render_prometheus(routes, processes), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,82 @@
+import logging
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.duration import duration_string
+from rest_framework import status
+from users.models import Category
+from tasks.models import Task
+from tasks.analytics import UNCATEGORIZED, productivity_stats
+from api.views.base import AsyncAPIView
+from api.utils import api_error_response, api_success_response, parse_timezone, InvalidFilter
+from api.cache import cache_user_response
+
+logger = logging.getLogger(__name__)
+
+DURATION_KEYS = ('median_late_by', 'p90_late_by', 'median_estimated', 'median_elapsed')
+
+# Overdue counts and streaks depend on the time, so cached stats are only reused
+# within one window. UTC offsets are multiples of 15 minutes: every local midnight
+# starts a new window.
+STATS_CACHE_WINDOW = 15 * 60  # seconds
+
+
+def stats_window(request):
+    return int(timezone.now().timestamp() // STATS_CACHE_WINDOW)
+
+
+def represent_stats(stats):
+    """
+    Durations (seconds in tasks.analytics) as duration strings, like the workload endpoint
+    """
+    return {
+        key: represent_stats(value) if isinstance(value, dict)
+        else duration_string(timedelta(seconds=value)) if key in DURATION_KEYS and value is not None
+        else value
+        for key, value in stats.items()
+    }
+
+
+class StatsView(AsyncAPIView):
+    """
+    Productivity statistics over the user's whole task history:
+    GET /api/stats/?tz=Europe/Berlin
+    Completion rate, overdue tasks, lateness and elapsed-vs-estimated time, overall
+    and per category; completion streaks count local days in `tz` / `tz_offset`.
+    """
+    @cache_user_response('stats', vary=stats_window)
+    async def get(self, request):
+        try:
+            tz = parse_timezone(request.query_params)
+        except InvalidFilter as e:
+            return api_error_response(
+                message="Invalid stats parameters",
+                errors=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # The history query and the NumPy work run together in a worker thread
+        overall, by_category = await sync_to_async(productivity_stats)(
+            Task.objects.filter(user=request.user), tz, timezone.now()
+        )
+        names = {
+            category['id']: category['name']
+            async for category in Category.objects.filter(user=request.user).values('id', 'name')
+        }
+
+        return api_success_response(
+            data={
+                'timezone': str(tz),
+                'overall': represent_stats(overall),
+                'categories': [
+                    {
+                        'category': None if category_id == UNCATEGORIZED else category_id,
+                        'category_name': names.get(category_id),
+                        **represent_stats(stats),
+                    }
+                    for category_id, stats in by_category.items()
+                ],
+            },
+            message="Statistics retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
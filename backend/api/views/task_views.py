@@ -1,24 +1,58 @@
 import logging
+from calendar import monthrange
+from asgiref.sync import sync_to_async
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count, F, Q
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from tasks.models import Task
-from api.serializers import TaskSerializer, SubtaskSerializer
-from api.utils import api_error_response, api_success_response
+from tasks.search import search_tasks
+from tasks.sync import SyncToken, InvalidSyncToken, get_changes
+from tasks.completion import complete_tasks
+from tasks.services import delete_task
+from tasks.timeline import BUCKETS, MAX_CALENDAR_DAYS, bucket_tasks
+from api.serializers import TaskSerializer, SubtaskSerializer, TaskValuesSerializer, TaskBulkOperationSerializer
+from api.bulk import TaskBulkOperations, MAX_BULK_OPERATIONS
+from api.views.base import AsyncAPIView
+from api.utils import (
+    api_error_response, api_success_response, parse_fieldset, InvalidFieldset, parse_id_list, InvalidFilter,
+    parse_timezone, parse_date_param
+)
+from api.cache import cache_user_response, invalidate_user_responses
+from api.pagination import KeysetPaginator, SortKey, InvalidCursor, parse_page_size
 
 logger = logging.getLogger(__name__)
 
 
-class TaskListCreateView(APIView):
+def invalid_filter_response(error):
+    return api_error_response(
+        message="Invalid filter parameters",
+        errors=str(error),
+        status_code=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def invalid_fieldset_response(error):
+    return api_error_response(
+        message="Invalid fields parameter",
+        errors=str(error),
+        status_code=status.HTTP_400_BAD_REQUEST
+    )
+
+
+class TaskFilterMixin:
     """
-    View for creating and listing user's tasks
+    Task list filters (query params), shared by the views that act on a filtered set of tasks
     """
+    filter_params = ('parent_task', 'status', 'category', 'due_date', 'tag', 'not_tag', 'search')
+
     def apply_filters(self, queryset, params):
         """
         Helper function to apply filters to queryset
+        Raises InvalidFilter for malformed tag filters.
         """
         # > Filter by parent task (for subtasks)
         parent_id = params.get('parent_task')
@@ -49,144 +83,221 @@ class TaskListCreateView(APIView):
         # > Filter by due date
         due_date_filter = params.get('due_date')
         if due_date_filter:
-            today = timezone.now().date()
+            # Compare against datetime bounds rather than due_date__date,
+            # so the (user, due_date) indexes can serve the range
+            start_of_today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+            start_of_tomorrow = start_of_today + timedelta(days=1)
+            week_from_now = start_of_today + timedelta(days=7)
 
             match due_date_filter:
                 case 'past':
-                    queryset = queryset.filter(due_date__lt=today)
+                    queryset = queryset.filter(due_date__lt=start_of_today)
                 case 'overdue': # Only uncomplete tasks
-                    queryset = queryset.filter(due_date__lt=today, completed=False)
+                    queryset = queryset.filter(due_date__lt=start_of_today, completed=False)
                 case 'today':
-                    queryset = queryset.filter(due_date__date=today)
+                    queryset = queryset.filter(due_date__gte=start_of_today, due_date__lt=start_of_tomorrow)
                 case 'week':
-                    week_from_now = today + timedelta(days=7)
-                    queryset = queryset.filter(due_date__gte=today, due_date__lt=week_from_now)
+                    queryset = queryset.filter(due_date__gte=start_of_today, due_date__lt=week_from_now)
                 case 'future':
-                    week_from_now = today + timedelta(days=7)
-                    queryset = queryset.filter(due_date__gt=week_from_now)
+                    queryset = queryset.filter(due_date__gte=week_from_now)
                 case 'none':
                     queryset = queryset.filter(due_date__isnull=True)
                 case _: # default case
                     pass
 
 
-        # > Filter by tag
-        tag_id = params.get('tag')
-        if tag_id:
-            queryset = queryset.filter(tags__id=tag_id)
+        # > Filter by tags (EXISTS on the task/tag through table, so no duplicate rows)
+        tag_ids = parse_id_list(params, 'tag')
+        if tag_ids:
+            match = params.get('match', 'any').lower()
+            if match not in ('any', 'all'):
+                raise InvalidFilter("match must be 'all' or 'any'")
+            tagged = Task.tags.through.objects.filter(task_id=OuterRef('pk'), tag_id__in=tag_ids)
+            if match == 'all' and len(tag_ids) > 1:
+                # every requested tag: count the task's matching links
+                tagged = tagged.order_by().values('task_id').annotate(
+                    matched=Count('tag_id')
+                ).filter(matched=len(tag_ids))
+            queryset = queryset.filter(Exists(tagged))
+
+        not_tag_ids = parse_id_list(params, 'not_tag')
+        if not_tag_ids:
+            queryset = queryset.exclude(Exists(
+                Task.tags.through.objects.filter(task_id=OuterRef('pk'), tag_id__in=not_tag_ids)
+            ))
             
-        # > SEARCH by title or description
+        # > SEARCH by title or description (full-text index, annotates search_rank)
+        # Every term must match the start of a word: "rep" finds "report", "port" does not
         search = params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search)
-            )
+            queryset = search_tasks(queryset, search)
 
         return queryset
 
+    async def aapply_filters(self, queryset, params):
+        """
+        apply_filters() for async views
+        """
+        if params.get('search'):
+            # search_tasks checks once per process whether the full-text index exists
+            return await sync_to_async(self.apply_filters)(queryset, params)
+        return self.apply_filters(queryset, params)
 
-    def apply_sorting(self, queryset, sorting):
+
+class TaskListCreateView(TaskFilterMixin, AsyncAPIView):
+    """
+    View for creating and listing user's tasks
+    """
+    def get_sort_keys(self, sorting, ranked=False):
         """
-        Helper function to apply sorting to queryset
-        Note: Any previous sorting on queryset will be overwritten
+        Helper function to translate sort_by params into keyset sort keys
+        Returns (annotations, keys). Every ordering ends on the task id,
+        so rows with equal sort values keep a stable order across pages.
+        Without an explicit sort, `ranked` search results come most relevant first.
         """
-        field = sorting[0]
-        ordering = sorting[1]
-        sort_by = None
-        secondary_sort = F('due_date').asc(nulls_last=True)
+        field = sorting[0] if sorting else None
+        ordering = sorting[1] if len(sorting) > 1 else 'asc'
+        descending = ordering == 'desc'
+        # nullable sort columns keep nulls at the "end" of the chosen direction
+        nulls = 'last' if descending else 'first'
+
+        annotations = {}
+        due_date_key = SortKey('due_date', False, 'last')
+        tie_breaker = SortKey('id', True, None)
 
         match field:
             case 'dueDate':
-                sort_by = 'due_date'
-                secondary_sort = '-created_at'
+                keys = [
+                    SortKey('due_date', descending, nulls),
+                    SortKey('created_at', True, None)
+                ]
             case 'categoryPriority':
-                sort_by = 'category__priority'
+                annotations['category_priority'] = F('category__priority')
+                keys = [SortKey('category_priority', descending, nulls), due_date_key]
             case 'duration':
-                sort_by = 'estimated_time'
-            
-            # Otherwise, sort directly and return early
+                keys = [SortKey('estimated_time', descending, nulls), due_date_key]
             case 'createdAt':
-                return queryset.order_by(F('-created_at'))
+                keys = [SortKey('created_at', True, None)]
             case 'numOfSubtasks':
-                queryset = queryset.annotate(subtask_count=Count('sub_tasks'))
-                sort_expr = (
-                    F('subtask_count').desc(nulls_last=True)
-                    if ordering == 'desc'
-                    else F('subtask_count').asc(nulls_first=True)
-                )
-                return queryset.order_by(sort_expr, secondary_sort)
+                keys = [SortKey('subtask_count', descending, nulls), due_date_key]
             case _:
-                return queryset
-            
-        if sort_by:
-            sort_expr = (
-                F(sort_by).desc(nulls_last=True)
-                if ordering == 'desc'
-                else F(sort_by).asc(nulls_first=True)
-            )
-            queryset = queryset.order_by(sort_expr, secondary_sort)
+                # Default ORDERING: due date, then creation date
+                keys = [due_date_key, SortKey('created_at', True, None)]
+                if ranked:
+                    keys.insert(0, SortKey('search_rank', True, None))
 
-        return queryset
+        return annotations, keys + [tie_breaker]
 
 
-    def get(self, request):
+    def apply_sorting(self, queryset, keys, annotations=None):
+        """
+        Helper function to apply sorting to queryset
+        Note: Any previous sorting on queryset will be overwritten
+        """
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset.order_by(*[key.order_by() for key in keys])
+
+
+    async def get_counts(self, queryset):
+        """
+        Helper function to count the filtered tasks in a single query,
+        so the totals stay correct when only one page is serialized
+        """
+        top_level = Q(parent_task__isnull=True)
+        return await queryset.aaggregate(
+            total_count=Count('id'),
+            parent_count=Count('id', filter=top_level),
+            incomplete_count=Count('id', filter=top_level & Q(completed=False)),
+            complete_count=Count('id', filter=top_level & Q(completed=True)),
+        )
+
+
+    @cache_user_response('task_list')
+    async def get(self, request):
         user = request.user
-        queryset = Task.objects.filter(user=user)  # will prefetch subtasks
+        queryset = Task.objects.filter(user=user)
+
+        # --- SPARSE FIELDSET: the response is grouped by these, so they are always included ---
+        try:
+            fields = parse_fieldset(
+                request.query_params, TaskValuesSerializer.all_fields,
+                always=('id', 'parent_task', 'completed')
+            )
+        except InvalidFieldset as e:
+            return invalid_fieldset_response(e)
 
         sorting = request.query_params.getlist('sort_by')
-        logger.debug(f"SORTING Query Params received: {sorting}")
+        logger.debug("SORTING Query Params received: %s", sorting)
 
         # --- APPLY FILTERS based on query parameters ---
         if request.query_params:
-            logger.debug(f"Checking for filtering parameters: {request.query_params}")
-            queryset = self.apply_filters(queryset, params=request.query_params)
-        # -----------------------------------------------
-        # PRE-FETCH all related data
-        queryset = queryset.select_related(
-            'category', 'parent_task__category'
-        ).prefetch_related(
-            'tags',
-            'sub_tasks'
-        )
-        # -----------------------------------------------
+            logger.debug("Checking for filtering parameters: %s", request.query_params)
+            try:
+                queryset = await self.aapply_filters(queryset, params=request.query_params)
+            except InvalidFilter as e:
+                return invalid_filter_response(e)
+        filtered = queryset
 
         # --- APPLY SORTING based on query parameters ---
-        if sorting:
-            logger.debug(f"Applying sorting to queryset")
-            queryset = self.apply_sorting(queryset, sorting)
+        ranked = 'search_rank' in queryset.query.annotations
+        annotations, keys = self.get_sort_keys(sorting, ranked=ranked)
+        queryset = self.apply_sorting(queryset, keys, annotations)
+
+        # --- PAGINATE when a page size or cursor is requested ---
+        cursor = request.query_params.get('cursor')
+        limit = request.query_params.get('limit')
+        next_cursor = None
+        if cursor or limit:
+            try:
+                paginator = KeysetPaginator(keys, limit=parse_page_size(limit))
+                # page over values() rows, carrying the sort keys for the next cursor
+                rows = TaskValuesSerializer.values(
+                    queryset, fields=fields, extra_fields=[key.field for key in keys]
+                )
+                tasks, next_cursor = await paginator.apaginate(rows, cursor)
+            except InvalidCursor as e:
+                return api_error_response(
+                    message="Invalid pagination parameters",
+                    errors=str(e),
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            counts = await self.get_counts(filtered)
         else:
-            # Default ORDERING: due date, then creation date
-            logger.debug(f"No sorting parameters found. Applying default sorting to queryset")
-            queryset = queryset.order_by(
-                F('due_date').asc(nulls_last=True),
-                '-created_at'
-            )
+            tasks = queryset
+            counts = None
 
         # -----------------------------------------------
-        serializer = TaskSerializer(queryset, many=True, context={'request':request})
+        data = await TaskValuesSerializer(tasks, many=True, fields=fields).adata()
         
         # ORGANIZE for the response data structure
         incomplete_sorted = []
         complete_sorted = []
         all_tasks = {}
 
-        for task in serializer.data:
+        for task in data:
             all_tasks[task['id']] = task  # insert dictionary values as {task_id: task_data}
             if not task['parent_task']:  # This task is not a subtask
                 if task['completed']:
                     complete_sorted.append(task['id'])
                 else:
                     incomplete_sorted.append(task['id'])
+
+        if counts is None:
+            counts = {
+                'total_count': len(data),
+                'parent_count': len(incomplete_sorted) + len(complete_sorted),
+                'incomplete_count': len(incomplete_sorted),
+                'complete_count': len(complete_sorted),
+            }
         
         response_data = {
-            'total_count': len(serializer.data),
-            'parent_count': len(incomplete_sorted) + len(complete_sorted),
-            'incomplete_count': len(incomplete_sorted),
-            'complete_count': len(complete_sorted),
-            'incomplete_tasks': incomplete_sorted,
+            **counts,
+            'incomplete_tasks': incomplete_sorted,  # ids on this page, in sorted order
             'complete_tasks': complete_sorted,
-            'tasks': all_tasks
+            'tasks': all_tasks,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         } 
         
         return api_success_response(
@@ -211,7 +322,7 @@ class TaskListCreateView(APIView):
         )
     
 
-class TaskDetailView(APIView):
+class TaskDetailView(AsyncAPIView):
     """
     View for retrieving, updating, and deleting a specific task
     """
@@ -228,20 +339,24 @@ class TaskDetailView(APIView):
         except Task.DoesNotExist:
             return None
         
-    def get(self, request, pk):
+    async def get(self, request, pk):
         """
         Retrieve a task
         """
-        task = self.get_object(pk, request.user)
-        if not task:
+        try:
+            fields = parse_fieldset(request.query_params, TaskValuesSerializer.all_fields)
+        except InvalidFieldset as e:
+            return invalid_fieldset_response(e)
+
+        data = await TaskValuesSerializer(Task.objects.filter(pk=pk, user=request.user), fields=fields).adata()
+        if not data:
             return api_error_response(
                 message="Task not found for this user",
                 status_code=status.HTTP_404_NOT_FOUND
             )
-        
-        serializer = TaskSerializer(task, context={'request': request})
+
         return api_success_response(
-            data=serializer.data,
+            data=data[0],
             message="Task retrieved successfully",
             status_code=status.HTTP_200_OK
         )
@@ -294,16 +409,18 @@ class TaskDetailView(APIView):
             status_code=status.HTTP_400_BAD_REQUEST
         )
 
-    def cleanup_object(self, request, subtask_ids, keep_subtasks=True):
+    def cleanup_object(self, task, subtasks, changes, keep_subtasks=True):
         """
         Helper method for task deletion
-        Returns dictionary with updated data for subtasks.
+        Returns dictionary with updated data for subtasks, built from the rows read
+        before the delete with the reassignment (`changes`) applied to them.
         """
-        if not subtask_ids:
+        if not subtasks or (keep_subtasks and not changes):
+            # No subtasks, or they were all gone by the time of the delete
             return {'keep_subtasks': True, 'sub_count': 0}
         
         if not keep_subtasks:
-            Task.objects.filter(id__in=subtask_ids).delete()
+            subtask_ids = [row['id'] for row in subtasks]
             response_data = {
                 'keep_subtasks': False,
                 'sub_count': len(subtask_ids),
@@ -311,22 +428,27 @@ class TaskDetailView(APIView):
             }
             return response_data
         
-        # Keeping subtasks; Query subtasks by ID to get their updated state
-        updated_subtasks = Task.objects.filter(id__in=subtask_ids).select_related(
-                'category'
-            ).prefetch_related('tags').order_by(
-                F('due_date').asc(nulls_last=True),
-                '-created_at'
-            )
-        
-        serializer = TaskSerializer(updated_subtasks, many=True, context={'request':request})
+        if 'category_id' in changes:
+            # Now top-level tasks in the deleted task's category
+            category_name = task.category.name if task.category_id else None
+        else:
+            # Moved under the deleted task's parent; subtasks without a category show the parent's
+            category_name = Task.objects.filter(pk=changes['parent_task_id']).values_list(
+                'category__name', flat=True
+            ).first()
+        for row in subtasks:
+            row.update(changes)
+            if 'category_id' in changes or row['category_id'] is None:
+                row['category_name_value'] = category_name
+
+        serializer = TaskValuesSerializer(subtasks)
         # ORGANIZE for the response data structure
         incomplete_sorted = []
         complete_sorted = []
-        subtasks = {}
+        tasks = {}
 
         for item in serializer.data:
-            subtasks[item['id']] = item
+            tasks[item['id']] = item
             if item['completed']:
                 complete_sorted.append(item['id'])
             else:
@@ -339,14 +461,14 @@ class TaskDetailView(APIView):
             'complete_count': len(complete_sorted),
             'incomplete_tasks': incomplete_sorted,
             'complete_tasks': complete_sorted,
-            'tasks': subtasks
+            'tasks': tasks
         }
         return response_data
     
 
     def delete(self, request, pk):
-        task = self.get_object(pk, request.user)
-        logger.debug(f"task to delete: {task}")
+        task = Task.objects.select_related('category').filter(pk=pk, user=request.user).first()
+        logger.debug("task to delete: %s", task)
         if not task:
             return api_error_response(
                 message="Task not found for this user",
@@ -354,16 +476,18 @@ class TaskDetailView(APIView):
             )
         # Get the keep_subtasks parameter from query params (defaults to True)
         keep_subtasks = request.query_params.get('keep_subtasks', 'true').lower() == 'true'
-        # Get subtask IDs before task deletion
-        subtask_ids = None
-        if task.sub_tasks.exists():
-            logger.debug("Task to be deleted has subtasks")
-            subtask_ids = list(task.sub_tasks.values_list('id', flat=True))
+        # Read the subtasks once, before task deletion (only their ids when they go too)
+        subtasks = []
+        if task.subtask_count:
+            subtasks = list(TaskValuesSerializer.values(
+                task.sub_tasks.order_by(F('due_date').asc(nulls_last=True), '-created_at'),
+                fields=None if keep_subtasks else ['id']
+            ))
         
-        task.delete()
+        changes = delete_task(task, keep_subtasks)
 
         # Send updated subtask data in response
-        response_data = self.cleanup_object(request, subtask_ids, keep_subtasks)
+        response_data = self.cleanup_object(task, subtasks, changes, keep_subtasks)
         return api_success_response(
             data=response_data,
             message="Task deleted successfully",
@@ -371,23 +495,28 @@ class TaskDetailView(APIView):
         )
 
 
-class TaskSubtasksView(APIView):
+class TaskSubtasksView(AsyncAPIView):
     """
     View for getting subtasks of a specific task
     """
-    def get(self, request, pk):
+    async def get(self, request, pk):
         try:
-            parent_task = Task.objects.get(pk=pk, user=request.user)
+            fields = parse_fieldset(request.query_params, TaskValuesSerializer.all_fields, always=('id',))
+        except InvalidFieldset as e:
+            return invalid_fieldset_response(e)
+
+        try:
+            parent_task = await Task.objects.only('id').aget(pk=pk, user=request.user)
 
             subtasks = Task.objects.filter(parent_task=parent_task).order_by(
                 F('due_date').asc(nulls_last=True),
                 '-created_at'
             )
-            serializer = TaskSerializer(subtasks, many=True, context={'request': request})
+            data = await TaskValuesSerializer(subtasks, many=True, fields=fields).adata()
 
             subtasks_sorted = []
             subtasks_data = {}
-            for task in serializer.data:
+            for task in data:
                 subtasks_sorted.append(task['id'])
                 subtasks_data[task['id']] = task  # insert dictionary values as {task_id: task_data}
 
@@ -403,11 +532,16 @@ class TaskSubtasksView(APIView):
             )
 
 
-class TopLevelTasksView(APIView):
+class TopLevelTasksView(AsyncAPIView):
     """
     View for getting top-level tasks (tasks without a parent)
     """
-    def get(self, request):
+    async def get(self, request):
+        try:
+            fields = parse_fieldset(request.query_params, TaskValuesSerializer.all_fields)
+        except InvalidFieldset as e:
+            return invalid_fieldset_response(e)
+
         tasks = Task.objects.filter(
             user=request.user,
             parent_task__isnull=True
@@ -416,10 +550,204 @@ class TopLevelTasksView(APIView):
             '-created_at'
         )
 
-        serializer = TaskSerializer(tasks, many=True, context={'request':request})
+        data = await TaskValuesSerializer(tasks, many=True, fields=fields).adata()
         return api_success_response(
-            data=serializer.data,
+            data=data,
             message="Top-level tasks retrieved successfully",
             status_code=status.HTTP_200_OK
         )
-    
+
+
+class TaskChangesView(APIView):
+    """
+    Delta sync: tasks created/updated and ids of tasks deleted since `since`
+    Clients apply `deleted` first, then upsert `tasks`, and keep `token` for the next call.
+    When `reset` is true, `tasks` is the full set and replaces the local copy.
+    """
+    def get(self, request):
+        since = request.query_params.get('since')
+        try:
+            token = SyncToken.decode(since, request.user.pk) if since else None
+        except InvalidSyncToken as e:
+            return api_error_response(
+                message="Invalid sync token",
+                errors=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            fields = parse_fieldset(request.query_params, TaskValuesSerializer.all_fields, always=('id',))
+        except InvalidFieldset as e:
+            return invalid_fieldset_response(e)
+
+        tasks, deleted_ids, next_token, reset = get_changes(request.user, token)
+        serializer = TaskValuesSerializer(tasks.order_by('updated_at', 'id'), many=True, fields=fields)
+        changed = {task['id']: task for task in serializer.data}
+
+        return api_success_response(
+            data={
+                'tasks': changed,
+                # an id can be reused by a newer task (SQLite), which then wins
+                'deleted': [pk for pk in deleted_ids if pk not in changed],
+                'token': next_token.encode(),
+                'reset': reset
+            },
+            message="Task changes retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+
+class TaskBulkView(APIView):
+    """
+    Apply a batch of task operations in one transaction:
+    {"operations": [{"op": "create", "data": {...}},
+                    {"op": "update", "id": 1, "data": {...}},
+                    {"op": "delete", "id": 2}]}
+    Either every operation is applied or none is.
+    """
+    def post(self, request):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return api_error_response(
+                message="Expected a non-empty list of operations",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if len(operations) > MAX_BULK_OPERATIONS:
+            return api_error_response(
+                message=f"A batch can contain at most {MAX_BULK_OPERATIONS} operations",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = TaskBulkOperationSerializer(data=operations, many=True)
+        if not serializer.is_valid():
+            # Recent DRF versions key list errors by index, older ones return a list
+            errors = serializer.errors
+            items = errors.items() if isinstance(errors, dict) else enumerate(errors)
+            return api_error_response(
+                message="Invalid operations, no changes were applied",
+                errors=[{'index': index, 'errors': item} for index, item in items if item],
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        batch = TaskBulkOperations(request.user, serializer.validated_data)
+        failures = batch.validate()
+        if failures:
+            return api_error_response(
+                message="Invalid operations, no changes were applied",
+                errors=failures,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            results = batch.apply()
+        except DatabaseError as e:
+            logger.exception("Bulk task operations failed: %s", e)
+            return api_error_response(
+                message="Failed to apply operations, no changes were applied",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Current state of every created / updated task, serialized in one pass
+        written = [result['id'] for result in results if result['op'] != 'delete']
+        tasks = {
+            task['id']: task
+            for task in TaskValuesSerializer(Task.objects.filter(pk__in=written)).data
+        } if written else {}
+        for result in results:
+            if result['id'] in tasks:
+                result['task'] = tasks[result['id']]
+
+        return api_success_response(
+            data={'results': results},
+            message="Bulk operations applied successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+
+class TaskCompleteView(TaskFilterMixin, APIView):
+    """
+    Complete every incomplete task matching the task list filters
+    (e.g. POST /api/tasks/complete/?due_date=overdue) in a single UPDATE
+    """
+    def post(self, request):
+        if not any(request.query_params.get(param) for param in self.filter_params):
+            return api_error_response(
+                message="At least one filter is required",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            queryset = self.apply_filters(Task.objects.filter(user=request.user), request.query_params)
+        except InvalidFilter as e:
+            return invalid_filter_response(e)
+        with transaction.atomic():
+            completed = complete_tasks(queryset)
+            invalidate_user_responses(request.user.pk)
+
+        logger.info("Completed %s tasks for %s", completed, request.user.username)
+        return api_success_response(
+            data={'completed_count': completed},
+            message="Tasks completed successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+
+class TaskCalendarView(TaskFilterMixin, AsyncAPIView):
+    """
+    Tasks due in a date range, grouped into day / week / month buckets in the client's timezone:
+    GET /api/tasks/calendar/?start=YYYY-MM-DD&end=YYYY-MM-DD&bucket=day|week|month&tz=Europe/Berlin
+    Accepts the task list filters; `fields` can widen the calendar cell columns.
+    Defaults to the month of `start` (the current month), by day.
+    """
+    cell_fields = ['id', 'title', 'due_date', 'completed', 'parent_task', 'category']
+
+    @cache_user_response('task_calendar')
+    async def get(self, request):
+        params = request.query_params
+        try:
+            fields = parse_fieldset(params, TaskValuesSerializer.all_fields, always=('id', 'due_date'))
+            tz = parse_timezone(params)
+            today = timezone.localdate(timezone=tz)
+            start = parse_date_param(params, 'start', today.replace(day=1))
+            end = parse_date_param(params, 'end', start.replace(day=monthrange(start.year, start.month)[1]))
+            bucket = params.get('bucket', 'day')
+            if bucket not in BUCKETS:
+                raise InvalidFilter(f"bucket must be one of: {', '.join(BUCKETS)}")
+            if end < start:
+                raise InvalidFilter("end must not be before start")
+            if (end - start).days >= MAX_CALENDAR_DAYS:
+                raise InvalidFilter(f"The range can span at most {MAX_CALENDAR_DAYS} days")
+            queryset = await self.aapply_filters(Task.objects.filter(user=request.user), params)
+        except InvalidFieldset as e:
+            return invalid_fieldset_response(e)
+        except InvalidFilter as e:
+            return invalid_filter_response(e)
+
+        fields = fields or self.cell_fields
+        # One range query over (user, due_date), reading only the cell columns and the bucket
+        rows = [
+            row async for row in TaskValuesSerializer.values(
+                bucket_tasks(queryset, start, end, tz, bucket), fields=fields, extra_fields=['bucket', 'completed']
+            )
+        ]
+
+        buckets = {}
+        for row in rows:
+            cell = buckets.setdefault(row['bucket'].isoformat(), {'count': 0, 'completed_count': 0, 'task_ids': []})
+            cell['count'] += 1
+            cell['completed_count'] += row['completed']
+            cell['task_ids'].append(row['id'])
+
+        tasks = await TaskValuesSerializer(rows, fields=fields).adata()
+        return api_success_response(
+            data={
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'bucket': bucket,
+                'timezone': str(tz),
+                'total_count': len(rows),
+                'buckets': buckets,
+                'tasks': {task['id']: task for task in tasks},
+            },
+            message="Calendar retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
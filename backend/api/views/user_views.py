@@ -19,6 +19,9 @@ class CurrentUserView(APIView):
     """
     def get(self, request):
         try:
+            # A claims-only user (api/auth_cache.py) carries a few fields; load the rest at once
+            if deferred := request.user.get_deferred_fields():
+                request.user.refresh_from_db(fields=deferred)
             user_data = UserSerializer(request.user).data
 
             return api_success_response(
@@ -27,7 +30,7 @@ class CurrentUserView(APIView):
                 status_code=status.HTTP_200_OK
             )
         except Exception as e:
-            logger.exception(f"Error retrieving current user data for user: {request.user.username}")
+            logger.exception("Error retrieving current user data for user: %s", request.user.username)
             return api_error_response(
                 message="An unexpected error occured",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -37,12 +40,12 @@ class CurrentUserView(APIView):
 class UserProfileView(APIView):
 
     def get(self, request):
-        logger.debug(f"Profile retrieval requested by user: {request.user.username}")
+        logger.debug("Profile retrieval requested by user: %s", request.user.username)
         try:
             # Serialize the profile (including nested user data)   
             profile = Profile.objects.get(user=request.user)
             serializer = ProfileSerializer(profile, context={"request": request})
-            logger.info(f"Successfully retrieved profile for user: {request.user.username}")
+            logger.info("Successfully retrieved profile for user: %s", request.user.username)
 
             return api_success_response(
                 data=serializer.data,
@@ -51,13 +54,13 @@ class UserProfileView(APIView):
             )
         
         except Profile.DoesNotExist:
-            logger.warning(f"Profile not found for user: {request.user.username}")
+            logger.warning("Profile not found for user: %s", request.user.username)
             return api_error_response(
                 message="Profile not found", 
                 status_code=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
-            logger.exception(f"Error retreiving profile for user: {request.user.username}")
+            logger.exception("Error retreiving profile for user: %s", request.user.username)
             return api_error_response(
                 message="An unexpected error occured",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -67,24 +70,24 @@ class UserProfileView(APIView):
         """
         Full update (expects all required fields).
         """
-        logger.debug(f"FUll profile update requested by user: {request.user.username}")
-        logger.debug(f"Request data: {request.data}")
+        logger.debug("FUll profile update requested by user: %s", request.user.username)
+        logger.debug("Request data: %s", request.data)
 
         try:
             profile = Profile.objects.get(user=request.user)
         except Profile.DoesNotExist:
-            logger.warning(f"Profile not found for user: {request.user.username}")
+            logger.warning("Profile not found for user: %s", request.user.username)
             return api_error_response(
                 message="Profile not found", 
                 status_code=status.HTTP_404_NOT_FOUND
             )
         
         serializer = ProfileSerializer(profile, data=request.data, partial=False)
-        logger.debug("Serializer initial data: {serializer.initial_data}")
+        logger.debug("Serializer initial data: %s", serializer.initial_data)
 
         if serializer.is_valid():
             updated_profile = serializer.save()
-            logger.info(f"Profile successfully updated for user: {request.user.username}")
+            logger.info("Profile successfully updated for user: %s", request.user.username)
 
             return api_success_response(
                 data=ProfileSerializer(updated_profile).data, 
@@ -92,7 +95,7 @@ class UserProfileView(APIView):
                 status_code=status.HTTP_200_OK
             )
         
-        logger.warning(f"Invalid data for profile update. \nErrors: {serializer.errors}")
+        logger.warning("Invalid data for profile update. \nErrors: %s", serializer.errors)
         return api_error_response(
             message="Invalid data for profile update", 
             errors=serializer.errors, 
@@ -104,24 +107,24 @@ class UserProfileView(APIView):
         Partial update of the Profile (including nested user fields).
         Use PATCH for partial updates if you only want to update certain fields.
         """
-        logger.debug(f"Partial profile update requested by user: {request.user.username}")
-        logger.debug(f"Request data: {request.data}")
+        logger.debug("Partial profile update requested by user: %s", request.user.username)
+        logger.debug("Request data: %s", request.data)
 
         try:
             profile = Profile.objects.get(user=request.user)
         except Profile.DoesNotExist:
-            logger.warning(f"Profile not found for user: {request.user.username}")
+            logger.warning("Profile not found for user: %s", request.user.username)
             return api_error_response(
                 message="Profile not found", 
                 status_code=status.HTTP_404_NOT_FOUND
             )
             
         serializer = ProfileSerializer(profile, data=request.data, partial=True)
-        logger.debug(f"Serializer initial data: {serializer.initial_data}")
+        logger.debug("Serializer initial data: %s", serializer.initial_data)
 
         if serializer.is_valid():
             updated_profile = serializer.save()
-            logger.info(f"Profile partially updated for user: {request.user.username}")
+            logger.info("Profile partially updated for user: %s", request.user.username)
 
             return api_success_response(
                 data=ProfileSerializer(updated_profile).data, 
@@ -129,7 +132,7 @@ class UserProfileView(APIView):
                 status_code=status.HTTP_200_OK
             )
 
-        logger.warning(f"Invalid data for profile partial update. \nErrors: {serializer.errors}")
+        logger.warning("Invalid data for profile partial update. \nErrors: %s", serializer.errors)
         return api_error_response(
             message="Invalid data for profile update", 
             errors=serializer.errors, 
@@ -140,17 +143,17 @@ class UserRegistrationView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
-        logger.debug(f"New user registration requested with username: {request.data.get('username')}")
+        logger.debug("New user registration requested with username: %s", request.data.get('username'))
         serializer = UserRegistrationSerializer(data=request.data)
 
         if serializer.is_valid():
             user = serializer.save()
-            logger.info(f"User successfully registered: {user.username}")
+            logger.info("User successfully registered: %s", user.username)
             return api_success_response(
                 data= serializer.data, 
                 message='User created successfully',
                 status_code=status.HTTP_201_CREATED
             )
         
-        logger.warning(f"User registration failed. \nErrors: {serializer.errors}")
+        logger.warning("User registration failed. \nErrors: %s", serializer.errors)
         return api_error_response(message="User registration failed.", errors=serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
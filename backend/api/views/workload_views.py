@@ -0,0 +1,70 @@
+import logging
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.duration import duration_string
+from rest_framework import status
+from tasks.workload import MAX_WORKLOAD_DAYS, workload_rows, summarize_workload
+from api.views.base import AsyncAPIView
+from api.utils import (
+    api_error_response, api_success_response, parse_timezone, parse_date_param, InvalidFilter
+)
+from api.cache import cache_user_response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKLOAD_DAYS = 28
+
+
+def represent_bucket(bucket):
+    return {
+        group: {
+            'estimated_time': duration_string(values['estimated_time']),
+            'task_count': values['task_count'],
+        }
+        for group, values in bucket.items()
+    }
+
+
+class WorkloadView(AsyncAPIView):
+    """
+    Estimated time of incomplete tasks per due day and per week, split into
+    workload / non_workload / uncategorized tasks (Category.as_workload):
+    GET /api/workload/?start=YYYY-MM-DD&end=YYYY-MM-DD&tz=Europe/Berlin
+    Dates are inclusive and local to `tz` / `tz_offset`; defaults to the next four weeks.
+    """
+    @cache_user_response('workload')
+    async def get(self, request):
+        try:
+            tz = parse_timezone(request.query_params)
+            start = parse_date_param(request.query_params, 'start', timezone.localdate(timezone=tz))
+            end = parse_date_param(
+                request.query_params, 'end', start + timedelta(days=DEFAULT_WORKLOAD_DAYS - 1)
+            )
+            if end < start:
+                raise InvalidFilter("end must not be before start")
+            if (end - start).days >= MAX_WORKLOAD_DAYS:
+                raise InvalidFilter(f"The range can span at most {MAX_WORKLOAD_DAYS} days")
+        except InvalidFilter as e:
+            return api_error_response(
+                message="Invalid workload parameters",
+                errors=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = [row async for row in workload_rows(request.user, start, end, tz)]
+        days, weeks, totals = summarize_workload(rows, start, end)
+
+        return api_success_response(
+            data={
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'timezone': str(tz),
+                'days': [{'date': day.isoformat(), **represent_bucket(bucket)} for day, bucket in days.items()],
+                'weeks': [
+                    {'week_start': week.isoformat(), **represent_bucket(bucket)} for week, bucket in weeks.items()
+                ],
+                'totals': represent_bucket(totals),
+            },
+            message="Workload retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
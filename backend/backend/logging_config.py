@@ -0,0 +1,228 @@
+"""
+Non-blocking logging pipeline used by settings.LOGGING.
+
+Request threads only put records on a bounded queue (BackgroundQueueHandler);
+a QueueListener thread formats them and does the I/O: JSON lines to a file that
+rotates by size and age with gzip-compressed archives (CompressedRotatingFileHandler),
+and text to the console. When the queue is full records are dropped, never waited on.
+
+SamplingFilter keeps 1 in N of the INFO-and-below records of chosen loggers
+(e.g. per-request authentication lines); warnings and errors always pass.
+"""
+import os
+import copy
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
+
+# LogRecord attributes that are not `extra=` fields
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, module, message,
+    any `extra=` fields, and the formatted exception if there was one
+    """
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Passes 1 in `rates[logger]` records at or below `max_level` from each sampled
+    logger (and its children); everything else passes untouched
+    """
+    def __init__(self, rates=None, max_level='INFO'):
+        super().__init__()
+        self.rates = {name: int(rate) for name, rate in (rates or {}).items() if int(rate) > 1}
+        self.max_level = logging.getLevelName(max_level) if isinstance(max_level, str) else max_level
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return name, self.rates[name]
+            name = name.rpartition('.')[0]
+        return None, 1
+
+    def filter(self, record):
+        if record.levelno > self.max_level or not self.rates:
+            return True
+        sampled, rate = self._rate(record.name)
+        if rate == 1:
+            return True
+        with self._lock:
+            seen = self._counters.get(sampled, 0)
+            self._counters[sampled] = seen + 1
+        return seen % rate == 0
+
+
+class CompressedRotatingFileHandler(BaseRotatingHandler):
+    """
+    File handler that rolls over once the file reaches `max_bytes` or is
+    `interval` seconds old; archives are gzip-compressed (name.YYYYmmdd-HHMMSS.gz)
+    and only the newest `backup_count` are kept. Runs on the writer thread,
+    so compressing never holds up a request.
+    """
+    def __init__(self, filename, max_bytes=50 * 1024 * 1024, interval=24 * 60 * 60, backup_count=14):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super().__init__(filename, 'a', encoding='utf-8', delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.rotator = self._compress
+        started = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+        self.rollover_at = started + interval if interval else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+            archive, suffix = f'{self.baseFilename}.{stamp}.gz', 1
+            while os.path.exists(archive):
+                archive, suffix = f'{self.baseFilename}.{stamp}-{suffix}.gz', suffix + 1
+            self.rotate(self.baseFilename, archive)
+            self._delete_old_archives()
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+
+    @staticmethod
+    def _compress(source, destination):
+        with open(source, 'rb') as plain, gzip.open(destination, 'wb') as compressed:
+            shutil.copyfileobj(plain, compressed)
+        os.remove(source)
+
+    def _delete_old_archives(self):
+        if self.backup_count <= 0:
+            return
+        archives = sorted(glob.glob(glob.escape(self.baseFilename) + '.*.gz'), key=os.path.getmtime)
+        for archive in archives[:-self.backup_count]:
+            os.remove(archive)
+
+
+class DrainingQueueListener(QueueListener):
+    """
+    QueueListener whose stop() waits for room in a full queue for its sentinel
+    (the stock one fails with queue.Full), then writes out everything before it
+    """
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue for a QueueListener thread that writes them
+    through `targets`; never blocks the logging thread. `dropped` counts records
+    lost to a full queue, reported by the next record that gets through.
+    """
+    def __init__(self, targets, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.dropped = 0
+        self.listener = DrainingQueueListener(self.queue, *targets, respect_handler_level=True)
+        self.listener.start()
+        self._listening = True
+        atexit.register(self.close)
+
+    def prepare(self, record):
+        # Freeze the message (its args may change once the call returns) and the
+        # traceback (keeps frames alive); formatting itself happens on the writer thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': f'{dropped} log records dropped: the logging queue was full',
+                }))
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # Write out what is queued (at exit, or when logging is reconfigured)
+        if self._listening:
+            self._listening = False
+            self.listener.stop()
+            for target in self.listener.handlers:
+                target.close()
+        super().close()
+
+
+def background_handler(filename=None, console=True, console_format='text', queue_size=10000,
+                       max_bytes=50 * 1024 * 1024, interval=24 * 60 * 60, backup_count=14):
+    """
+    dictConfig factory ('()') for the BackgroundQueueHandler used in settings.LOGGING:
+    JSON lines to `filename` (rotated and compressed), and the console
+    as `console_format` ('text' or 'json')
+    """
+    targets = []
+    if filename:
+        file_handler = CompressedRotatingFileHandler(
+            filename, max_bytes=max_bytes, interval=interval, backup_count=backup_count
+        )
+        file_handler.setFormatter(JsonFormatter())
+        targets.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(
+            JsonFormatter() if console_format == 'json'
+            else logging.Formatter('{name} {levelname} {asctime} {module} {message}', style='{')
+        )
+        targets.append(console_handler)
+    return BackgroundQueueHandler(targets, queue_size=queue_size)
+
+
+def parse_sampling(value):
+    """
+    LOG_SAMPLING ('api.utils=100,users.signals=10') as {logger: N}
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = int(rate)
+    return rates
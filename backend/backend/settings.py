@@ -10,10 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
 import dj_database_url
+from backend.logging_config import parse_sampling
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -53,8 +55,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',  # first, so it times the whole stack
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -150,7 +154,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
     ],
+    # orjson-backed JSON when installed (same output as DRF's JSONRenderer), see api/renderers.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
+# Optional MessagePack responses (Accept: application/msgpack)
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('api.renderers.MessagePackRenderer')
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
@@ -159,6 +171,55 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Caching
+# Local memory by default (per process). Point DJANGO_CACHE_DIR at a shared
+# directory to use the file-based backend across worker processes.
+if CACHE_DIR := os.getenv('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'simon-tasks',
+        }
+    }
+
+# Per-user cache of rendered list responses (see api/cache.py)
+API_RESPONSE_CACHE_ENABLED = os.getenv('API_RESPONSE_CACHE_ENABLED', 'TRUE').lower() == 'true'
+API_RESPONSE_CACHE_ALIAS = 'default'
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', 300))  # seconds
+
+# Authenticated-user cache and claims-only access tokens (see api/auth_cache.py)
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 1024))  # entries per process, 0 disables
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))  # seconds
+AUTH_CLAIMS_ONLY = os.getenv('AUTH_CLAIMS_ONLY', 'FALSE').lower() == 'true'
+
+# Refresh-token revocation (see api/revocation.py)
+REVOKED_TOKEN_SYNC_SECONDS = float(os.getenv('REVOKED_TOKEN_SYNC_SECONDS', 5))  # other processes' revocations
+REVOKED_TOKEN_FILTER_CAPACITY = int(os.getenv('REVOKED_TOKEN_FILTER_CAPACITY', 10000))
+
+# Response compression (see api/middleware.py); brotli is used when the package is installed
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # bytes
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+COMPRESSION_EXCLUDE_PATHS = [MEDIA_URL]  # profile images are already compressed
+
+# Per-endpoint Prometheus metrics at /api/metrics (see api/metrics.py)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'TRUE').lower() == 'true'
+# Shared directory aggregating all worker processes; unset reports the serving process only
+METRICS_DIR = os.getenv('DJANGO_METRICS_DIR')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 5))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # bearer token for scrapers; staff users can always read
+
+# Delta sync (see tasks/sync.py)
+TASK_SYNC_OVERLAP_SECONDS = int(os.getenv('TASK_SYNC_OVERLAP_SECONDS', 5))
+TASK_TOMBSTONE_RETENTION_DAYS = int(os.getenv('TASK_TOMBSTONE_RETENTION_DAYS', 30))
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
     'http://127.0.0.1:3000',
@@ -173,58 +234,61 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_PASS')
 
-# Logging Configuration
+# Logging Configuration (see backend/logging_config.py)
+# Records are queued by the request threads and written by a background thread:
+# JSON lines to the log file (rotated by size and age, archives gzip-compressed) and text to the console.
 DEFAULT_LOG_FILE = os.getenv('DJANGO_LOG_FILE', BASE_DIR / 'logs' / 'django.log')
+LOG_LEVEL = os.getenv('DJANGO_LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO')  # level of the api / users loggers
+LOG_FILE_MAX_BYTES = int(os.getenv('DJANGO_LOG_MAX_BYTES', 50 * 1024 * 1024))
+LOG_FILE_ROTATE_SECONDS = int(os.getenv('DJANGO_LOG_ROTATE_SECONDS', 24 * 60 * 60))
+LOG_FILE_BACKUP_COUNT = int(os.getenv('DJANGO_LOG_BACKUP_COUNT', 14))
+LOG_QUEUE_SIZE = int(os.getenv('DJANGO_LOG_QUEUE_SIZE', 10000))  # records beyond it are dropped, not waited on
+# Keep 1 in N of the INFO-and-below records of high-volume loggers: 'logger=N,...'
+LOG_SAMPLING = parse_sampling(os.getenv('DJANGO_LOG_SAMPLING', 'api.utils=100'))
 
 LOGGING = {
     'version': 1, # dictConfig format version
     'disable_existing_loggers': False, # retain the default loggers
 
-    'formatters': {
-        'verbose': {
-            'format': '{name} {levelname} {asctime} {module} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
+    'filters': {
+        'sampling': {
+            '()': 'backend.logging_config.SamplingFilter',
+            'rates': LOG_SAMPLING,
         },
     },
 
     'handlers': {
-        'console': {
-            'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose'
-        },
-
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
+        'background': {
+            '()': 'backend.logging_config.background_handler',
+            'filters': ['sampling'],
             'filename': DEFAULT_LOG_FILE,
-            'formatter': 'verbose'
+            'console_format': os.getenv('DJANGO_LOG_CONSOLE_FORMAT', 'text'),
+            'queue_size': LOG_QUEUE_SIZE,
+            'max_bytes': LOG_FILE_MAX_BYTES,
+            'interval': LOG_FILE_ROTATE_SECONDS,
+            'backup_count': LOG_FILE_BACKUP_COUNT,
         },
     },
 
     'loggers': {
         '': {  # Root logger
-            'handlers': ['console', 'file'],
+            'handlers': ['background'],
             'level': 'INFO',
             'propagate': True
         },
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['background'],
             'level': 'INFO',
             'propagate': False,
         },
         'users': {
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
+            'handlers': ['background'],
+            'level': LOG_LEVEL,
             'propagate': False,
         },
         'api': {  
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
+            'handlers': ['background'],
+            'level': LOG_LEVEL,
             'propagate': False,
         },
     },
@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Task
+
+
+# Subtask fields the parent's aggregates are computed from
+AGGREGATED_FIELDS = {'parent_task', 'parent_task_id', 'completed', 'estimated_time'}
+
+
+def refresh_subtask_aggregates(parent_ids):
+    """
+    Recompute the stored aggregates of the given parents from their subtasks,
+    in a single UPDATE. A recount rather than a delta, so writes from stale
+    instances (a double-submitted completion) cannot make the counters drift.
+    """
+    parent_ids = [pk for pk in set(parent_ids) if pk]
+    if not parent_ids:
+        return 0
+
+    subtasks = Task.objects.filter(parent_task=OuterRef('pk')).order_by().values('parent_task')
+    return Task.objects.filter(pk__in=parent_ids).update(
+        updated_at=timezone.now(),
+        subtask_count=Coalesce(
+            Subquery(subtasks.annotate(total=Count('id')).values('total')), 0
+        ),
+        completed_subtask_count=Coalesce(
+            Subquery(subtasks.annotate(total=Count('id', filter=Q(completed=True))).values('total')), 0
+        ),
+        remaining_subtask_time=Coalesce(
+            Subquery(subtasks.annotate(total=Sum('estimated_time', filter=Q(completed=False))).values('total')),
+            Value(timedelta(0))
+        ),
+    )
@@ -0,0 +1,172 @@
+"""
+Productivity statistics over a user's task history: completion rate, completion
+streaks, lateness against due dates and elapsed time against estimates, overall
+and per category.
+
+The history is read with one values_list() query in which the database turns every
+column into a float (timestamps as epoch seconds), so the rows load straight into a
+NumPy array without per-row Python conversion, and every statistic is a masked
+array operation instead of a loop over the tasks.
+Subtasks without a category of their own count under their parent's category.
+"""
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+from django.db.models import DurationField, FloatField, Func
+from django.db.models.functions import Coalesce
+
+UNCATEGORIZED = 0  # category ids start at 1
+SECONDS_PER_DAY = 86400
+UNIX_EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal()
+
+TaskHistory = namedtuple('TaskHistory', [
+    'created_at',       # float64 epoch seconds
+    'due_date',         # float64 epoch seconds, NaN when unset
+    'completed_at',     # float64 epoch seconds, NaN when open
+    'estimated_time',   # float64 seconds, NaN when unset
+    'category',         # int64 effective category id, UNCATEGORIZED when none
+])
+
+
+class Epoch(Func):
+    """
+    A datetime column as seconds since 1970-01-01 UTC, or a duration column
+    as seconds, computed by the database as a float
+    """
+    output_field = FloatField()
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)::double precision'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Django stores datetimes as UTC text and durations as integer microseconds
+        if isinstance(self.source_expressions[0].output_field, DurationField):
+            template = '(%(expressions)s / 1000000.0)'
+        else:
+            template = '((julianday(%(expressions)s) - 2440587.5) * 86400.0)'
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+def load_history(queryset):
+    """
+    The columns of `queryset` the statistics need, as a TaskHistory of arrays.
+    The completion triggers (tasks/completion.py) keep completed_at set exactly
+    for completed tasks, so it stands in for `completed`.
+    """
+    rows = queryset.order_by().values_list(
+        Epoch('created_at'),
+        Epoch('due_date'),
+        Epoch('completed_at'),
+        Epoch('estimated_time'),
+        Coalesce('category_id', 'parent_task__category_id'),
+    )
+    # NULLs (None) become NaN
+    columns = np.array(list(rows), dtype=np.float64).reshape(-1, len(TaskHistory._fields)).T
+    category = columns[4]
+    return TaskHistory(
+        *columns[:4],
+        category=np.where(np.isnan(category), UNCATEGORIZED, category).astype(np.int64),
+    )
+
+
+def local_days(timestamps, tz):
+    """
+    Proleptic ordinals of the local dates in `tz` of epoch-second `timestamps`.
+    UTC offsets only change on the hour, so they are looked up once per distinct hour.
+    """
+    hours, hour_index = np.unique(np.floor_divide(timestamps, 3600).astype(np.int64), return_inverse=True)
+    offsets = np.fromiter(
+        (
+            datetime.fromtimestamp(hour * 3600, tz).utcoffset().total_seconds()
+            for hour in hours.tolist()
+        ),
+        dtype=np.float64, count=hours.size
+    )
+    local = timestamps + offsets[hour_index.reshape(-1)]
+    return np.floor_divide(local, SECONDS_PER_DAY).astype(np.int64) + UNIX_EPOCH_ORDINAL
+
+
+def _rate(part, whole):
+    return float(part) / whole if whole else None
+
+
+def _median(values):
+    return float(np.median(values)) if values.size else None
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values.size else None
+
+
+def streaks(completed_at, tz, today):
+    """
+    (current, longest) runs of consecutive local days in `tz` with at least one completion.
+    The current streak still counts when nothing has been completed yet today.
+    """
+    days = np.unique(local_days(completed_at[~np.isnan(completed_at)], tz))
+    if not days.size:
+        return 0, 0
+    # A new run starts wherever the gap to the previous completion day is not one day
+    run_ids = np.concatenate(([0], np.cumsum(np.diff(days) != 1)))
+    run_lengths = np.bincount(run_ids)
+    current = int(run_lengths[-1]) if days[-1] >= today.toordinal() - 1 else 0
+    return current, int(run_lengths.max())
+
+
+def summarize(history, now, mask=None):
+    """
+    Statistics over the tasks of `history` selected by the boolean `mask` (all by default).
+    Times are in seconds.
+    """
+    if mask is not None:
+        history = TaskHistory(*(column[mask] for column in history))
+    now = now.timestamp()
+    completed = ~np.isnan(history.completed_at)
+    has_due = ~np.isnan(history.due_date)
+
+    # Lateness: completed tasks with a due date, by how far past it they were completed
+    finished_due = completed & has_due
+    lateness = history.completed_at[finished_due] - history.due_date[finished_due]
+    late = lateness[lateness > 0]
+
+    # Elapsed (created -> completed) against the estimate, for completed estimated tasks
+    estimated = completed & (history.estimated_time > 0)
+    elapsed = history.completed_at[estimated] - history.created_at[estimated]
+    estimates = history.estimated_time[estimated]
+
+    task_count = history.created_at.size
+    completed_count = int(np.count_nonzero(completed))
+    return {
+        'task_count': task_count,
+        'completed_count': completed_count,
+        'completion_rate': _rate(completed_count, task_count),
+        'overdue_count': int(np.count_nonzero(~completed & has_due & (history.due_date < now))),
+        'lateness': {
+            'completed_with_due_date': int(lateness.size),
+            'late_count': int(late.size),
+            'on_time_rate': _rate(lateness.size - late.size, lateness.size),
+            'median_late_by': _median(late),
+            'p90_late_by': _percentile(late, 90),
+        },
+        'estimates': {
+            'task_count': int(estimates.size),
+            'median_estimated': _median(estimates),
+            'median_elapsed': _median(elapsed),
+            'median_elapsed_ratio': _median(elapsed / estimates),
+            'within_estimate_rate': _rate(np.count_nonzero(elapsed <= estimates), estimates.size),
+        },
+    }
+
+
+def productivity_stats(queryset, tz, now):
+    """
+    Overall statistics and completion streaks of the tasks in `queryset`,
+    plus summarize() per effective category id (UNCATEGORIZED for none)
+    """
+    history = load_history(queryset)
+    current, longest = streaks(history.completed_at, tz, now.astimezone(tz).date())
+    overall = summarize(history, now)
+    overall['streaks'] = {'current': current, 'longest': longest}
+    categories = {
+        int(category): summarize(history, now, history.category == category)
+        for category in np.unique(history.category)
+    }
+    return overall, categories
@@ -0,0 +1,127 @@
+"""
+Database-side maintenance of Task.completed_at, so set-based writes
+(QuerySet.update, bulk_update) keep it consistent with `completed`:
+set when a task becomes complete without a timestamp, cleared when it is reopened.
+
+PostgreSQL: a BEFORE INSERT/UPDATE trigger rewrites the new row.
+SQLite: AFTER INSERT/UPDATE triggers patch the row that was just written.
+Task.save() applies the same rule in Python, so saved instances stay in sync without a refetch.
+"""
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+from .aggregates import refresh_subtask_aggregates
+
+TRIGGER_VENDORS = ('postgresql', 'sqlite')
+TRIGGER_MIGRATION = ('tasks', '0010_task_completion_triggers')
+
+POSTGRES_INSTALL = [
+    """
+    CREATE OR REPLACE FUNCTION tasks_task_completed_at_update() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.completed AND NEW.completed_at IS NULL THEN
+            NEW.completed_at := now();
+        ELSIF NOT NEW.completed AND NEW.completed_at IS NOT NULL THEN
+            NEW.completed_at := NULL;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS tasks_task_completed_at_trigger ON tasks_task",
+    """
+    CREATE TRIGGER tasks_task_completed_at_trigger
+        BEFORE INSERT OR UPDATE OF completed, completed_at ON tasks_task
+        FOR EACH ROW EXECUTE FUNCTION tasks_task_completed_at_update()
+    """,
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS tasks_task_completed_at_trigger ON tasks_task",
+    "DROP FUNCTION IF EXISTS tasks_task_completed_at_update()",
+]
+
+# Same text format Django uses for datetimes on SQLite (UTC)
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+SQLITE_INCONSISTENT = (
+    "(NEW.completed AND NEW.completed_at IS NULL) OR "
+    "(NOT NEW.completed AND NEW.completed_at IS NOT NULL)"
+)
+SQLITE_FIX_ROW = f"""
+    UPDATE tasks_task
+        SET completed_at = CASE WHEN NEW.completed THEN {SQLITE_NOW} ELSE NULL END
+        WHERE id = NEW.id;
+"""
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_completed_at_ai AFTER INSERT ON tasks_task
+    WHEN {SQLITE_INCONSISTENT} BEGIN {SQLITE_FIX_ROW} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_completed_at_au AFTER UPDATE OF completed, completed_at ON tasks_task
+    WHEN {SQLITE_INCONSISTENT} BEGIN {SQLITE_FIX_ROW} END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS tasks_task_completed_at_ai",
+    "DROP TRIGGER IF EXISTS tasks_task_completed_at_au",
+]
+
+
+def install_completion_triggers(connection):
+    statements = {
+        'postgresql': POSTGRES_INSTALL,
+        'sqlite': SQLITE_TRIGGERS,
+    }.get(connection.vendor, [])
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return bool(statements)
+
+
+def uninstall_completion_triggers(connection):
+    statements = {
+        'postgresql': POSTGRES_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(connection.vendor, [])
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def repair_completion_triggers(connection):
+    """
+    SQLite drops triggers when a migration rebuilds tasks_task,
+    so re-create them whenever their migration is applied
+    """
+    if connection.vendor != 'sqlite':
+        return
+    if TRIGGER_MIGRATION not in MigrationRecorder(connection).applied_migrations():
+        return
+    with connection.cursor() as cursor:
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def complete_tasks(queryset):
+    """
+    Mark every incomplete task in `queryset` complete with a single UPDATE;
+    the completion trigger stamps completed_at. Returns the number of tasks completed.
+    """
+    queryset = queryset.filter(completed=False)
+    parent_ids = set(
+        queryset.filter(parent_task__isnull=False).order_by()
+        .values_list('parent_task_id', flat=True).distinct()
+    )
+
+    changes = {'completed': True, 'updated_at': timezone.now()}
+    if connections[queryset.db].vendor not in TRIGGER_VENDORS:
+        changes['completed_at'] = changes['updated_at']
+    completed = queryset.update(**changes)
+
+    refresh_subtask_aggregates(parent_ids)
+    return completed
@@ -0,0 +1,28 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Deletes task tombstones older than the delta sync retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.TASK_TOMBSTONE_RETENTION_DAYS,
+            help='Keep tombstones from the last N days (sync tokens older than this get a full reset)',
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days < settings.TASK_TOMBSTONE_RETENTION_DAYS:
+            self.stdout.write(self.style.WARNING(
+                f'Purging below TASK_TOMBSTONE_RETENTION_DAYS ({settings.TASK_TOMBSTONE_RETENTION_DAYS}): '
+                'clients with older tokens may keep deleted tasks'
+            ))
+
+        purged = purge_tombstones(timezone.now() - timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f'✓ Purged {purged} tombstones'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, DEFAULT_DB_ALIAS
+from tasks.search import install_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Creates (if missing) and backfills the task full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of tasks to index per UPDATE (PostgreSQL only)',
+        )
+
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild the index on',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+
+        if not install_search_index(connection):
+            self.stdout.write(
+                self.style.WARNING(f'No full-text index support on {connection.vendor}, nothing to rebuild')
+            )
+            return
+
+        self.stdout.write('Rebuilding task search index...')
+        indexed = rebuild_search_index(connection, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {indexed} tasks'))
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:11
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_subtask_aggregates(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    subtasks = Task.objects.filter(parent_task=OuterRef('pk')).order_by().values('parent_task')
+    parents = Task.objects.filter(parent_task__isnull=False).values('parent_task')
+    Task.objects.filter(pk__in=parents).update(
+        subtask_count=Coalesce(
+            Subquery(subtasks.annotate(total=Count('id')).values('total')), 0
+        ),
+        completed_subtask_count=Coalesce(
+            Subquery(subtasks.annotate(total=Count('id', filter=Q(completed=True))).values('total')), 0
+        ),
+        remaining_subtask_time=Coalesce(
+            Subquery(subtasks.annotate(total=Sum('estimated_time', filter=Q(completed=False))).values('total')),
+            Value(datetime.timedelta(0))
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_subtask_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='remaining_subtask_time',
+            field=models.DurationField(default=datetime.timedelta(0), editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtask_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_subtask_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+from tasks.search import install_search_index, uninstall_search_index, rebuild_search_index
+
+
+def install(apps, schema_editor):
+    if install_search_index(schema_editor.connection):
+        rebuild_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_subtask_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
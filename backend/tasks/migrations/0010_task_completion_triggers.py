@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import F
+from tasks.completion import install_completion_triggers, uninstall_completion_triggers
+
+
+def install(apps, schema_editor):
+    # Repair rows written inconsistently by earlier set-based updates
+    Task = apps.get_model('tasks', 'Task')
+    db = schema_editor.connection.alias
+    Task.objects.using(db).filter(completed=True, completed_at__isnull=True).update(completed_at=F('updated_at'))
+    Task.objects.using(db).filter(completed=False, completed_at__isnull=False).update(completed_at=None)
+
+    install_completion_triggers(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_completion_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
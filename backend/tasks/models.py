@@ -4,6 +4,7 @@ from users.models import Tag, Category
 from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.utils import timezone
+from datetime import timedelta
 
 # Create your models here.
 class Task(models.Model):
@@ -24,25 +25,96 @@ class Task(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
     tags = models.ManyToManyField(Tag, blank=True)
 
+    # Aggregates over sub_tasks, kept current by tasks.signals (see tasks/aggregates.py)
+    subtask_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_subtask_count = models.PositiveIntegerField(default=0, editable=False)
+    remaining_subtask_time = models.DurationField(default=timedelta(0), editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row contributed to its parent's aggregates when loaded
+        instance._stored_contribution = instance.subtask_contribution(loaded_fields=field_names)
+        return instance
+
+    def subtask_contribution(self, loaded_fields=None):
+        """
+        What this task adds to its parent's aggregates: (parent_id, completed, remaining_time)
+        Returns None when the needed fields were not loaded (deferred).
+        """
+        if loaded_fields is not None and not {'parent_task_id', 'completed', 'estimated_time'} <= set(loaded_fields):
+            return None
+        if self.completed:
+            return (self.parent_task_id, 1, timedelta(0))
+        return (self.parent_task_id, 0, self.estimated_time or timedelta(0))
+
 
     def clean(self):
         super().clean()
         if self.parent_task and self.parent_task.parent_task:
             raise ValidationError("Subtasks cannot have their own subtasks (max depth: 1)")
 
-    def save(self, *args, **kwargs):
+    def sync_completed_at(self, now=None):
+        """
+        Set or clear completed_at to match completed. Returns True if it changed.
+        """
         # Marking task complete, set completion date
         if self.completed and not self.completed_at:
-            self.completed_at = timezone.now()
+            self.completed_at = now or timezone.now()
+            return True
         # Marking task incomplete, remove completion date
         elif not self.completed and self.completed_at:
             self.completed_at= None
+            return True
+        return False
 
+    def save(self, *args, **kwargs):
+        self.sync_completed_at()
         return super().save(*args, **kwargs)
     
     
+    class Meta:
+        # Every listing is scoped to one user, so user leads each index.
+        # Shapes follow the filters/sorts in api.views.task_views.
+        indexes = [
+            # default ordering and due_date range filters (past/today/week/future)
+            models.Index(fields=['user', 'due_date', 'created_at'], name='task_user_due_idx'),
+            # status filter
+            models.Index(fields=['user', 'completed', 'due_date'], name='task_user_status_due_idx'),
+            # category filter
+            models.Index(fields=['user', 'category', 'due_date'], name='task_user_category_due_idx'),
+            # top-level listings (parent_task=null)
+            models.Index(fields=['user', 'due_date'], condition=models.Q(parent_task__isnull=True),
+                         name='task_toplevel_due_idx'),
+            # overdue / open workload: incomplete tasks only
+            models.Index(fields=['user', 'due_date'], condition=models.Q(completed=False),
+                         name='task_open_due_idx'),
+            # createdAt sort
+            models.Index(fields=['user', 'created_at'], name='task_user_created_idx'),
+            # delta sync (tasks changed since a token)
+            models.Index(fields=['user', 'updated_at'], name='task_user_updated_idx'),
+        ]
+
     def get_absolute_url(self):
         return reverse('task-detail', kwargs={'pk': self.pk})
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+class TaskTombstone(models.Model):
+    """
+    Marker left behind by a deleted task, so sync clients can drop it from their local copy.
+    The auto-increment id doubles as a monotonic deletion sequence.
+    """
+    # No FK constraint: tombstones are written while the user's rows may be going away too
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False, related_name='+')
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'Task {self.task_id} (deleted {self.deleted_at})'
@@ -0,0 +1,226 @@
+"""
+Full-text search over task titles and descriptions.
+
+PostgreSQL: a trigger-maintained `search_vector` tsvector column with a GIN index.
+SQLite: an external-content FTS5 table (tasks_task_fts) kept in sync by triggers.
+Anything else (or an SQLite build without FTS5) falls back to icontains matching.
+"""
+import re
+import logging
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'tasks_task_fts'
+MAX_SEARCH_TERMS = 16
+
+# Title matches weigh more than description matches
+POSTGRES_VECTOR_SQL = (
+    "setweight(to_tsvector('{config}', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('{config}', coalesce({row}description, '')), 'B')"
+)
+
+POSTGRES_INSTALL = [
+    "ALTER TABLE tasks_task ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS tasks_task_search_idx ON tasks_task USING gin (search_vector)",
+    f"""
+    CREATE OR REPLACE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {POSTGRES_VECTOR_SQL.format(config=SEARCH_CONFIG, row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task",
+    """
+    CREATE TRIGGER tasks_task_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description ON tasks_task
+        FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update()
+    """,
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task",
+    "DROP FUNCTION IF EXISTS tasks_task_search_vector_update()",
+    "DROP INDEX IF EXISTS tasks_task_search_idx",
+    "ALTER TABLE tasks_task DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='tasks_task', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+"""
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def install_search_index(connection):
+    """
+    Create the search index objects for this database (idempotent)
+    """
+    if connection.vendor == 'postgresql':
+        statements = POSTGRES_INSTALL
+    elif connection.vendor == 'sqlite' and sqlite_has_fts5(connection):
+        statements = [SQLITE_TABLE] + SQLITE_TRIGGERS
+    else:
+        logger.warning("No full-text index available for %s, search will use icontains", connection.vendor)
+        return False
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return True
+
+
+def uninstall_search_index(connection):
+    statements = {
+        'postgresql': POSTGRES_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(connection.vendor, [])
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def search_index_installed(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            columns = connection.introspection.get_table_description(cursor, 'tasks_task')
+            return any(column.name == 'search_vector' for column in columns)
+        if connection.vendor == 'sqlite':
+            return FTS_TABLE in connection.introspection.table_names(cursor)
+    return False
+
+
+def repair_search_triggers(connection):
+    """
+    SQLite drops triggers when a migration rebuilds tasks_task,
+    so re-create them whenever the FTS table is already in place
+    """
+    if connection.vendor == 'sqlite' and search_index_installed(connection):
+        with connection.cursor() as cursor:
+            for statement in SQLITE_TRIGGERS:
+                cursor.execute(statement)
+
+
+def rebuild_search_index(connection, batch_size=1000):
+    """
+    Backfill the index from the task table. Returns the number of rows indexed.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute("SELECT COUNT(*) FROM tasks_task")
+            return cursor.fetchone()[0]
+
+        if connection.vendor != 'postgresql':
+            return 0
+
+        # Walk the table in primary key batches to keep each transaction short
+        vector = POSTGRES_VECTOR_SQL.format(config=SEARCH_CONFIG, row='')
+        total, last_id = 0, 0
+        while True:
+            cursor.execute(
+                "SELECT MAX(id), COUNT(*) FROM "
+                "(SELECT id FROM tasks_task WHERE id > %s ORDER BY id LIMIT %s) AS batch",
+                [last_id, batch_size]
+            )
+            batch_end, batch_count = cursor.fetchone()
+            if not batch_count:
+                return total
+            cursor.execute(
+                f"UPDATE tasks_task SET search_vector = {vector} WHERE id > %s AND id <= %s",
+                [last_id, batch_end]
+            )
+            total += batch_count
+            last_id = batch_end
+
+
+_index_available = {}
+
+def _uses_index(connection):
+    key = (connection.alias, str(connection.settings_dict['NAME']))
+    if key not in _index_available:
+        _index_available[key] = search_index_installed(connection)
+    return _index_available[key]
+
+
+def search_terms(text):
+    return re.findall(r'\w+', text.lower())[:MAX_SEARCH_TERMS]
+
+
+def search_tasks(queryset, text):
+    """
+    Filter a Task queryset to rows matching every term of `text` (prefix matches),
+    annotated with a `search_rank` relevance score (higher is better)
+    Terms match from the start of a word: "rep" finds "report", "port" does not.
+    """
+    terms = search_terms(text)
+    connection = connections[queryset.db]
+
+    if not terms or not _uses_index(connection):
+        return queryset.filter(
+            Q(title__icontains=text) |
+            Q(description__icontains=text)
+        )
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        params = [SEARCH_CONFIG, tsquery]
+        return queryset.filter(
+            RawSQL('"tasks_task"."search_vector" @@ to_tsquery(%s::regconfig, %s)', params, output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL('ts_rank("tasks_task"."search_vector", to_tsquery(%s::regconfig, %s))', params, output_field=FloatField())
+        )
+
+    # SQLite FTS5: quote every term so user input is never parsed as query syntax
+    match = ' '.join(f'"{term}"*' for term in terms)
+    return queryset.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    ).annotate(
+        # bm25() is lower-is-better; title column weighted like Postgres' 'A' weight
+        search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "tasks_task"."id"',
+            [match], output_field=FloatField()
+        )
+    )
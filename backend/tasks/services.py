@@ -0,0 +1,93 @@
+"""
+Task write services shared by the API views and the model signals
+"""
+import logging
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.utils import timezone
+from .models import Task
+from .aggregates import refresh_subtask_aggregates
+
+logger = logging.getLogger(__name__)
+
+
+def reassign_subtasks(task, now=None):
+    """
+    Hand the subtasks of `task` (about to be deleted) to its own parent or, for a
+    top-level task, make them top-level tasks in its category, with a single UPDATE.
+    Runs at most once per instance. Returns the values written to the subtasks
+    ({} when there were none).
+    """
+    if getattr(task, '_subtasks_reassigned', False):
+        return {}
+    task._subtasks_reassigned = True
+
+    changes = {'updated_at': now or timezone.now()}
+    if task.parent_task_id:  # subtask depth > 1 is no longer allowed, but older rows can have it
+        changes['parent_task_id'] = task.parent_task_id
+    else:
+        changes['parent_task_id'] = None
+        changes['category_id'] = task.category_id  # inherit the parent's category
+
+    reassigned = Task.objects.filter(parent_task_id=task.pk).update(**changes)
+    if not reassigned:
+        return {}
+    if task.parent_task_id:
+        refresh_subtask_aggregates([task.parent_task_id])
+
+    logger.debug("Reassigned %s subtasks of task %s", reassigned, task.pk)
+    return changes
+
+
+def delete_task(task, keep_subtasks=True):
+    """
+    Delete `task` in one transaction, either keeping its subtasks (see reassign_subtasks)
+    or deleting them with it. Returns the values written to the kept subtasks,
+    so callers can patch rows they read beforehand instead of querying them again.
+    """
+    with transaction.atomic():
+        if keep_subtasks:
+            changes = reassign_subtasks(task)
+        else:
+            Task.objects.filter(parent_task_id=task.pk).delete()
+            task._subtasks_reassigned = True
+            changes = {}
+        task.delete()
+    return changes
+
+
+def delete_category(category, reassign_to=None):
+    """
+    Delete `category`, moving its tasks to `reassign_to` (another category of the same
+    user) with a single UPDATE, or leaving them uncategorized (on_delete=SET_NULL).
+    Subtasks without a category of their own display their parent's, so they are
+    touched by the same UPDATE. Returns {'task_count', 'inherited_count'}.
+    """
+    category_pk = category.pk  # cleared by delete()
+    direct = Q(category=category)
+    inherited = Q(category__isnull=True, parent_task__category=category)
+    with transaction.atomic():
+        affected = Task.objects.filter(direct | inherited)
+        counts = affected.aggregate(
+            task_count=Count('id', filter=direct),
+            inherited_count=Count('id', filter=inherited),
+        )
+        if reassign_to is not None:
+            affected.update(
+                category_id=Case(
+                    When(direct, then=Value(reassign_to.pk)),
+                    default=F('category_id'),
+                    output_field=IntegerField()
+                ),
+                updated_at=timezone.now()
+            )
+        category.delete()
+
+    if reassign_to is not None:
+        logger.info(
+            "Deleted category %s: %s tasks moved to category %s",
+            category_pk, counts['task_count'], reassign_to.pk
+        )
+    else:
+        logger.info("Deleted category %s: %s tasks uncategorized", category_pk, counts['task_count'])
+    return counts
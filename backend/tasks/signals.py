@@ -1,29 +1,117 @@
-from django.db.models.signals import pre_delete
+from django.db import connections
+from django.db.models import Q
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete, post_migrate, m2m_changed
 from django.dispatch import receiver
+from users.models import Category, Tag
 from .models import Task
+from .aggregates import AGGREGATED_FIELDS, refresh_subtask_aggregates
+from .search import repair_search_triggers
+from .completion import repair_completion_triggers
+from .services import reassign_subtasks
+from .sync import record_tombstone, touch_tasks
 
 @receiver(pre_delete, sender=Task)
 def reassign_subtasks_to_parent(sender, instance, **kwargs):
     """
     Reassign sub-tasks of a deleted parent task (Task A) to its parent task (Task B).
-    If no parent task exists, set sub-tasks' category to parent's category. If no sub-tasks exist, no action is taken.
-    """
-
-    if instance.sub_tasks.exists():
-        parent_task = instance.parent_task
-        parent_category = instance.category
-
-        if parent_task:  # No longer allowing subtask depth > 1... for the time being
-            for subtask in instance.sub_tasks.all():
-                subtask.parent_task = parent_task
-                subtask.save()
-            print(f"Transferred {instance.sub_tasks.count()} sub-tasks to parent task {parent_task.title}")
-        
-        else: 
-            for subtask in instance.sub_tasks.all():
-                subtask.category = parent_category  # inherit parent's category
-                subtask.save()
-            print(f"Sub-tasks of {instance.title} have been disassociated.")
-
-    else:
-        print(f"No sub-tasks to reassign for task: {instance.title}")
+    If no parent task exists, sub-tasks become top-level tasks in the parent's category.
+    A single UPDATE (tasks.services.reassign_subtasks); a no-op when delete_task already did it.
+    """
+    reassign_subtasks(instance)
+
+
+@receiver(pre_save, sender=Task)
+def capture_subtask_contribution(sender, instance, raw=False, **kwargs):
+    """
+    Make sure we know what the stored row contributed to its parent's aggregates
+    before it gets overwritten.
+    """
+    if raw:
+        return
+    if instance._state.adding:
+        instance._stored_contribution = None
+    elif getattr(instance, '_stored_contribution', None) is None:
+        # Deferred fields or an instance not loaded from the DB: read the stored row
+        row = Task.objects.filter(pk=instance.pk).values_list(
+            'parent_task_id', 'completed', 'estimated_time'
+        ).first()
+        if row:
+            stored = Task(parent_task_id=row[0], completed=row[1], estimated_time=row[2])
+            instance._stored_contribution = stored.subtask_contribution()
+
+
+def _stored_parent_id(instance):
+    stored = getattr(instance, '_stored_contribution', None)
+    return stored[0] if stored else None
+
+
+@receiver(post_save, sender=Task)
+def update_parent_subtask_aggregates(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Keep the parent's subtask_count / completed_subtask_count / remaining_subtask_time
+    current on subtask create, update and reparent. The old and new parents are
+    recounted rather than shifted by a delta: a stale instance's idea of what the
+    row held before the write can't be trusted.
+    """
+    if raw:
+        return
+    if update_fields is None or AGGREGATED_FIELDS.intersection(update_fields):
+        refresh_subtask_aggregates({_stored_parent_id(instance), instance.parent_task_id})
+    instance._stored_contribution = instance.subtask_contribution()
+
+
+@receiver(post_delete, sender=Task)
+def remove_subtask_from_parent_aggregates(sender, instance, **kwargs):
+    refresh_subtask_aggregates({_stored_parent_id(instance), instance.parent_task_id})
+
+
+@receiver(post_delete, sender=Task)
+def record_task_tombstone(sender, instance, **kwargs):
+    """
+    Leave a tombstone for delta sync; covers single deletes, subtask cleanup and cascades
+    """
+    record_tombstone(instance)
+
+
+# ---------- Delta sync: writes that change a task's serialized form without saving it ----------
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_tasks(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Category renames and deletes change category_name on its tasks
+    (and on subtasks inheriting it from their parent)
+    """
+    if created or raw:
+        return
+    touch_tasks(Task.objects.filter(
+        Q(category=instance) | Q(category__isnull=True, parent_task__category=instance)
+    ))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tag_tasks(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    touch_tasks(Task.objects.filter(tags=instance))
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def touch_retagged_tasks(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            touch_tasks(Task.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        touch_tasks(Task.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        touch_tasks(Task.objects.filter(tags=instance))
+
+
+@receiver(post_migrate)
+def restore_task_triggers(sender, using, **kwargs):
+    """
+    Table rebuilds during migrations drop SQLite triggers; put the search and completion ones back.
+    """
+    if sender.name == 'tasks':
+        repair_search_triggers(connections[using])
+        repair_completion_triggers(connections[using])
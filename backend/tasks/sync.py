@@ -0,0 +1,118 @@
+"""
+Delta sync: which of a user's tasks changed, or were deleted, since a sync token.
+
+Changes are found through Task.updated_at, deletions through TaskTombstone rows
+(whose id is a monotonic deletion sequence). Writes that alter a task's
+serialized form without calling save() must go through touch_tasks().
+"""
+import base64
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Task, TaskTombstone
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+class SyncToken:
+    """
+    Position in a user's change stream: `timestamp` is the updated_at / deleted_at
+    high-water mark, `sequence` the last tombstone id handed out.
+    Tombstone ids are shared by all users, so a token only holds for the user it was issued to.
+    """
+    def __init__(self, user_id, timestamp, sequence=0):
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.sequence = sequence
+
+    def encode(self):
+        payload = {'u': self.user_id, 't': self.timestamp.isoformat(), 's': self.sequence}
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, token, user_id):
+        """
+        The token issued to `user_id`; raises InvalidSyncToken for a malformed
+        token or one issued to another user
+        """
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            timestamp = parse_datetime(payload['t'])
+            sequence = int(payload['s'])
+            token_user_id = payload['u']
+        except (ValueError, TypeError, KeyError):
+            raise InvalidSyncToken('Malformed sync token')
+        if timestamp is None or timezone.is_naive(timestamp):
+            raise InvalidSyncToken('Malformed sync token')
+        if token_user_id != user_id:
+            raise InvalidSyncToken('Sync token was issued to another user')
+        return cls(user_id, timestamp, sequence)
+
+
+def touch_tasks(queryset):
+    """
+    Mark tasks as changed for sync after a set-based write (update() skips auto_now)
+    """
+    return queryset.update(updated_at=timezone.now())
+
+
+def record_tombstone(task):
+    TaskTombstone.objects.create(user_id=task.user_id, task_id=task.pk)
+
+
+def purge_tombstones(older_than=None):
+    """
+    Delete tombstones past the retention window. Returns the number removed.
+    """
+    if older_than is None:
+        older_than = timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=older_than).delete()
+    return deleted
+
+
+def get_changes(user, token=None):
+    """
+    Return (tasks, deleted_ids, next_token, reset) for `user` since `token`.
+
+    Without a token, or with one older than the tombstone retention window,
+    every task is returned with reset=True: the client must replace its copy.
+
+    Each token re-reads a short overlap window (TASK_SYNC_OVERLAP_SECONDS), so rows
+    committed by a transaction that started before the previous sync are not lost;
+    clients upsert tasks by id, so repeats are harmless.
+    """
+    now = timezone.now()
+    retention = timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+    tasks = Task.objects.filter(user=user)
+    tombstones = TaskTombstone.objects.filter(user=user)
+
+    reset = token is None or token.timestamp < now - retention
+    if reset:
+        deleted_ids = []
+        sequence = tombstones.aggregate(last=Max('id'))['last'] or 0
+        since = None
+    else:
+        since = token.timestamp
+        tasks = tasks.filter(updated_at__gte=since)
+        # Newer sequence numbers, plus anything stamped inside the window
+        # (a lower id can commit after a higher one was read)
+        deleted = list(
+            tombstones.filter(Q(id__gt=token.sequence) | Q(deleted_at__gte=since))
+            .order_by('id').values_list('id', 'task_id')
+        )
+        deleted_ids = list(dict.fromkeys(task_id for _, task_id in deleted))
+        sequence = max([token.sequence] + [pk for pk, _ in deleted])
+
+    # Never move the high-water mark backwards
+    timestamp = now - timedelta(seconds=settings.TASK_SYNC_OVERLAP_SECONDS)
+    if since is not None:
+        timestamp = max(timestamp, since)
+
+    return tasks, deleted_ids, SyncToken(user.pk, timestamp, sequence), reset
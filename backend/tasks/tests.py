@@ -1,3 +1,492 @@
+import re
+import random
+import zoneinfo
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import product
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.http import QueryDict
 from django.test import TestCase
+from django.utils import timezone
+from users.models import Category, Tag
+from tasks.models import Task
+from tasks.services import delete_task
+from tasks.search import search_index_installed, search_tasks
+from tasks.completion import TRIGGER_VENDORS, complete_tasks
+from tasks.analytics import UNCATEGORIZED, load_history, productivity_stats
+from tasks.workload import workload_rows
+from tasks.timeline import bucket_tasks
+from api.views.task_views import TaskListCreateView
 
-# Create your tests here.
+
+SEEDED_USERS = 20
+TASKS_PER_USER = 1000
+
+# Plan lines that mean a full pass over one of our tables
+SEQ_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (tasks_task|tasks_task_tags|users_category|users_tag|T\d+)\b'),
+    'postgresql': re.compile(r'\bSeq Scan on (tasks_task|tasks_task_tags|users_category|users_tag)\b'),
+}
+
+FILTERS = [
+    {},
+    {'parent_task': 'null'},
+    {'parent_task': 'PARENT'},
+    {'status': 'true'},
+    {'status': 'false'},
+    {'category': 'CATEGORY'},
+    {'category': 'null'},
+    {'due_date': 'past'},
+    {'due_date': 'overdue'},
+    {'due_date': 'today'},
+    {'due_date': 'week'},
+    {'due_date': 'future'},
+    {'due_date': 'none'},
+    {'tag': 'TAG'},
+    {'tag': 'TAGS', 'match': 'any'},
+    {'tag': 'TAGS', 'match': 'all'},
+    {'not_tag': 'TAG'},
+    {'tag': 'TAGS', 'match': 'all', 'not_tag': 'OTHER_TAG'},
+    {'search': 'report'},
+    {'status': 'false', 'due_date': 'week'},
+    {'parent_task': 'null', 'status': 'false', 'category': 'CATEGORY'},
+]
+
+SORTS = [
+    [],
+    ['dueDate', 'asc'], ['dueDate', 'desc'],
+    ['categoryPriority', 'asc'], ['categoryPriority', 'desc'],
+    ['duration', 'asc'], ['duration', 'desc'],
+    ['createdAt', 'desc'],
+    ['numOfSubtasks', 'asc'], ['numOfSubtasks', 'desc'],
+]
+
+
+class TaskQueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN for every task list filter/sort combination over a seeded
+    multi-user dataset and fails if any plan falls back to a sequential scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        now = timezone.now()
+        words = ['report', 'email', 'groceries', 'review', 'call', 'plan', 'budget', 'draft']
+
+        for index in range(SEEDED_USERS):
+            user = User.objects.create_user(f'planner{index}', password='not-used')
+            categories = Category.objects.bulk_create([
+                Category(user=user, name=f'cat{n}', priority=n) for n in range(5)
+            ])
+            tags = Tag.objects.bulk_create([Tag(user=user, name=f'tag{n}') for n in range(10)])
+
+            tasks = Task.objects.bulk_create([
+                Task(
+                    user=user,
+                    title=f'{rng.choice(words)} {n}',
+                    description=' '.join(rng.choices(words, k=6)),
+                    due_date=None if n % 7 == 0 else now + timedelta(days=rng.randint(-60, 60)),
+                    estimated_time=timedelta(minutes=rng.randint(5, 240)),
+                    completed=rng.random() < 0.4,
+                    category=rng.choice(categories + [None]),
+                )
+                for n in range(TASKS_PER_USER)
+            ])
+            parents = tasks[:50]
+            for task in tasks[50:250]:
+                task.parent_task = rng.choice(parents)
+            Task.objects.bulk_update(tasks[50:250], ['parent_task'])
+
+            Task.tags.through.objects.bulk_create([
+                Task.tags.through(task_id=task.id, tag_id=tag.id)
+                for task in tasks for tag in rng.sample(tags, 2)
+            ])
+
+        cls.user = User.objects.get(username='planner0')
+        cls.parent = Task.objects.filter(user=cls.user, sub_tasks__isnull=False).first()
+        cls.category = Category.objects.filter(user=cls.user).first()
+        cls.tag, cls.second_tag, cls.other_tag = Tag.objects.filter(user=cls.user).order_by('id')[:3]
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def build_queryset(self, filters, sorting):
+        placeholders = {
+            'PARENT': self.parent.pk, 'CATEGORY': self.category.pk, 'TAG': self.tag.pk,
+            'TAGS': f'{self.tag.pk},{self.second_tag.pk}', 'OTHER_TAG': self.other_tag.pk,
+        }
+        params = QueryDict(mutable=True)
+        for key, value in filters.items():
+            params[key] = str(placeholders.get(value, value))
+
+        view = TaskListCreateView()
+        queryset = view.apply_filters(Task.objects.filter(user=self.user), params)
+        queryset = queryset.select_related('category', 'parent_task__category')
+        ranked = 'search_rank' in queryset.query.annotations
+        annotations, keys = view.get_sort_keys(sorting, ranked=ranked)
+        return view.apply_sorting(queryset, keys, annotations)
+
+    def assertNoSeqScan(self, queryset):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f'No plan checks for {connection.vendor}')
+        plan = queryset.explain()
+        self.assertIsNone(
+            pattern.search(plan),
+            f'Sequential scan in plan:\n{plan}\n\nSQL:\n{queryset.query}'
+        )
+
+    def test_filter_and_sort_combinations_use_indexes(self):
+        for filters, sorting in product(FILTERS, SORTS):
+            with self.subTest(filters=filters, sorting=sorting):
+                self.assertNoSeqScan(self.build_queryset(filters, sorting))
+
+    def test_top_level_listing_uses_index(self):
+        queryset = Task.objects.filter(user=self.user, parent_task__isnull=True).order_by(
+            'due_date', '-created_at'
+        )
+        self.assertNoSeqScan(queryset)
+
+    def test_subtask_listing_uses_index(self):
+        self.assertNoSeqScan(Task.objects.filter(parent_task=self.parent).order_by('due_date'))
+
+    def test_date_filters_are_sargable(self):
+        """
+        Date filters must compare the raw column against bounds, never wrap it in a function
+        """
+        for value in ['past', 'overdue', 'today', 'week', 'future']:
+            with self.subTest(due_date=value):
+                sql = str(self.build_queryset({'due_date': value}, []).query)
+                where = sql.split(' WHERE ', 1)[1]
+                self.assertNotRegex(where, r'django_datetime_cast_date|::date|AT TIME ZONE')
+
+    def test_workload_query_uses_index(self):
+        start = timezone.localdate()
+        self.assertNoSeqScan(workload_rows(self.user, start, start + timedelta(days=90), timezone.get_current_timezone()))
+
+    def test_calendar_query_uses_index(self):
+        start = timezone.localdate()
+        tz = timezone.get_current_timezone()
+        for bucket in ('day', 'week', 'month'):
+            with self.subTest(bucket=bucket):
+                self.assertNoSeqScan(bucket_tasks(Task.objects.filter(user=self.user), start, start + timedelta(days=90), tz, bucket))
+
+
+class SubtaskAggregateTests(TestCase):
+    """
+    subtask_count / completed_subtask_count / remaining_subtask_time, kept by
+    tasks.signals, always equal a recount of the subtasks
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('aggregates', password='not-used')
+
+    def setUp(self):
+        self.first = Task.objects.create(user=self.user, title='first parent')
+        self.second = Task.objects.create(user=self.user, title='second parent')
+        self.subtask = Task.objects.create(
+            user=self.user, title='subtask', parent_task=self.first, estimated_time=timedelta(minutes=30)
+        )
+        Task.objects.create(user=self.user, title='sibling', parent_task=self.first, estimated_time=timedelta(hours=1))
+
+    def assertAggregatesCurrent(self, *parents):
+        for parent in parents:
+            parent.refresh_from_db()
+            expected = Task.objects.filter(parent_task=parent).aggregate(
+                expected_count=Count('id'),
+                expected_completed=Count('id', filter=Q(completed=True)),
+                expected_remaining=Sum('estimated_time', filter=Q(completed=False)),
+            )
+            with self.subTest(parent=parent.title):
+                self.assertEqual(parent.subtask_count, expected['expected_count'])
+                self.assertEqual(parent.completed_subtask_count, expected['expected_completed'])
+                self.assertEqual(parent.remaining_subtask_time, expected['expected_remaining'] or timedelta(0))
+
+    def test_create(self):
+        self.assertAggregatesCurrent(self.first, self.second)
+        self.assertEqual(self.first.subtask_count, 2)
+
+    def test_complete_and_uncomplete(self):
+        self.subtask.completed = True
+        self.subtask.save()
+        self.assertAggregatesCurrent(self.first)
+        self.assertEqual(self.first.completed_subtask_count, 1)
+
+        self.subtask.completed = False
+        self.subtask.save()
+        self.assertAggregatesCurrent(self.first)
+
+    def test_estimated_time_change(self):
+        self.subtask.estimated_time = timedelta(hours=2)
+        self.subtask.save()
+        self.assertAggregatesCurrent(self.first)
+
+        # An instance with deferred fields reads the stored row before saving
+        subtask = Task.objects.only('id', 'title').get(pk=self.subtask.pk)
+        subtask.estimated_time = None
+        subtask.save()
+        self.assertAggregatesCurrent(self.first)
+
+    def test_stale_instances(self):
+        # Two copies of the same row, e.g. a double-submitted completion
+        first_copy = Task.objects.get(pk=self.subtask.pk)
+        second_copy = Task.objects.get(pk=self.subtask.pk)
+        for copy in (first_copy, second_copy):
+            copy.completed = True
+            copy.save()
+        self.assertAggregatesCurrent(self.first)
+        self.assertEqual(self.first.completed_subtask_count, 1)
+
+        # A stale copy undoing a completion it never saw
+        first_copy.completed = False
+        first_copy.save()
+        stale = Task.objects.get(pk=self.subtask.pk)
+        first_copy.completed = True
+        first_copy.save()
+        stale.save()
+        self.assertAggregatesCurrent(self.first)
+
+    def test_update_fields_outside_the_aggregates(self):
+        self.subtask.title = 'renamed'
+        self.subtask.completed = True
+        self.subtask.save(update_fields=['title'])
+        self.assertAggregatesCurrent(self.first)
+        self.assertEqual(self.first.completed_subtask_count, 0)
+
+    def test_reparent(self):
+        self.subtask.completed = True
+        self.subtask.save()
+        self.subtask.parent_task = self.second
+        self.subtask.save()
+        self.assertAggregatesCurrent(self.first, self.second)
+        self.assertEqual(self.second.subtask_count, 1)
+
+        self.subtask.parent_task = self.first
+        self.subtask.completed = False
+        self.subtask.save()
+        self.assertAggregatesCurrent(self.first, self.second)
+
+        self.subtask.parent_task = None
+        self.subtask.save()
+        self.assertAggregatesCurrent(self.first, self.second)
+
+    def test_delete(self):
+        self.subtask.delete()
+        self.assertAggregatesCurrent(self.first)
+        self.assertEqual(self.first.subtask_count, 1)
+
+    def test_delete_keeping_subtasks(self):
+        # A parent that is itself a subtask (older rows) hands its subtasks to its own parent
+        self.subtask.parent_task = self.second
+        self.subtask.save()
+        Task.objects.create(user=self.user, title='nested', parent_task=self.subtask, estimated_time=timedelta(minutes=5))
+        Task.objects.create(user=self.user, title='nested done', parent_task=self.subtask, completed=True)
+
+        delete_task(Task.objects.get(pk=self.subtask.pk), keep_subtasks=True)
+        self.assertAggregatesCurrent(self.first, self.second)
+        self.assertEqual(self.second.subtask_count, 2)
+
+        # A top-level parent's subtasks become top-level tasks
+        delete_task(Task.objects.get(pk=self.first.pk), keep_subtasks=True)
+        self.assertFalse(Task.objects.filter(user=self.user, title='sibling', parent_task__isnull=False).exists())
+        self.assertAggregatesCurrent(self.second)
+
+    def test_delete_with_a_drifted_count(self):
+        # A stale subtask_count of 0 must not skip the reassignment
+        category = Category.objects.create(user=self.user, name='inherited')
+        Task.objects.filter(pk=self.first.pk).update(subtask_count=0, category=category)
+        delete_task(Task.objects.get(pk=self.first.pk), keep_subtasks=True)
+        self.assertEqual(
+            set(Task.objects.filter(user=self.user, title__in=['subtask', 'sibling']).values_list('parent_task', 'category')),
+            {(None, category.pk)}
+        )
+
+    def test_delete_with_subtasks(self):
+        Task.objects.create(user=self.user, title='nested', parent_task=self.subtask)
+        delete_task(Task.objects.get(pk=self.subtask.pk), keep_subtasks=False)
+        self.assertAggregatesCurrent(self.first)
+
+
+class TaskSearchTests(TestCase):
+    """
+    search_tasks() against the full-text index
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('searcher', password='not-used')
+        cls.report = Task.objects.create(user=cls.user, title='Quarterly report', description='numbers for the board')
+        cls.budget = Task.objects.create(user=cls.user, title='Quarterly budget', description='')
+        cls.mention = Task.objects.create(user=cls.user, title='Board meeting', description='present the report')
+        cls.port = Task.objects.create(user=cls.user, title='Port the exporter', description='')
+
+    def setUp(self):
+        if not search_index_installed(connection):
+            self.skipTest(f'No full-text index on {connection.vendor}')
+
+    def search(self, text):
+        return search_tasks(Task.objects.filter(user=self.user), text)
+
+    def assertFinds(self, text, *tasks):
+        self.assertEqual(set(self.search(text)), set(tasks))
+
+    def test_prefix_matching(self):
+        self.assertFinds('rep', self.report, self.mention)
+        self.assertFinds('quart', self.report, self.budget)
+        # Prefixes only: the middle of a word does not match
+        self.assertFinds('port', self.port)
+        self.assertFinds('export', self.port)
+
+    def test_every_term_must_match(self):
+        self.assertFinds('quarterly report', self.report)
+        self.assertFinds('board report', self.report, self.mention)
+        self.assertFinds('quarterly exporter')
+
+    def test_title_hits_rank_first(self):
+        ranked = list(self.search('report').order_by('-search_rank'))
+        self.assertEqual(ranked, [self.report, self.mention])
+
+    def test_query_syntax_in_user_input(self):
+        for text in ('"report', 'report"', 'rep*', '-report', 'report -board', '"quarterly" AND NOT report*'):
+            with self.subTest(text=text):
+                list(self.search(text))
+        self.assertFinds('-report', self.report, self.mention)
+        self.assertFinds('"quarterly" report*', self.report)
+        self.assertFinds('report -board', self.report, self.mention)
+
+
+def march(day, hour=0, minute=0):
+    return datetime(2026, 3, day, hour, minute, tzinfo=dt_timezone.utc)
+
+
+class ProductivityStatsTests(TestCase):
+    """
+    tasks.analytics over a fixed history around the 2026-03-08 US DST change
+    """
+    new_york = zoneinfo.ZoneInfo('America/New_York')
+    now = march(10, 12)  # 08:00 EDT
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('analyst', password='not-used')
+        cls.work = Category.objects.create(user=cls.user, name='work')
+
+        def task(title, completed_at=None, **fields):
+            return Task.objects.create(
+                user=cls.user, title=title, completed=completed_at is not None, completed_at=completed_at, **fields
+            )
+
+        # On time (local Mar 3), elapsed 3 days against a 1 day estimate
+        cls.on_time = task('on time', march(4), due_date=march(5), estimated_time=timedelta(days=1), category=cls.work)
+        # A day late (local Mar 5), elapsed 5 days against 2
+        task('late', march(6), due_date=march(5), estimated_time=timedelta(days=2), category=cls.work)
+        # Inherits `work` from its parent
+        task('subtask', march(6, 1), parent_task=cls.on_time)
+        task('overdue', due_date=march(9))
+        task('due later', due_date=march(12))
+        task('no due date')
+        # Local Mar 7 20:00 EST, Mar 8 21:00 EDT, Mar 9 00:30 EDT: three local days in a row,
+        # but only two UTC days (Mar 8, 9) and two days at a fixed EST offset (Mar 7, 8)
+        task('streak 1', march(8, 1))
+        task('streak 2', march(9, 1))
+        task('streak 3', march(9, 4, 30))
+        Task.objects.filter(user=cls.user).update(created_at=march(1))
+
+    def stats(self, now=None, tz=None):
+        return productivity_stats(Task.objects.filter(user=self.user), tz or self.new_york, now or self.now)
+
+    def test_overall(self):
+        overall, _ = self.stats()
+        self.assertEqual(overall['task_count'], 9)
+        self.assertEqual(overall['completed_count'], 6)
+        self.assertAlmostEqual(overall['completion_rate'], 6 / 9)
+        self.assertEqual(overall['overdue_count'], 1)
+
+    def test_lateness(self):
+        lateness = self.stats()[0]['lateness']
+        self.assertEqual(lateness['completed_with_due_date'], 2)
+        self.assertEqual(lateness['late_count'], 1)
+        self.assertEqual(lateness['on_time_rate'], 0.5)
+        self.assertEqual(lateness['median_late_by'], 86400)
+
+    def test_estimates(self):
+        estimates = self.stats()[0]['estimates']
+        self.assertEqual(estimates['task_count'], 2)
+        self.assertAlmostEqual(estimates['median_elapsed_ratio'], (3 + 2.5) / 2)
+        self.assertAlmostEqual(estimates['median_elapsed'], 4 * 86400)
+        self.assertEqual(estimates['within_estimate_rate'], 0)
+
+    def test_streaks_count_local_days_across_dst(self):
+        overall, _ = self.stats()
+        self.assertEqual(overall['streaks'], {'current': 3, 'longest': 3})
+
+        # Nothing completed yet today still continues yesterday's streak, two days later it's over
+        self.assertEqual(self.stats(now=march(11, 3))[0]['streaks']['current'], 3)  # Mar 10 23:00 EDT
+        self.assertEqual(self.stats(now=march(11, 12))[0]['streaks'], {'current': 0, 'longest': 3})
+
+        # The same completions on UTC days, and at a fixed EST offset that ignores DST
+        self.assertEqual(self.stats(tz=dt_timezone.utc)[0]['streaks'], {'current': 2, 'longest': 2})
+        fixed_est = dt_timezone(timedelta(hours=-5))
+        self.assertEqual(self.stats(tz=fixed_est)[0]['streaks'], {'current': 0, 'longest': 2})
+
+    def test_subtasks_fall_back_to_the_parent_category(self):
+        history = load_history(Task.objects.filter(user=self.user, parent_task__isnull=False))
+        self.assertEqual(history.category.tolist(), [self.work.pk])
+
+        _, categories = self.stats()
+        self.assertEqual(set(categories), {self.work.pk, UNCATEGORIZED})
+        self.assertEqual(categories[self.work.pk]['task_count'], 3)
+        self.assertEqual(categories[self.work.pk]['completed_count'], 3)
+        self.assertEqual(categories[UNCATEGORIZED]['task_count'], 6)
+        self.assertEqual(categories[UNCATEGORIZED]['overdue_count'], 1)
+
+
+class CompletionTriggerTests(TestCase):
+    """
+    completed_at follows `completed` on set-based writes, which skip Task.save()
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('completer', password='not-used')
+
+    def setUp(self):
+        if connection.vendor not in TRIGGER_VENDORS:
+            self.skipTest(f'No completion triggers on {connection.vendor}')
+        self.tasks = Task.objects.bulk_create([Task(user=self.user, title=f'task {n}') for n in range(3)])
+        self.queryset = Task.objects.filter(user=self.user)
+
+    def completed_at(self):
+        return list(self.queryset.order_by('id').values_list('completed_at', flat=True))
+
+    def test_update_sets_and_clears_completed_at(self):
+        before = timezone.now()
+        self.queryset.update(completed=True)
+        stamps = self.completed_at()
+        self.assertTrue(all(stamp is not None and stamp >= before - timedelta(seconds=1) for stamp in stamps), stamps)
+
+        self.queryset.update(completed=False)
+        self.assertEqual(self.completed_at(), [None, None, None])
+
+    def test_update_keeps_an_explicit_completed_at(self):
+        stamp = timezone.now() - timedelta(days=3)
+        self.queryset.update(completed=True, completed_at=stamp)
+        self.assertEqual(self.completed_at(), [stamp] * 3)
+
+        # Already complete: a later UPDATE leaves the original time alone
+        self.queryset.update(completed=True, title='renamed')
+        self.assertEqual(self.completed_at(), [stamp] * 3)
+
+    def test_bulk_create_sets_completed_at(self):
+        task, = Task.objects.bulk_create([Task(user=self.user, title='done', completed=True)])
+        self.assertIsNotNone(Task.objects.get(pk=task.pk).completed_at)
+
+    def test_complete_tasks(self):
+        parent = self.tasks[0]
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks[1:]]).update(parent_task=parent)
+        self.assertEqual(complete_tasks(self.queryset.filter(parent_task=parent)), 2)
+
+        parent.refresh_from_db()
+        self.assertEqual(parent.completed_subtask_count, 2)
+        self.assertEqual(self.completed_at()[0], None)
+        self.assertNotIn(None, self.completed_at()[1:])
@@ -0,0 +1,22 @@
+"""
+Calendar / timeline bucketing: tasks grouped by the local day, week (starting Monday)
+or month they are due in, with the truncation done in SQL.
+"""
+from django.db.models import DateField
+from django.db.models.functions import Trunc
+from .workload import day_range_bounds
+
+BUCKETS = ('day', 'week', 'month')
+MAX_CALENDAR_DAYS = 366
+
+
+def bucket_tasks(queryset, start, end, tz, bucket='day'):
+    """
+    `queryset` narrowed to tasks due from `start` through `end` (local dates in `tz`),
+    ordered by due date and annotated with `bucket`: the local date the task's
+    day / week / month starts on
+    """
+    start_at, end_at = day_range_bounds(start, end, tz)
+    return queryset.filter(due_date__gte=start_at, due_date__lt=end_at).annotate(
+        bucket=Trunc('due_date', bucket, output_field=DateField(), tzinfo=tz)
+    ).order_by('due_date', 'id')
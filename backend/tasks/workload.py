@@ -0,0 +1,73 @@
+"""
+Workload: the summed estimated_time of incomplete tasks per due day, split by
+whether the task's category counts towards the workload limit (Category.as_workload).
+Subtasks without a category of their own count under their parent's category.
+Each task counts its own estimate; parents don't include their subtasks' time.
+"""
+from datetime import datetime, time, timedelta
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from .models import Task
+
+MAX_WORKLOAD_DAYS = 366
+GROUPS = ('workload', 'non_workload', 'uncategorized')
+
+
+def day_range_bounds(start, end, tz):
+    """
+    Aware datetimes covering the local dates `start` through `end` in `tz`
+    """
+    return (
+        datetime.combine(start, time.min, tzinfo=tz),
+        datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz),
+    )
+
+
+def workload_rows(user, start, end, tz):
+    """
+    One grouped aggregate query: a row per (local due date, as_workload) with the
+    summed estimate and task count of the user's incomplete tasks due in the range
+    """
+    start_at, end_at = day_range_bounds(start, end, tz)
+    return Task.objects.filter(
+        user=user, completed=False, due_date__gte=start_at, due_date__lt=end_at
+    ).annotate(
+        day=TruncDate('due_date', tzinfo=tz),
+        as_workload=Coalesce('category__as_workload', 'parent_task__category__as_workload'),
+    ).order_by().values('day', 'as_workload').annotate(
+        estimated_time=Sum('estimated_time'),
+        task_count=Count('id'),
+    )
+
+
+def _empty_bucket():
+    return {group: {'estimated_time': timedelta(0), 'task_count': 0} for group in GROUPS + ('total',)}
+
+
+def _add(bucket, group, estimated_time, task_count):
+    for key in (group, 'total'):
+        bucket[key]['estimated_time'] += estimated_time
+        bucket[key]['task_count'] += task_count
+
+
+def summarize_workload(rows, start, end):
+    """
+    Zero-filled per-day and per-week (weeks start on Monday) buckets from workload_rows(),
+    each {group: {'estimated_time', 'task_count'}} for GROUPS plus 'total'.
+    Returns (days, weeks, totals); days and weeks are date-ordered dicts.
+    """
+    days = {start + timedelta(days=n): _empty_bucket() for n in range((end - start).days + 1)}
+    for row in rows:
+        if row['as_workload'] is None:
+            group = 'uncategorized'
+        else:
+            group = 'workload' if row['as_workload'] else 'non_workload'
+        _add(days[row['day']], group, row['estimated_time'] or timedelta(0), row['task_count'])
+
+    weeks, totals = {}, _empty_bucket()
+    for day, bucket in days.items():
+        week = weeks.setdefault(day - timedelta(days=day.weekday()), _empty_bucket())
+        for group in GROUPS:
+            _add(week, group, bucket[group]['estimated_time'], bucket[group]['task_count'])
+            _add(totals, group, bucket[group]['estimated_time'], bucket[group]['task_count'])
+    return days, weeks, totals
@@ -40,7 +40,7 @@ class Profile(models.Model):
                     img.thumbnail(output_size)
                     img.save(self.image.path)
             except Exception as e:
-                logger.exception(f"Error resizing profile image for user {self.user.username}: {e}")
+                logger.exception("Error resizing profile image for user %s: %s", self.user.username, e)
     
     def __str__(self):
         return f'{self.user.username} Profile'
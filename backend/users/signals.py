@@ -11,7 +11,7 @@ logger = logging.getLogger(__name__)
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
     if created:
-        logger.info(f"Creating new profile for user: {instance.username}")
+        logger.info("Creating new profile for user: %s", instance.username)
         Profile.objects.create(user=instance)
 
 
@@ -27,53 +27,53 @@ def delete_old_profile_image(sender, instance, **kwargs):
     """
     # Check if we've already processed this instance during this request
     if hasattr(instance, '_image_check_complete'):
-        logger.debug(f"Skipping duplicate signal execution (flagged)")
+        logger.debug("Skipping duplicate signal execution (flagged)")
         return
     instance._image_check_complete = True  # Mark as processed to avoid duplicate processing
     
     # Skip for new instances (nothing to delete)
     if not instance.pk:
-        logger.debug(f"New profile instance, no old image to delete")
+        logger.debug("New profile instance, no old image to delete")
         return
     
     try:
         # Get previous instance from database
         old_instance = Profile.objects.get(pk=instance.pk)
 
-        logger.debug(f"Old image: {old_instance.image}")
-        logger.debug(f"New image: {instance.image}")
+        logger.debug("Old image: %s", old_instance.image)
+        logger.debug("New image: %s", instance.image)
 
         # Skip if image hasn't change
         if old_instance.image == instance.image:
-            logger.debug(f"Image hasn't been changed, skipping deletion")
+            logger.debug("Image hasn't been changed, skipping deletion")
             return
         # Skip if image is default image
         if not old_instance.image or ('default.jpg' in str(old_instance.image.path)):
-            logger.debug(f"Updating from default image, skipping deletion")
+            logger.debug("Updating from default image, skipping deletion")
             return
         
         # Convert image path to absolute file path
         old_image_path = old_instance.image.path
-        logger.debug(f"Full path to delete: {old_image_path}")
+        logger.debug("Full path to delete: %s", old_image_path)
 
         # Skip if file does not exist
         if not os.path.isfile(old_image_path):
-            logger.warning(f"Old image file doesn't exist: {old_image_path}")
+            logger.warning("Old image file doesn't exist: %s", old_image_path)
             return
         
         # We have a valid image to be deleted
-        logger.info(f"Deleting old profile image for user: {instance.user.username}")
+        logger.info("Deleting old profile image for user: %s", instance.user.username)
         try:
             os.remove(old_instance.image.path)
-            logger.debug(f"Old image deleted: {old_instance.image.path}")
+            logger.debug("Old image deleted: %s", old_instance.image.path)
         except Exception as e:
-            logger.exception(f"Failed to delete file {old_image_path}: {e}")
+            logger.exception("Failed to delete file %s: %s", old_image_path, e)
 
     except Profile.DoesNotExist:
-        logger.warning(f"Profile not found when attempting to delete old image. ID: {instance.pk}")
+        logger.warning("Profile not found when attempting to delete old image. ID: %s", instance.pk)
     except (ValueError, FileNotFoundError) as e:
         # Log error but continue with save process
-        logger.warning(f"Error deleting the old profile image for user {instance.user.username}: {e}")
+        logger.warning("Error deleting the old profile image for user %s: %s", instance.user.username, e)
     except Exception as e:
         # Log unexpected errors
-        logger.exception(f"Unexpected error when deleting old profile image: {e}")
\ No newline at end of file
+        logger.exception("Unexpected error when deleting old profile image: %s", e)
\ No newline at end of file